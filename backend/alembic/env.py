@@ -30,6 +30,7 @@ from app.models.article import Article
 from app.models.category import Category
 from app.models.tag import Tag
 from app.models.comment import Comment
+from app.models.like import article_likes, comment_likes
 from app.database import Base
 
 # add your model's MetaData object here
@@ -0,0 +1,28 @@
+"""add comments moderation queue index
+
+Revision ID: 9d4b6e1f3a25
+Revises: 5e2a9c7d4f18
+Create Date: 2026-10-18 17:05:44.210397
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b6e1f3a25'
+down_revision: Union[str, None] = '5e2a9c7d4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_comments_moderation_queue', 'comments', ['is_approved', 'is_spam', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_moderation_queue', table_name='comments')
@@ -0,0 +1,40 @@
+"""add articles fulltext index
+
+Revision ID: b3f8d2e61a07
+Revises: 7c1e5a9d2b40
+Create Date: 2026-10-18 11:02:47.915230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f8d2e61a07'
+down_revision: Union[str, None] = '7c1e5a9d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FULLTEXT 索引仅 MySQL 支持，其他数据库使用进程内索引检索
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.create_index(
+        'ft_articles_title_summary_content',
+        'articles',
+        ['title', 'summary', 'content'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ft_articles_title_summary_content', table_name='articles')
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from ..schemas.response import Response
+from ..models.user import User
+from ..database import get_pool_stats
+from ..logger import setup_logger
+from ..config import settings
+from .auth import get_current_user
+from .users import check_admin_permission
+
+logger = setup_logger("admin")
+router = APIRouter()
+
+@router.get("/admin/db/pool-stats", response_model=Response[dict], status_code=status.HTTP_200_OK)
+async def db_pool_stats(current_user: User = Depends(get_current_user)):
+    """获取数据库连接池统计信息，用于按 worker 调整连接池大小"""
+    check_admin_permission(current_user)
+    
+    try:
+        return Response[dict](
+            code=200,
+            message="获取成功",
+            data={
+                "config": {
+                    "pool_size": settings.DB_POOL_SIZE,
+                    "max_overflow": settings.DB_MAX_OVERFLOW,
+                    "pool_recycle": settings.DB_POOL_RECYCLE,
+                    "pool_timeout": settings.DB_POOL_TIMEOUT,
+                    "echo": settings.DB_ECHO
+                },
+                "pools": get_pool_stats()
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error getting pool stats: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=Response(
+                code=500,
+                message="获取连接池统计失败"
+            ).model_dump()
+        )
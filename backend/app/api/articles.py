@@ -1,26 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..schemas.article import ArticleCreate, ArticleUpdate, ArticleResponse, ArticleQuery
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..schemas.article import ArticleCreate, ArticleUpdate, ArticleResponse, ArticleDetailResponse, ArticleQuery
 from ..schemas.response import Response
 from ..models.article import Article
 from ..models.category import Category
 from ..models.tag import Tag
-from ..database import get_db
+from ..models.comment import Comment
+from ..database import get_async_db
 from ..logger import setup_logger
-from sqlalchemy import or_
+from sqlalchemy import select, func, or_, and_
 from ..utils.slug import generate_slug
-from .auth import get_current_user
-from ..dependencies.redis import (
+from ..utils.pagination import decode_cursor, next_cursor_for, InvalidCursorError
+from ..queries.article import (
+    get_article_by_id,
+    article_list_select,
+    resolve_list_fields,
+    ARTICLE_LIST_FIELDS,
+    ARTICLE_LIST_STATS,
+    ARTICLE_LIST_VIEWS
+)
+from ..search.service import search_articles as search_article_ids, index_article, unindex_article
+from ..search.highlight import highlight
+from ..queries.comment import is_comment_pending
+from .auth import get_current_user, get_token_user_id
+from ..dependencies.async_redis import (
     cache_article,
-    get_cached_article,
-    delete_article_cache,
+    get_or_load_article,
+    invalidate_comment_caches,
+    adjust_pending_comment_count,
     increment_article_view,
-    get_article_views,
     toggle_article_like,
-    get_article_likes,
-    cache_multiple_articles,
-    get_cached_multiple_articles
+    get_article_stats_bulk,
+    articles_cache,
+    article_list_scopes,
+    cache_digest
 )
 
 logger = setup_logger("articles")
@@ -30,7 +44,7 @@ router = APIRouter()
 async def create_article(
     article: ArticleCreate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     logger.info(f"Creating new article: {article.title}")
     
@@ -38,7 +52,9 @@ async def create_article(
         # 验证分类是否存在
         categories = []
         if article.category_ids:
-            categories = db.query(Category).filter(Category.id.in_(article.category_ids)).all()
+            categories = (await db.execute(
+                select(Category).where(Category.id.in_(article.category_ids))
+            )).scalars().all()
             if len(categories) != len(article.category_ids):
                 missing_ids = set(article.category_ids) - set(c.id for c in categories)
                 raise HTTPException(
@@ -52,7 +68,9 @@ async def create_article(
         # 验证标签是否存在
         tags = []
         if article.tag_ids:
-            tags = db.query(Tag).filter(Tag.id.in_(article.tag_ids)).all()
+            tags = (await db.execute(
+                select(Tag).where(Tag.id.in_(article.tag_ids))
+            )).scalars().all()
             if len(tags) != len(article.tag_ids):
                 missing_ids = set(article.tag_ids) - set(t.id for t in tags)
                 raise HTTPException(
@@ -67,7 +85,7 @@ async def create_article(
         if not article.slug:
             article.slug = generate_slug(article.title)
         
-        # 创建文章
+        # 创建文章，分类和标签在插入前设置，避免异步会话中加载关联集合
         db_article = Article(
             title=article.title,
             slug=article.slug,
@@ -79,28 +97,24 @@ async def create_article(
             status=article.status,
             is_featured=article.is_featured,
             allow_comments=article.allow_comments,
-            author_id=current_user.id  # 使用当前用户的ID
+            author_id=current_user.id,  # 使用当前用户的ID
+            categories=list(categories),
+            tags=list(tags)
         )
         
         db.add(db_article)
-        db.flush()  # 获取文章ID但不提交事务
-        
-        # 添加分类和标签关联
-        if categories:
-            db_article.categories = categories
-        if tags:
-            db_article.tags = tags
-        
-        db.commit()
-        db.refresh(db_article)
+        await db.commit()
+        db_article = await get_article_by_id(db, db_article.id)
+        await index_article(db_article)
         
         # 缓存新文章
         article_data = ArticleResponse.model_validate(db_article).model_dump()
-        cache_article(db_article.id, article_data)
+        await cache_article(db_article.id, article_data)
         
-        # 清除文章列表缓存
-        delete_article_cache("recent")
-        delete_article_cache("featured")
+        # 使相关文章列表缓存失效
+        await articles_cache.invalidate(
+            article_list_scopes(db_article.author_id, db_article.status, db_article.is_featured)
+        )
         
         logger.info(f"Article created successfully: {db_article.id}")
         return Response[ArticleResponse](
@@ -109,11 +123,11 @@ async def create_article(
             data=ArticleResponse.model_validate(db_article)
         )
     except HTTPException as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating article (HTTP): {str(e.detail)}")
         raise e
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating article: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -132,57 +146,86 @@ async def list_articles(
     is_featured: bool = Query(None, description="是否精选"),
     author_id: int = Query(None, description="作者ID"),
     title: str = Query(None, description="文章标题"),
-    db: Session = Depends(get_db)
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="分页方式：offset 或 cursor"),
+    cursor: str = Query(None, description="游标分页的起始游标，传入时自动使用游标分页"),
+    with_total: bool = Query(None, description="是否返回总数，游标分页默认不统计"),
+    view: str = Query("summary", pattern="^(summary|full)$", description="返回视图：summary 不含正文，full 返回全部字段"),
+    fields: str = Query(None, description="返回字段，逗号分隔，指定时忽略 view"),
+    user_id: Optional[int] = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取文章列表"""
-    logger.info(f"Listing articles with page: {page}, size: {size}, keyword: {keyword}, title: {title}")
+    """获取文章列表，登录用户同时返回每篇文章的 is_liked"""
+    logger.info(f"Listing articles with page: {page}, size: {size}, keyword: {keyword}, title: {title}, cursor: {cursor}")
+    use_cursor = pagination == "cursor" or cursor is not None
+    list_fields = _resolve_list_fields(fields, view)
     
-    # 如果没有过滤条件，尝试从缓存获取
-    if not any([keyword, status, is_featured, author_id, title]) and page == 1:
-        cached_articles = get_cached_multiple_articles("recent")
-        if cached_articles:
-            total = len(cached_articles)
-            total_pages = (total + size - 1) // size
-            return Response[dict](
-                code=200,
-                message="查询成功",
-                data={
-                    "items": cached_articles[:size],
-                    "total": total,
-                    "page": page,
-                    "size": size,
-                    "total_pages": total_pages
-                }
-            )
-    
-    # 构建查询
-    query = db.query(Article)
+    # 缓存键由规范化查询参数的摘要和相关范围的代数组成，文章写入后对应代数递增
+    cache_params = {
+        "pagination": "cursor" if use_cursor else "offset",
+        "page": None if use_cursor else page,
+        "cursor": cursor,
+        "with_total": with_total if use_cursor else None,
+        "size": size,
+        "keyword": keyword,
+        "title": title,
+        "status": status,
+        "is_featured": is_featured,
+        "author_id": author_id,
+        "fields": list(list_fields)
+    }
+    cache_scopes = article_list_scopes(author_id=author_id, status=status, is_featured=is_featured)
+    cache_key = await articles_cache.build_key(f"list:{cache_digest(cache_params)}", cache_scopes)
     
-    # 应用过滤条件
-    if keyword:
-        search_keyword = f"%{keyword}%"
-        query = query.filter(
-            or_(
-                Article.title.ilike(search_keyword),
-                Article.content.ilike(search_keyword),
-                Article.summary.ilike(search_keyword)
+    data = await articles_cache.get(cache_key)
+    if data is None:
+        # 构建过滤条件
+        conditions = []
+        if keyword:
+            search_keyword = f"%{keyword}%"
+            conditions.append(
+                or_(
+                    Article.title.ilike(search_keyword),
+                    Article.content.ilike(search_keyword),
+                    Article.summary.ilike(search_keyword)
+                )
             )
-        )
-    
-    if title:
-        query = query.filter(Article.title.ilike(f"%{title}%"))
-    
-    if status:
-        query = query.filter(Article.status == status)
-    
-    if is_featured is not None:
-        query = query.filter(Article.is_featured == is_featured)
-    
-    if author_id:
-        query = query.filter(Article.author_id == author_id)
+        
+        if title:
+            conditions.append(Article.title.ilike(f"%{title}%"))
+        
+        if status:
+            conditions.append(Article.status == status)
+        
+        if is_featured is not None:
+            conditions.append(Article.is_featured == is_featured)
+        
+        if author_id:
+            conditions.append(Article.author_id == author_id)
+        
+        if use_cursor:
+            data = await _list_articles_by_cursor(db, conditions, cursor, size, with_total, list_fields)
+        else:
+            data = await _list_articles_by_offset(db, conditions, page, size, list_fields)
+        await articles_cache.set(cache_key, data)
     
+    # 浏览量和点赞数变化频繁，不随列表缓存，每次批量获取
+    await _attach_stats(data["items"], list_fields, user_id)
+    return Response[dict](
+        code=200,
+        message="查询成功",
+        data=data
+    )
+
+async def _list_articles_by_offset(
+    db: AsyncSession,
+    conditions: list,
+    page: int,
+    size: int,
+    list_fields: tuple
+) -> dict:
+    """基于页码的分页"""
     # 获取总数和计算总页数
-    total = query.count()
+    total = await db.scalar(select(func.count(Article.id)).where(*conditions))
     total_pages = (total + size - 1) // size
     
     # 处理页码超出范围的情况
@@ -191,63 +234,178 @@ async def list_articles(
     
     # 获取分页数据
     offset = (page - 1) * size
-    articles = query.order_by(Article.created_at.desc()).offset(offset).limit(size).all()
+    # 只加载所需字段，按需预加载作者、分类和标签
+    articles = (await db.execute(
+        article_list_select(list_fields)
+        .where(*conditions)
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .offset(offset)
+        .limit(size)
+    )).scalars().all()
     
-    # 序列化文章数据
-    article_responses = []
-    for article in articles:
-        article_dict = {
-            "id": article.id,
-            "title": article.title,
-            "slug": article.slug,
-            "content": article.content,
-            "summary": article.summary,
-            "meta_title": article.meta_title,
-            "meta_description": article.meta_description,
-            "keywords": article.keywords,
-            "status": article.status,
-            "is_featured": article.is_featured,
-            "allow_comments": article.allow_comments,
-            "created_at": article.created_at,
-            "updated_at": article.updated_at,
-            "published_at": article.published_at,
-            "view_count": get_article_views(article.id),  # 从Redis获取浏览量
-            "like_count": get_article_likes(article.id),  # 从Redis获取点赞数
-            "comment_count": article.comment_count,
-            "author": {
+    logger.info(f"Found {len(articles)} articles out of {total} total matches")
+    return {
+        "items": [_serialize_article(article, list_fields) for article in articles],
+        "total": total,
+        "page": page,
+        "size": size,
+        "total_pages": total_pages
+    }
+
+async def _list_articles_by_cursor(
+    db: AsyncSession,
+    conditions: list,
+    cursor: str,
+    size: int,
+    with_total: bool,
+    list_fields: tuple
+) -> dict:
+    """基于 (created_at, id) 的游标分页，深分页与首页开销一致"""
+    total = await db.scalar(select(func.count(Article.id)).where(*conditions)) if with_total else None
+    conditions = list(conditions)
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=Response(
+                    code=400,
+                    message=str(e)
+                ).model_dump()
+            )
+        conditions.append(
+            or_(
+                Article.created_at < cursor_created_at,
+                and_(Article.created_at == cursor_created_at, Article.id < cursor_id)
+            )
+        )
+    
+    # 多取一条用于判断是否还有下一页
+    articles = (await db.execute(
+        article_list_select(list_fields)
+        .where(*conditions)
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(size + 1)
+    )).scalars().all()
+    next_cursor = next_cursor_for(articles, size)
+    articles = articles[:size]
+    
+    logger.info(f"Found {len(articles)} articles by cursor, has more: {next_cursor is not None}")
+    return {
+        "items": [_serialize_article(article, list_fields) for article in articles],
+        "total": total,
+        "size": size,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
+def _resolve_list_fields(fields: str, view: str) -> tuple:
+    """解析列表返回字段，字段名无效时返回 400"""
+    try:
+        return resolve_list_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=Response(
+                code=400,
+                message=str(e)
+            ).model_dump()
+        )
+
+async def _attach_stats(items: list, list_fields: tuple, user_id: Optional[int] = None):
+    """
+    需要返回浏览量或点赞数时，一次批量从 Redis 获取并填入
+
+    传入 user_id 时在同一批中填入当前用户是否已点赞，不进入列表缓存。
+    """
+    stat_fields = [field for field in ARTICLE_LIST_STATS if field in list_fields]
+    if user_id is not None:
+        stat_fields.append("is_liked")
+    if not stat_fields or not items:
+        return
+    stats = await get_article_stats_bulk([item["id"] for item in items], user_id=user_id)
+    for item in items:
+        for field in stat_fields:
+            value = stats[item["id"]][field]
+            # Redis 中没有浏览量计数时保留序列化时填入的数据库值
+            if value is not None:
+                item[field] = value
+
+def _serialize_article(article: Article, list_fields: tuple = ARTICLE_LIST_FIELDS) -> dict:
+    """
+    序列化列表中的文章数据，只输出请求的字段
+
+    浏览量先填入数据库中的值，点赞数和 Redis 中的实时浏览量由 _attach_stats 填入。
+    """
+    data = {}
+    for field in list_fields:
+        if field == "view_count":
+            data["view_count"] = article.view_count or 0
+        elif field in ARTICLE_LIST_STATS:
+            continue
+        elif field == "author":
+            data["author"] = {
                 "id": article.author.id,
                 "username": article.author.username,
                 "full_name": article.author.full_name
-            } if article.author else None,
-            "categories": [
-                {
-                    "id": category.id,
-                    "name": category.name,
-                    "slug": category.slug
-                }
-                for category in article.categories
-            ],
-            "tags": [
+            } if article.author else None
+        elif field in ("categories", "tags"):
+            data[field] = [
                 {
-                    "id": tag.id,
-                    "name": tag.name,
-                    "slug": tag.slug
+                    "id": item.id,
+                    "name": item.name,
+                    "slug": item.slug
                 }
-                for tag in article.tags
+                for item in getattr(article, field)
             ]
-        }
-        article_responses.append(article_dict)
+        else:
+            data[field] = getattr(article, field)
+    return data
+
+@router.get("/articles/search", response_model=Response[dict], status_code=status.HTTP_200_OK)
+async def search_articles(
+    q: str = Query(..., min_length=1, max_length=100, description="搜索关键词"),
+    page: int = Query(1, ge=1, description="页码"),
+    size: int = Query(10, ge=1, le=100, description="每页数量"),
+    status: str = Query(None, description="文章状态"),
+    user_id: Optional[int] = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """全文搜索文章，按相关度排序并返回高亮片段，登录用户同时返回 is_liked"""
+    logger.info(f"Searching articles with q: {q}, page: {page}, size: {size}")
+    offset = (page - 1) * size
+    ranked, total = await search_article_ids(db, q, offset, size, status=status)
     
-    # 如果是获取首页文章，缓存结果
-    if not any([keyword, status, is_featured, author_id, title]) and page == 1:
-        cache_multiple_articles(article_responses, "recent")
+    # 按相关度顺序取回当前页文章
+    scores = dict(ranked)
+    # 正文只用于生成高亮片段，不在结果中返回
+    list_fields = ARTICLE_LIST_VIEWS["summary"]
+    articles = (await db.execute(
+        article_list_select(list_fields + ("content",)).where(Article.id.in_(list(scores)))
+    )).scalars().all() if scores else []
+    order = {article_id: position for position, (article_id, _) in enumerate(ranked)}
+    articles = sorted(articles, key=lambda article: order[article.id])
     
-    logger.info(f"Found {len(articles)} articles out of {total} total matches")
+    items = []
+    for article in articles:
+        item = _serialize_article(article, list_fields)
+        item["score"] = round(scores[article.id], 4)
+        item["highlight"] = {
+            "title": highlight(article.title, q),
+            "summary": highlight(article.summary, q),
+            "content": highlight(article.content, q, max_length=160)
+        }
+        items.append(item)
+    await _attach_stats(items, list_fields, user_id)
+    
+    logger.info(f"Found {len(items)} articles out of {total} search matches")
     return Response[dict](
         code=200,
         message="查询成功",
         data={
-            "items": article_responses,
+            "items": items,
             "total": total,
             "page": page,
             "size": size,
@@ -255,25 +413,29 @@ async def list_articles(
         }
     )
 
-@router.get("/articles/{article_id}", response_model=Response[ArticleResponse], status_code=status.HTTP_200_OK)
+def _visitor_id(request: Request, user_id: Optional[int]) -> str:
+    """访客标识：登录用户按用户ID，匿名访客按IP"""
+    if user_id is not None:
+        return f"u:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+@router.get("/articles/{article_id}", response_model=Response[ArticleDetailResponse], status_code=status.HTTP_200_OK)
 async def get_article(
     article_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    user_id: Optional[int] = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取文章详情"""
-    # 尝试从缓存获取
-    cached_article = get_cached_article(article_id)
-    if cached_article:
-        # 增加浏览次数
-        increment_article_view(article_id)
-        return Response[ArticleResponse](
-            code=200,
-            message="查询成功",
-            data=ArticleResponse.model_validate(cached_article)
-        )
+    async def load_article():
+        article = await get_article_by_id(db, article_id)
+        if not article:
+            return None
+        return ArticleResponse.model_validate(article).model_dump()
     
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if not article:
+    # 缓存未命中时并发请求只重建一次
+    article_data = await get_or_load_article(article_id, load_article)
+    if not article_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=Response(
@@ -282,30 +444,30 @@ async def get_article(
             ).model_dump()
         )
     
-    # 增加浏览次数
-    increment_article_view(article_id)
+    # 浏览量和点赞数不随文章缓存，记录浏览的同时取回最新值
+    visitor = _visitor_id(request, user_id)
+    stats = await increment_article_view(article_id, visitor)
+    if stats is None:
+        # Redis 中没有浏览量（如数据丢失），以数据库中的最新值为起点，文章缓存中的值可能已过时
+        seed_views = await db.scalar(select(Article.view_count).where(Article.id == article_id))
+        stats = await increment_article_view(article_id, visitor, seed_views=seed_views or 0)
+    article_data = {**article_data, **stats}
     
-    # 缓存文章数据
-    article_data = ArticleResponse.model_validate(article).model_dump()
-    article_data["view_count"] = get_article_views(article_id)
-    article_data["like_count"] = get_article_likes(article_id)
-    cache_article(article_id, article_data)
-    
-    return Response[ArticleResponse](
+    return Response[ArticleDetailResponse](
         code=200,
         message="查询成功",
-        data=ArticleResponse.model_validate(article_data)
+        data=ArticleDetailResponse.model_validate(article_data)
     )
 
 @router.put("/articles/{article_id}", response_model=Response[ArticleResponse], status_code=status.HTTP_200_OK)
 async def update_article(
     article_id: int,
     article_update: ArticleUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新文章"""
     # 检查文章是否存在
-    article = db.query(Article).filter(Article.id == article_id).first()
+    article = await get_article_by_id(db, article_id)
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -315,6 +477,8 @@ async def update_article(
             ).model_dump()
         )
     
+    old_list_scopes = article_list_scopes(article.author_id, article.status, article.is_featured)
+    
     try:
         # 更新文章基本信息
         for key, value in article_update.model_dump(exclude_unset=True).items():
@@ -323,7 +487,9 @@ async def update_article(
         
         # 更新分类
         if article_update.category_ids is not None:
-            categories = db.query(Category).filter(Category.id.in_(article_update.category_ids)).all()
+            categories = (await db.execute(
+                select(Category).where(Category.id.in_(article_update.category_ids))
+            )).scalars().all()
             if len(categories) != len(article_update.category_ids):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -332,11 +498,13 @@ async def update_article(
                         message="部分分类不存在"
                     ).model_dump()
                 )
-            article.categories = categories
+            article.categories = list(categories)
         
         # 更新标签
         if article_update.tag_ids is not None:
-            tags = db.query(Tag).filter(Tag.id.in_(article_update.tag_ids)).all()
+            tags = (await db.execute(
+                select(Tag).where(Tag.id.in_(article_update.tag_ids))
+            )).scalars().all()
             if len(tags) != len(article_update.tag_ids):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -345,18 +513,20 @@ async def update_article(
                         message="部分标签不存在"
                     ).model_dump()
                 )
-            article.tags = tags
+            article.tags = list(tags)
         
-        db.commit()
-        db.refresh(article)
+        await db.commit()
+        article = await get_article_by_id(db, article.id)
+        await index_article(article)
         
         # 更新缓存
         article_data = ArticleResponse.model_validate(article).model_dump()
-        cache_article(article.id, article_data)
+        await cache_article(article.id, article_data)
         
-        # 清除文章列表缓存
-        delete_article_cache("recent")
-        delete_article_cache("featured")
+        # 使更新前后所属的文章列表缓存失效
+        await articles_cache.invalidate(
+            old_list_scopes + article_list_scopes(article.author_id, article.status, article.is_featured)
+        )
         
         logger.info(f"Article updated successfully: {article.id}")
         return Response[ArticleResponse](
@@ -365,7 +535,7 @@ async def update_article(
             data=ArticleResponse.model_validate(article)
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating article: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -378,10 +548,10 @@ async def update_article(
 @router.delete("/articles/{article_id}", response_model=Response, status_code=status.HTTP_200_OK)
 async def delete_article(
     article_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除文章"""
-    article = db.query(Article).filter(Article.id == article_id).first()
+    article = await db.get(Article, article_id)
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -391,14 +561,24 @@ async def delete_article(
             ).model_dump()
         )
     
+    list_scopes = article_list_scopes(article.author_id, article.status, article.is_featured)
+    
     try:
-        db.delete(article)
-        db.commit()
+        # 评论随文章级联删除，先记下评论ID和待审核数，提交后同步缓存和计数
+        comments = (await db.execute(
+            select(Comment.id, Comment.is_approved, Comment.is_spam)
+            .where(Comment.article_id == article_id)
+        )).all()
+        pending_count = sum(1 for comment in comments if is_comment_pending(comment))
         
-        # 删除缓存
-        delete_article_cache(article_id)
-        delete_article_cache("recent")
-        delete_article_cache("featured")
+        await db.delete(article)
+        await db.commit()
+        await unindex_article(article_id)
+        
+        # 删除文章、评论和评论树缓存
+        await invalidate_comment_caches([comment.id for comment in comments], [article_id])
+        await adjust_pending_comment_count(-pending_count)
+        await articles_cache.invalidate(list_scopes)
         
         logger.info(f"Article deleted successfully: {article_id}")
         return Response(
@@ -406,7 +586,7 @@ async def delete_article(
             message="删除成功"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting article: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -420,11 +600,11 @@ async def delete_article(
 async def like_article(
     article_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """点赞/取消点赞文章"""
     # 检查文章是否存在
-    article = db.query(Article).filter(Article.id == article_id).first()
+    article = await db.get(Article, article_id)
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -435,11 +615,8 @@ async def like_article(
         )
     
     try:
-        # 切换点赞状态
-        is_liked = toggle_article_like(article_id, current_user.id)
-        
-        # 获取最新点赞数
-        like_count = get_article_likes(article_id)
+        # 切换点赞状态，同时取回最新点赞数
+        is_liked, like_count = await toggle_article_like(article_id, current_user.id)
         
         return Response[dict](
             code=200,
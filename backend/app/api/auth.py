@@ -1,17 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.response import Response
 from app.schemas.auth import Token, TokenData, UserLogin
 from app.logger import setup_logger
+from app.utils.ttl_cache import TTLCache
+from app.core.security import (
+    verify_password,
+    get_password_hash,
+    get_password_hash_async,
+    verify_and_update_password,
+    create_access_token
+)
 from ..config import settings
-from ..dependencies.redis import (
+from ..dependencies.async_redis import (
     add_token_to_blacklist, 
     is_token_blacklisted,
     cache_user,
@@ -27,26 +35,78 @@ SECRET_KEY = "your-secret-key"  # 在生产环境中应该使用环境变量
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
+# 可选认证：未携带令牌时不返回 401
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login", auto_error=False)
+
+# 当前用户的进程内缓存（第一级），第二级为 Redis 中的 user: 键。
+# 进程内缓存无法被其他 worker 主动失效，因此过期时间较短。
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL
+)
+
+def user_cache_data(user: User) -> dict:
+    """用户缓存数据（不含头像，头像可能很大）"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "department": user.department,
+        "role": user.role,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None
+    }
+
+def _user_from_cache(user_data: dict) -> User:
+    """由缓存数据构建用户对象（未绑定会话，仅包含列属性）"""
+    created_at = user_data.get("created_at")
+    updated_at = user_data.get("updated_at")
+    return User(
+        id=user_data["id"],
+        username=user_data["username"],
+        email=user_data["email"],
+        full_name=user_data.get("full_name"),
+        department=user_data.get("department"),
+        role=user_data.get("role"),
+        is_active=user_data.get("is_active", True),
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+        updated_at=datetime.fromisoformat(updated_at) if updated_at else None
+    )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def _load_principal(db: AsyncSession, token_data: TokenData) -> Optional[User]:
+    """
+    按令牌中的用户ID加载当前用户：进程内缓存 -> Redis -> 数据库
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    缓存数据的用户名须与令牌一致，防止用户ID被复用后读到他人的缓存。
+    旧令牌不含用户ID时直接按用户名查询数据库。
+    """
+    if token_data.user_id is not None:
+        user_data = principal_cache.get(token_data.user_id)
+        if user_data is None:
+            user_data = await get_cached_user(token_data.user_id)
+            if user_data and "is_active" in user_data:
+                principal_cache.set(token_data.user_id, user_data)
+        if user_data and user_data.get("username") == token_data.username and "is_active" in user_data:
+            return _user_from_cache(user_data)
+    
+    user = (await db.execute(
+        select(User).where(User.username == token_data.username)
+    )).scalar_one_or_none()
+    if user is not None:
+        user_data = user_cache_data(user)
+        principal_cache.set(user.id, user_data)
+        await cache_user(user.id, user_data)
+    return user
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+async def invalidate_principal(user_id: int):
+    """用户信息变更或删除后清除两级缓存"""
+    principal_cache.delete(user_id)
+    await delete_user_cache(user_id)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """获取当前用户"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -59,7 +119,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     
     try:
         # 检查令牌是否在黑名单中
-        if is_token_blacklisted(token):
+        if await is_token_blacklisted(token):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=Response(
@@ -73,7 +133,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=payload.get("uid"))
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,26 +146,58 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
         
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await _load_principal(db, token_data)
     if user is None:
         raise credentials_exception
     return user
 
+async def get_token_user_id(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[int]:
+    """
+    可选认证：返回令牌中的用户ID，未登录或令牌无效时返回 None
+
+    只校验签名和黑名单，不加载用户，用于访客去重等不要求登录的场景。
+    """
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if await is_token_blacklisted(token):
+        return None
+    return payload.get("uid")
+
 @router.post("/auth/login", response_model=Response[Token])
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """用户登录"""
     try:
-        user = db.query(User).filter(User.username == form_data.username).first()
-        if not user or not verify_password(form_data.password, user.hashed_password):
+        user = (await db.execute(
+            select(User).where(User.username == form_data.username)
+        )).scalar_one_or_none()
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="用户名或密码错误",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # 在线程池中验证密码，成本因子变化时同时得到新哈希
+        is_valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+        if not is_valid:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="用户名或密码错误",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            logger.info(f"Password rehashed with current cost factor: {user.username}")
+        
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
         )
         
         logger.info(f"User logged in successfully: {user.username}")
@@ -131,11 +223,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
         )
 
 @router.post("/auth/register", response_model=Response[Token], status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserLogin, db: Session = Depends(get_db)):
+async def register(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """用户注册"""
     try:
         # 检查用户名是否已存在
-        if db.query(User).filter(User.username == user_data.username).first():
+        if (await db.execute(
+            select(User.id).where(User.username == user_data.username)
+        )).first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=Response(
@@ -145,7 +239,7 @@ async def register(user_data: UserLogin, db: Session = Depends(get_db)):
             )
         
         # 创建新用户
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         db_user = User(
             username=user_data.username,
             email=user_data.email,
@@ -157,25 +251,16 @@ async def register(user_data: UserLogin, db: Session = Depends(get_db)):
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         # 缓存新用户信息
-        user_data = {
-            "id": db_user.id,
-            "username": db_user.username,
-            "email": db_user.email,
-            "full_name": db_user.full_name,
-            "department": db_user.department,
-            "role": db_user.role,
-            "created_at": db_user.created_at.isoformat()
-        }
-        cache_user(db_user.id, user_data)
+        await cache_user(db_user.id, user_cache_data(db_user))
         
         # 生成访问令牌
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": db_user.username}, expires_delta=access_token_expires
+            data={"sub": db_user.username, "uid": db_user.id}, expires_delta=access_token_expires
         )
         
         logger.info(f"User registered successfully: {db_user.username}")
@@ -190,7 +275,7 @@ async def register(user_data: UserLogin, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error during registration: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -204,28 +289,8 @@ async def register(user_data: UserLogin, db: Session = Depends(get_db)):
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """获取当前用户信息"""
     try:
-        # 尝试从缓存获取用户信息
-        cached_user = get_cached_user(current_user.id)
-        if cached_user:
-            return Response[dict](
-                code=200,
-                message="获取成功",
-                data=cached_user
-            )
-        
-        # 如果缓存未命中，从数据库获取并缓存
-        user_data = {
-            "id": current_user.id,
-            "username": current_user.username,
-            "email": current_user.email,
-            "full_name": current_user.full_name,
-            "department": current_user.department,
-            "role": current_user.role,
-            "created_at": current_user.created_at.isoformat()
-        }
-        
-        # 缓存用户信息
-        cache_user(current_user.id, user_data)
+        # 当前用户已由 get_current_user 从缓存加载，无需再次查询
+        user_data = user_cache_data(current_user)
         
         return Response[dict](
             code=200,
@@ -258,7 +323,7 @@ async def logout(token: str = Depends(oauth2_scheme)):
             
             if remaining_time > 0:
                 # 将令牌添加到黑名单，过期时间与令牌剩余有效期相同
-                add_token_to_blacklist(token, remaining_time)
+                await add_token_to_blacklist(token, remaining_time)
         
         logger.info(f"User logged out successfully")
         return Response(
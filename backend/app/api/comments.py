@@ -1,39 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-from app.database import get_db
+from app.database import get_async_db
 from app.models.comment import Comment
 from app.models.article import Article
 from app.models.user import User
 from app.schemas.common import ResponseModel, ErrorResponse
-from app.schemas.comment import CommentCreate, CommentResponse, CommentUpdate
+from app.schemas.comment import CommentCreate, CommentResponse, CommentUpdate, CommentTreeNode, CommentModerationRequest
 from app.schemas.response import Response
 from app.schemas.pagination import PaginatedResponse
 from app.logger import setup_logger
-from app.api.auth import get_current_user
-from ..dependencies.redis import (
+from app.utils.pagination import decode_cursor, next_cursor_for, InvalidCursorError
+from app.queries.comment import (
+    approved_comments_select,
+    build_comment_tree,
+    moderation_queue_select,
+    pending_comment_condition,
+    is_comment_pending,
+    is_comment_visible,
+    adjust_comment_count,
+    moderate_comments
+)
+from app.api.auth import get_current_user, get_token_user_id
+from app.api.users import check_admin_permission
+from app.spam.service import score_comment
+from ..dependencies.async_redis import (
     cache_comment,
-    get_cached_comment,
+    cache_comments_bulk,
+    get_or_load_comment,
     delete_comment_cache,
+    get_or_load_comment_tree,
+    delete_comment_tree_cache,
+    delete_article_cache,
+    articles_cache,
+    article_list_scopes,
+    invalidate_comment_caches,
+    get_pending_comment_count,
+    set_pending_comment_count,
+    adjust_pending_comment_count,
     toggle_comment_like,
-    get_comment_likes
+    get_comment_likes,
+    get_comment_like_stats_bulk
 )
 
 logger = setup_logger("comments")
 router = APIRouter()
 
+async def _invalidate_article_lists(db: AsyncSession, article_ids: List[int]):
+    """评论数变化后使文章所在的列表缓存失效，列表项中同样包含评论数"""
+    if not article_ids:
+        return
+    try:
+        rows = (await db.execute(
+            select(Article.author_id, Article.status, Article.is_featured).where(Article.id.in_(article_ids))
+        )).all()
+        scopes = []
+        for row in rows:
+            scopes.extend(article_list_scopes(row.author_id, row.status, row.is_featured))
+        await articles_cache.invalidate(scopes)
+    except Exception as e:
+        logger.error(f"Error invalidating article list cache: {str(e)}")
+
 @router.post("/articles/{article_id}/comments", response_model=ResponseModel[CommentResponse], status_code=status.HTTP_201_CREATED)
 async def create_comment(
     article_id: int,
     comment: CommentCreate,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """创建评论"""
+    """创建评论，写入前进行反垃圾评分，超过阈值的评论直接标记为垃圾评论"""
     try:
         # 检查文章是否存在且允许评论
-        article = db.query(Article).filter(Article.id == article_id).first()
+        article = await db.get(Article, article_id)
         if not article:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -52,22 +93,45 @@ async def create_comment(
                 ).model_dump()
             )
         
+        ip_address = request.client.host if request.client else None
+        verdict = await score_comment(comment.content, ip_address, current_user.id)
+        if verdict.is_spam:
+            logger.warning(
+                f"Comment by user {current_user.id} from {ip_address} flagged as spam: "
+                f"score={verdict.score:.2f} reasons={','.join(verdict.reasons)}"
+            )
+        
         # 创建评论
         db_comment = Comment(
             content=comment.content,
             article_id=article_id,
             user_id=current_user.id,
             parent_id=comment.parent_id,
+            ip_address=ip_address,
+            user_agent=(request.headers.get("user-agent") or "")[:200] or None,
+            is_spam=verdict.is_spam,
             created_at=datetime.utcnow()
         )
         
         db.add(db_comment)
-        db.commit()
-        db.refresh(db_comment)
+        await db.flush()
+        # 评论数只统计公开显示的评论，与评论在同一事务中更新
+        visible = is_comment_visible(db_comment)
+        pending = is_comment_pending(db_comment)
+        if visible:
+            await adjust_comment_count(db, article_id, 1)
+        await db.commit()
+        await db.refresh(db_comment)
+        if pending:
+            await adjust_pending_comment_count(1)
         
         # 缓存评论数据
         comment_data = CommentResponse.model_validate(db_comment).model_dump()
-        cache_comment(db_comment.id, comment_data)
+        await cache_comment(db_comment.id, comment_data)
+        await delete_comment_tree_cache(article_id)
+        if visible:
+            await delete_article_cache(article_id)
+            await _invalidate_article_lists(db, [article_id])
         
         logger.info(f"Comment created successfully: {db_comment.id}")
         return ResponseModel[CommentResponse](
@@ -92,12 +156,13 @@ async def get_article_comments(
     article_id: int,
     page: int = Query(1, ge=1, description="页码，从1开始"),
     size: int = Query(10, ge=1, le=100, description="每页大小，1-100之间"),
-    db: Session = Depends(get_db)
+    user_id: Optional[int] = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取文章评论列表"""
+    """获取文章评论列表，登录用户同时返回每条评论的 is_liked"""
     try:
         # 检查文章是否存在
-        article = db.query(Article).filter(Article.id == article_id).first()
+        article = await db.get(Article, article_id)
         if not article:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -105,7 +170,9 @@ async def get_article_comments(
             )
         
         # 获取总数和计算总页数
-        total = db.query(Comment).filter(Comment.article_id == article_id).count()
+        total = await db.scalar(
+            select(func.count(Comment.id)).where(Comment.article_id == article_id)
+        )
         total_pages = (total + size - 1) // size
         
         # 处理页码超出范围的情况
@@ -114,22 +181,28 @@ async def get_article_comments(
         
         # 获取分页数据
         offset = (page - 1) * size
-        comments = db.query(Comment)\
-            .filter(Comment.article_id == article_id)\
-            .order_by(Comment.created_at.desc())\
-            .offset(offset)\
-            .limit(size)\
-            .all()
+        comments = (await db.execute(
+            select(Comment)
+            .where(Comment.article_id == article_id)
+            .order_by(Comment.created_at.desc())
+            .offset(offset)
+            .limit(size)
+        )).scalars().all()
         
-        # 处理评论数据
+        # 处理评论数据，点赞数和当前用户的点赞状态一次批量获取
+        like_stats = await get_comment_like_stats_bulk([comment.id for comment in comments], user_id=user_id)
         comment_responses = []
         for comment in comments:
             comment_data = CommentResponse.model_validate(comment).model_dump()
             # 添加点赞数
-            comment_data["like_count"] = get_comment_likes(comment.id)
+            comment_data["like_count"] = like_stats[comment.id]["like_count"]
             comment_responses.append(comment_data)
-            # 缓存评论
-            cache_comment(comment.id, comment_data)
+        
+        # 批量缓存评论，点赞状态因人而异，缓存后再填入
+        await cache_comments_bulk(comment_responses)
+        if user_id is not None:
+            for comment_data in comment_responses:
+                comment_data["is_liked"] = like_stats[comment_data["id"]]["is_liked"]
         
         # 构造分页响应
         paginated_response = PaginatedResponse[CommentResponse](
@@ -154,23 +227,151 @@ async def get_article_comments(
             detail="获取评论失败"
         )
 
+@router.get("/articles/{article_id}/comments/tree", response_model=Response[PaginatedResponse[CommentTreeNode]], status_code=status.HTTP_200_OK)
+async def get_article_comment_tree(
+    article_id: int,
+    page: int = Query(1, ge=1, description="页码，从1开始"),
+    size: int = Query(10, ge=1, le=100, description="每页主题数，1-100之间"),
+    user_id: Optional[int] = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取文章的评论树，按顶层评论（主题）分页
+
+    已审核评论一次查询取回，在内存中组装成树后按文章缓存；
+    点赞数和当前用户的点赞状态每次批量获取，不进入缓存。
+    """
+    async def load_tree():
+        if await db.scalar(select(Article.id).where(Article.id == article_id)) is None:
+            return None
+        comments = (await db.execute(approved_comments_select(article_id))).scalars().all()
+        return build_comment_tree(
+            CommentResponse.model_validate(comment).model_dump() for comment in comments
+        )
+    
+    # 缓存未命中时并发请求只重建一次
+    threads = await get_or_load_comment_tree(article_id, load_tree)
+    if threads is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ResponseModel(
+                code=404,
+                message="文章不存在"
+            ).model_dump()
+        )
+    
+    total = len(threads)
+    total_pages = (total + size - 1) // size
+    if total > 0 and page > total_pages:
+        page = total_pages
+    page_threads = threads[(page - 1) * size:page * size]
+    
+    # 当前页所有评论的点赞数一次批量获取
+    comment_ids = []
+    pending = list(page_threads)
+    while pending:
+        node = pending.pop()
+        comment_ids.append(node["id"])
+        pending.extend(node["replies"])
+    like_stats = await get_comment_like_stats_bulk(comment_ids, user_id=user_id)
+    
+    return Response[PaginatedResponse[CommentTreeNode]](
+        code=200,
+        message="查询成功",
+        data=PaginatedResponse[CommentTreeNode](
+            items=[_with_like_stats(thread, like_stats) for thread in page_threads],
+            total=total,
+            page=page,
+            size=size,
+            total_pages=total_pages
+        )
+    )
+
+def _with_like_stats(node: dict, like_stats: dict) -> dict:
+    """复制评论树节点并填入点赞数据，缓存中的树由并发请求共享，不能原地修改"""
+    return {
+        **node,
+        **like_stats[node["id"]],
+        "replies": [_with_like_stats(reply, like_stats) for reply in node["replies"]]
+    }
+
+async def _pending_comment_count(db: AsyncSession) -> int:
+    """待审核评论数：优先读取缓存，未缓存时用审核队列索引统计"""
+    count = await get_pending_comment_count()
+    if count is None:
+        count = await db.scalar(select(func.count()).select_from(Comment).where(pending_comment_condition()))
+        await set_pending_comment_count(count)
+    return count
+
+@router.get("/comments/moderation-queue", response_model=ResponseModel[dict], status_code=status.HTTP_200_OK)
+async def get_moderation_queue(
+    cursor: Optional[str] = Query(None, description="上一页返回的游标"),
+    size: int = Query(20, ge=1, le=100, description="每页数量，1-100之间"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    审核队列：所有文章的待审核评论，从旧到新排列
+
+    按 (created_at, id) 游标分页，由 ix_comments_moderation_queue 索引支持。
+    """
+    check_admin_permission(current_user)
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ResponseModel(
+                    code=400,
+                    message=str(e)
+                ).model_dump()
+            )
+    
+    comments = (await db.execute(moderation_queue_select(size, after))).scalars().all()
+    next_cursor = next_cursor_for(comments, size)
+    return ResponseModel[dict](
+        code=200,
+        message="查询成功",
+        data={
+            "items": [CommentResponse.model_validate(comment).model_dump() for comment in comments[:size]],
+            "size": size,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+            "pending_count": await _pending_comment_count(db)
+        }
+    )
+
+@router.get("/comments/moderation-queue/count", response_model=ResponseModel[dict], status_code=status.HTTP_200_OK)
+async def get_pending_comment_badge(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """待审核评论数角标，随评论新增、删除和审核增量更新"""
+    check_admin_permission(current_user)
+    return ResponseModel[dict](
+        code=200,
+        message="查询成功",
+        data={"pending_count": await _pending_comment_count(db)}
+    )
+
 @router.get("/comments/{comment_id}", response_model=ResponseModel[CommentResponse], status_code=status.HTTP_200_OK)
 async def get_comment(
     comment_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取评论详情"""
-    # 尝试从缓存获取
-    cached_comment = get_cached_comment(comment_id)
-    if cached_comment:
-        return ResponseModel[CommentResponse](
-            code=200,
-            message="查询成功",
-            data=CommentResponse.model_validate(cached_comment)
-        )
+    async def load_comment():
+        comment = await db.get(Comment, comment_id)
+        if not comment:
+            return None
+        return CommentResponse.model_validate(comment).model_dump()
     
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
-    if not comment:
+    # 缓存未命中时并发请求只重建一次
+    comment_data = await get_or_load_comment(comment_id, load_comment)
+    if not comment_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=ResponseModel(
@@ -179,14 +380,10 @@ async def get_comment(
             ).model_dump()
         )
     
-    # 缓存评论数据
-    comment_data = CommentResponse.model_validate(comment).model_dump()
-    cache_comment(comment.id, comment_data)
-    
     return ResponseModel[CommentResponse](
         code=200,
         message="查询成功",
-        data=CommentResponse.model_validate(comment)
+        data=CommentResponse.model_validate(comment_data)
     )
 
 @router.put("/comments/{comment_id}", response_model=ResponseModel[CommentResponse], status_code=status.HTTP_200_OK)
@@ -194,10 +391,10 @@ async def update_comment(
     comment_id: int,
     comment_update: CommentUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新评论"""
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -214,13 +411,14 @@ async def update_comment(
     try:
         # 更新评论
         comment.content = comment_update.content
-        db.commit()
-        db.refresh(comment)
+        await db.commit()
+        await db.refresh(comment)
         
         # 更新缓存
         comment_data = CommentResponse.model_validate(comment).model_dump()
-        comment_data["like_count"] = get_comment_likes(comment.id)
-        cache_comment(comment.id, comment_data)
+        comment_data["like_count"] = await get_comment_likes(comment.id)
+        await cache_comment(comment.id, comment_data)
+        await delete_comment_tree_cache(comment.article_id)
         
         logger.info(f"Comment updated successfully: {comment_id}")
         return ResponseModel(
@@ -229,7 +427,7 @@ async def update_comment(
             data=CommentResponse.model_validate(comment_data)
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating comment: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -240,11 +438,11 @@ async def update_comment(
 async def delete_comment(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除评论"""
     try:
-        comment = db.query(Comment).filter(Comment.id == comment_id).first()
+        comment = await db.get(Comment, comment_id)
         if not comment:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -258,11 +456,22 @@ async def delete_comment(
                 detail="没有权限删除此评论"
             )
         
-        db.delete(comment)
-        db.commit()
+        article_id = comment.article_id
+        visible = is_comment_visible(comment)
+        pending = is_comment_pending(comment)
+        await db.delete(comment)
+        if visible:
+            await adjust_comment_count(db, article_id, -1)
+        await db.commit()
+        if pending:
+            await adjust_pending_comment_count(-1)
         
         # 删除缓存
-        delete_comment_cache(comment_id)
+        await delete_comment_cache(comment_id)
+        await delete_comment_tree_cache(article_id)
+        if visible:
+            await delete_article_cache(article_id)
+            await _invalidate_article_lists(db, [article_id])
         
         logger.info(f"Comment deleted successfully: {comment_id}")
         return ResponseModel(
@@ -272,7 +481,7 @@ async def delete_comment(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting comment: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -283,11 +492,11 @@ async def delete_comment(
 async def like_comment(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """点赞/取消点赞评论"""
     # 检查评论是否存在
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -298,11 +507,8 @@ async def like_comment(
         )
     
     try:
-        # 切换点赞状态
-        is_liked = toggle_comment_like(comment_id, current_user.id)
-        
-        # 获取最新点赞数
-        like_count = get_comment_likes(comment_id)
+        # 切换点赞状态，同时取回最新点赞数
+        is_liked, like_count = await toggle_comment_like(comment_id, current_user.id)
         
         logger.info(f"Comment like toggled successfully: {comment_id}")
         return ResponseModel[dict](
@@ -323,16 +529,59 @@ async def like_comment(
             ).model_dump()
         )
 
+@router.post("/comments/moderate", response_model=ResponseModel[dict], status_code=status.HTTP_200_OK)
+async def moderate_comments_bulk(
+    request: CommentModerationRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量审核评论（通过或标记为垃圾评论）
+
+    全部评论由一条 UPDATE 更新，评论数在同一事务中调整，
+    评论、评论树和文章详情缓存在一个管道中删除，涉及文章的列表缓存随之失效。
+    """
+    check_admin_permission(current_user)
+    
+    try:
+        comment_ids, article_ids, pending_delta = await moderate_comments(db, request.ids, request.action)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error moderating comments: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ResponseModel(
+                code=500,
+                message="批量审核评论失败"
+            ).model_dump()
+        )
+    
+    await invalidate_comment_caches(comment_ids, article_ids)
+    await _invalidate_article_lists(db, article_ids)
+    await adjust_pending_comment_count(pending_delta)
+    found = set(comment_ids)
+    logger.info(f"Comments moderated ({request.action}): {len(comment_ids)} updated")
+    return ResponseModel[dict](
+        code=200,
+        message="批量审核成功",
+        data={
+            "action": request.action,
+            "updated": len(comment_ids),
+            "missing": sorted(set(request.ids) - found)
+        }
+    )
+
 @router.put("/comments/{comment_id}/approve", response_model=ResponseModel[CommentResponse], status_code=status.HTTP_200_OK)
 async def approve_comment(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """审核评论"""
     try:
         # 检查评论是否存在
-        comment = db.query(Comment).filter(Comment.id == comment_id).first()
+        comment = await db.get(Comment, comment_id)
         if not comment:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -346,12 +595,13 @@ async def approve_comment(
                 detail="没有权限审核评论"
             )
         
-        # 更新评论状态
-        comment.is_approved = True
-        comment.is_spam = False
-        comment.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(comment)
+        # 更新评论状态，与批量审核共用同一逻辑，同时维护评论数和缓存
+        _, _, pending_delta = await moderate_comments(db, [comment_id], "approve")
+        await db.commit()
+        await db.refresh(comment)
+        await invalidate_comment_caches([comment_id], [comment.article_id])
+        await _invalidate_article_lists(db, [comment.article_id])
+        await adjust_pending_comment_count(pending_delta)
         
         logger.info(f"Comment approved successfully: {comment_id}")
         return ResponseModel(
@@ -362,7 +612,7 @@ async def approve_comment(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error approving comment: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -373,12 +623,12 @@ async def approve_comment(
 async def mark_comment_spam(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """标记评论为垃圾评论"""
     try:
         # 检查评论是否存在
-        comment = db.query(Comment).filter(Comment.id == comment_id).first()
+        comment = await db.get(Comment, comment_id)
         if not comment:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -392,12 +642,13 @@ async def mark_comment_spam(
                 detail="没有权限标记垃圾评论"
             )
         
-        # 更新评论状态
-        comment.is_spam = True
-        comment.is_approved = False
-        comment.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(comment)
+        # 更新评论状态，与批量审核共用同一逻辑，同时维护评论数和缓存
+        _, _, pending_delta = await moderate_comments(db, [comment_id], "spam")
+        await db.commit()
+        await db.refresh(comment)
+        await invalidate_comment_caches([comment_id], [comment.article_id])
+        await _invalidate_article_lists(db, [comment.article_id])
+        await adjust_pending_comment_count(pending_delta)
         
         logger.info(f"Comment marked as spam successfully: {comment_id}")
         return ResponseModel(
@@ -408,7 +659,7 @@ async def mark_comment_spam(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error marking comment as spam: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
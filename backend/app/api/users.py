@@ -8,10 +8,9 @@ from ..database import get_db
 from sqlalchemy import or_
 from ..logger import setup_logger
 from datetime import datetime
-from ..utils.security import get_password_hash
+from ..core.security import get_password_hash_async
 from pydantic import BaseModel
-from .auth import get_current_user
-from ..utils.cache import cache_user
+from .auth import get_current_user, invalidate_principal
 
 # 创建用户模块的日志记录器
 logger = setup_logger("users")
@@ -71,7 +70,7 @@ async def create_user(
             full_name=user.full_name,
             department=user.department,
             role=user.role,
-            hashed_password=get_password_hash(user.password),
+            hashed_password=await get_password_hash_async(user.password),
             created_at=datetime.utcnow()
         )
         
@@ -262,13 +261,17 @@ async def update_user(
         # 更新用户信息
         update_data = user_update.model_dump(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
         
         for key, value in update_data.items():
             setattr(db_user, key, value)
         
         db.commit()
         db.refresh(db_user)
+        
+        # 清除当前用户缓存，使角色等变更立即生效
+        await invalidate_principal(user_id)
+        
         logger.info(f"User updated successfully: {user_id}")
         return Response(
             code=200,
@@ -311,6 +314,10 @@ async def delete_user(
     try:
         db.delete(db_user)
         db.commit()
+        
+        # 清除当前用户缓存，已删除用户的令牌立即失效
+        await invalidate_principal(user_id)
+        
         logger.info(f"User deleted successfully: {user_id}")
         return Response(
             code=200,
@@ -340,6 +347,10 @@ async def batch_delete_users(
     try:
         deleted_count = db.query(User).filter(User.id.in_(request.ids)).delete(synchronize_session=False)
         db.commit()
+        
+        # 清除当前用户缓存
+        for user_id in request.ids:
+            await invalidate_principal(user_id)
         logger.info(f"Successfully deleted {deleted_count} users")
         return Response(
             code=200,
@@ -391,18 +402,8 @@ async def update_user_avatar(
         db.commit()
         db.refresh(db_user)
         
-        # 更新缓存中的用户信息
-        user_data = {
-            "id": db_user.id,
-            "username": db_user.username,
-            "email": db_user.email,
-            "full_name": db_user.full_name,
-            "department": db_user.department,
-            "role": db_user.role,
-            "avatar": db_user.avatar,
-            "created_at": db_user.created_at.isoformat()
-        }
-        cache_user(db_user.id, user_data)
+        # 清除当前用户缓存，下次请求时重新加载
+        await invalidate_principal(db_user.id)
         
         logger.info(f"Avatar updated successfully for user: {user_id}")
         return Response(
@@ -10,6 +10,12 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # 未设置时由 DATABASE_URL 推导异步驱动
+    DB_ECHO: bool = False  # 是否输出 SQL 日志
+    DB_POOL_SIZE: int = 5  # 每个 worker 常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 超出常驻连接数后允许临时创建的连接数
+    DB_POOL_RECYCLE: int = 3600  # 连接最长存活时间（秒），需小于 MySQL wait_timeout
+    DB_POOL_TIMEOUT: int = 30  # 获取连接的最长等待时间（秒）
     
     # MySQL settings
     MYSQL_USER: str
@@ -22,6 +28,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_TTL: int = 30  # 当前用户进程内缓存时间（秒）
+    AUTH_USER_CACHE_SIZE: int = 1024  # 当前用户进程内缓存条目数
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # bcrypt 成本因子，调整后用户登录时自动重新哈希
+    PASSWORD_HASH_WORKERS: int = 4  # 密码哈希线程池大小
     
     # 上传文件配置
     UPLOAD_DIR: str = "uploads"
@@ -29,6 +39,39 @@ class Settings(BaseSettings):
     ALLOWED_IMAGE_TYPES: List[str]
     ALLOWED_DOCUMENT_TYPES: List[str]
     
+    # 搜索配置
+    SEARCH_BACKEND: str = "auto"  # auto：MySQL 使用 FULLTEXT，其他数据库使用进程内索引；fulltext；memory
+    SEARCH_INDEX_SNAPSHOT: Optional[str] = None  # 进程内索引快照文件路径，未设置时每次启动从文章表构建
+    
+    # 浏览量写回配置
+    VIEW_COUNT_FLUSH_INTERVAL: int = 60  # 写回间隔（秒），0 表示不在应用内运行，改用独立进程
+    VIEW_COUNT_FLUSH_BATCH_SIZE: int = 500  # 每条 UPDATE 语句更新的文章数
+    VIEW_COUNT_FLUSH_LOCK_TTL: int = 300  # 写回锁的最长持有时间（秒）
+    
+    # 点赞同步配置
+    LIKE_SYNC_INTERVAL: int = 60  # 同步间隔（秒），0 表示不在应用内运行，改用独立进程
+    LIKE_SYNC_BATCH_SIZE: int = 500  # 每批写入的点赞变更数
+    LIKE_SYNC_LOCK_TTL: int = 300  # 同步锁的最长持有时间（秒）
+    
+    # 评论审核配置
+    COMMENT_MODERATION_MAX_IDS: int = 1000  # 批量审核单次最多处理的评论数
+    
+    # 评论反垃圾配置
+    SPAM_SCORE_THRESHOLD: float = 1.0  # 规则总分达到该值时自动标记为垃圾评论
+    SPAM_RATE_WINDOW: int = 60  # 发评频率统计窗口（秒）
+    SPAM_MAX_COMMENTS_PER_IP: int = 10  # 每个窗口内同一 IP 的评论数上限
+    SPAM_MAX_COMMENTS_PER_USER: int = 5  # 每个窗口内同一用户的评论数上限
+    SPAM_DUPLICATE_WINDOW: int = 3600  # 重复内容统计窗口（秒）
+    SPAM_DUPLICATE_LIMIT: int = 3  # 窗口内相同内容允许出现的次数
+    
+    # 请求限流配置（每个窗口内的请求数上限，0 表示该路由组不限流）
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW: int = 60  # 滑动窗口长度（秒）
+    RATE_LIMIT_AUTH: int = 10  # 登录、注册，按 IP 计数
+    RATE_LIMIT_WRITE: int = 120  # 其他写请求，登录用户按用户计数，否则按 IP
+    RATE_LIMIT_READ: int = 600  # 读请求
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000  # Redis 不可用时进程内计数的最大条目数
+    
     # 分页配置
     DEFAULT_PAGE_SIZE: int = 10
     MAX_PAGE_SIZE: int = 100
@@ -37,6 +80,7 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50  # 异步连接池最大连接数
     CACHE_EXPIRE_IN_SECONDS: int = 3600  # 1小时
     
     # 日志配置
@@ -0,0 +1,82 @@
+import logging
+import time
+from typing import Dict, Optional
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from app.config import settings
+from app.dependencies.async_redis import hit_rate_limit
+from app.schemas.response import Response
+from app.utils.rate_limit import LocalRateLimiter, window_position, retry_after
+
+logger = logging.getLogger(__name__)
+
+# 登录、注册需要计算 bcrypt，单独使用更严格的限额
+AUTH_PATHS = {"/api/auth/login", "/api/auth/register"}
+READ_METHODS = {"GET", "HEAD"}
+
+# Redis 不可用时的进程内降级计数
+local_limiter = LocalRateLimiter(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """按请求方法和路径划分路由组，不限流的请求返回 None"""
+    if not path.startswith("/api/") or method == "OPTIONS":
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    return "read" if method in READ_METHODS else "write"
+
+def group_limits() -> Dict[str, int]:
+    return {
+        "auth": settings.RATE_LIMIT_AUTH,
+        "write": settings.RATE_LIMIT_WRITE,
+        "read": settings.RATE_LIMIT_READ,
+    }
+
+def client_identity(request: Request, group: str) -> str:
+    """
+    限流对象：登录用户按用户ID，其他按客户端 IP
+
+    只校验令牌签名，不查询黑名单，避免限流本身增加一次 Redis 往返；
+    登录、注册请求始终按 IP 计数。
+    """
+    if group != "auth":
+        authorization = request.headers.get("authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            try:
+                payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                if payload.get("uid") is not None:
+                    return f"u:{payload['uid']}"
+            except JWTError:
+                pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def rate_limit_requests(request: Request, call_next):
+    """请求限流中间件，超过路由组上限时返回 429 和 Retry-After"""
+    group = route_group(request.method, request.url.path) if settings.RATE_LIMIT_ENABLED else None
+    limit = group_limits().get(group, 0) if group else 0
+    if limit <= 0:
+        return await call_next(request)
+
+    window = settings.RATE_LIMIT_WINDOW
+    bucket = f"{group}:{client_identity(request, group)}"
+    window_id, previous_weight = window_position(time.time(), window)
+    try:
+        allowed, previous, current = await hit_rate_limit(bucket, limit, window, window_id, previous_weight)
+    except Exception as e:
+        logger.warning(f"Redis 限流失败，使用进程内计数: {e}")
+        allowed, previous, current = local_limiter.hit(bucket, limit, window, window_id, previous_weight)
+    if allowed:
+        return await call_next(request)
+
+    wait = retry_after(previous, current, limit, window, previous_weight)
+    logger.info(f"Rate limit exceeded: {bucket} {request.method} {request.url.path}, retry after {wait}s")
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content=Response(
+            code=status.HTTP_429_TOO_MANY_REQUESTS,
+            message="请求过于频繁，请稍后再试",
+            data=None
+        ).model_dump(),
+        headers={"Retry-After": str(wait)}
+    )
@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.pool_stats import InstrumentedQueuePool, InstrumentedAsyncQueuePool, attach_pool_events
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,19 +11,78 @@ logger = logging.getLogger(__name__)
 # 使用配置中的数据库 URL
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# 同步驱动与异步驱动的对应关系
+ASYNC_DRIVERS = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+def get_async_database_url(url: str) -> str:
+    """将同步数据库 URL 转换为对应的异步驱动 URL"""
+    for sync_prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(SQLALCHEMY_DATABASE_URL)
+
+def get_engine_options(url: str, poolclass) -> dict:
+    """根据配置生成引擎参数，SQLite 使用自带的连接池，不支持容量参数"""
+    options = {
+        "echo": settings.DB_ECHO,  # SQL 日志，生产环境应关闭
+        "pool_pre_ping": True  # 自动检测断开的连接
+    }
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT
+        )
+    return options
+
 try:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
-        echo=True,  # 启用 SQL 日志
-        pool_pre_ping=True  # 自动检测断开的连接
+        **get_engine_options(SQLALCHEMY_DATABASE_URL, InstrumentedQueuePool)
     )
     logger.info(f"成功连接到数据库：{SQLALCHEMY_DATABASE_URL}")
 except Exception as e:
     logger.error(f"数据库连接失败：{str(e)}")
     raise
 
+try:
+    async_engine = create_async_engine(
+        ASYNC_SQLALCHEMY_DATABASE_URL,
+        **get_engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, InstrumentedAsyncQueuePool)
+    )
+except Exception as e:
+    logger.error(f"异步数据库引擎创建失败：{str(e)}")
+    raise
+
+# 连接池统计
+attach_pool_events(engine, InstrumentedQueuePool.stats)
+attach_pool_events(async_engine.sync_engine, InstrumentedAsyncQueuePool.stats)
+
+def get_pool_stats() -> dict:
+    """获取同步和异步连接池的统计信息"""
+    return {
+        "sync": InstrumentedQueuePool.stats.snapshot(engine.pool),
+        "async": InstrumentedAsyncQueuePool.stats.snapshot(async_engine.sync_engine.pool)
+    }
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步会话：提交后不过期对象，避免在响应序列化时触发隐式 IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # 依赖注入
@@ -32,6 +93,11 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """异步数据库会话依赖，查询期间不阻塞事件循环"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # 初始化数据库
 def init_db():
     try:
@@ -39,4 +105,4 @@ def init_db():
         logger.info("数据库表创建成功")
     except Exception as e:
         logger.error(f"数据库表创建失败：{str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,669 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
+from redis.asyncio import Redis, ConnectionPool
+from ..config import settings
+from ..utils.single_flight import SingleFlight
+from .redis import (
+    DateTimeEncoder,
+    CacheNamespace,
+    cache_digest,
+    wrap_cached,
+    unwrap_cached,
+    CACHE_LOCK_PREFIX,
+    CACHE_LOCK_TTL,
+    SCAN_BATCH_SIZE,
+    USER_PREFIX,
+    ARTICLE_PREFIX,
+    COMMENT_PREFIX,
+    COMMENT_TREE_PREFIX,
+    COMMENT_PENDING_COUNT,
+    COMMENT_PENDING_COUNT_TTL,
+    ADJUST_IF_EXISTS_SCRIPT,
+    SPAM_RATE_PREFIX,
+    SPAM_FINGERPRINT_PREFIX,
+    INCR_WINDOWS_SCRIPT,
+    RATE_LIMIT_PREFIX,
+    SEARCH_INDEX_GENERATION,
+    SLIDING_WINDOW_SCRIPT,
+    ARTICLE_VIEW_COUNT,
+    ARTICLE_LIKE_COUNT,
+    ARTICLE_VIEW_DELTAS,
+    ARTICLE_VIEW_DELTAS_FLUSHING,
+    ARTICLE_UNIQUE_VISITORS_TTL,
+    VIEW_ARTICLE_SCRIPT,
+    article_view_keys,
+    parse_article_view,
+    COMMENT_LIKE_COUNT_PREFIX,
+    LIKE_CHANGES,
+    LIKE_CHANGES_FLUSHING,
+    LIKES_RESTORED,
+    TOGGLE_LIKE_SCRIPT,
+    like_change_field,
+    parse_like_change_field,
+    ARTICLES_NAMESPACE,
+    USER_CACHE_TTL,
+    ARTICLE_CACHE_TTL,
+    COMMENT_CACHE_TTL,
+    COMMENT_TREE_CACHE_TTL,
+    ARTICLE_LIST_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+# 异步 Redis 客户端，所有请求共享同一个连接池。
+# 连接绑定在创建它的事件循环上，因此同时记录所属的事件循环。
+_client: Optional[Redis] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _create_client() -> Redis:
+    pool = ConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        decode_responses=True
+    )
+    return Redis(connection_pool=pool)
+
+def get_async_redis() -> Redis:
+    """
+    获取异步 Redis 客户端
+
+    正常情况下连接池由应用生命周期创建；若尚未初始化或当前事件循环
+    与连接池所属的事件循环不同（如测试客户端每个请求使用独立事件循环），
+    则在当前事件循环上重新创建连接池。
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _create_client()
+        _client_loop = loop
+    return _client
+
+async def init_redis_pool() -> Redis:
+    """初始化连接池（应用启动时调用）"""
+    client = get_async_redis()
+    await client.ping()
+    return client
+
+async def close_redis_pool():
+    """关闭连接池（应用关闭时调用）"""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+
+async def get_redis() -> Redis:
+    """获取 Redis 连接"""
+    try:
+        client = get_async_redis()
+        await client.ping()
+        return client
+    except Exception as e:
+        raise Exception(f"Redis connection error: {str(e)}")
+
+async def delete_keys_by_pattern(
+    pattern: str,
+    batch_size: int = SCAN_BATCH_SIZE,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """按模式分批删除键，SCAN + UNLINK，见同步版本 redis.delete_keys_by_pattern"""
+    client = get_async_redis()
+    deleted = 0
+    batch = []
+    async for key in client.scan_iter(match=pattern, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += await client.unlink(*batch)
+            batch = []
+            if on_progress:
+                on_progress(deleted)
+    if batch:
+        deleted += await client.unlink(*batch)
+        if on_progress:
+            on_progress(deleted)
+    return deleted
+
+class AsyncCacheNamespace(CacheNamespace):
+    """CacheNamespace 的异步版本，使用共享连接池"""
+
+    async def build_key(self, key: str, scopes: Sequence[str] = ()) -> str:
+        generations = await get_async_redis().mget(self.generation_keys(scopes))
+        return self.versioned_key(key, generations)
+
+    async def get(self, full_key: str) -> Optional[Any]:
+        data = await get_async_redis().get(full_key)
+        return json.loads(data) if data else None
+
+    async def set(self, full_key: str, value: Any, ttl: Optional[int] = None):
+        await get_async_redis().setex(full_key, ttl or self.ttl, json.dumps(value, cls=DateTimeEncoder))
+
+    async def invalidate(self, scopes: Iterable[str] = ()):
+        pipe = get_async_redis().pipeline(transaction=False)
+        for key in self.invalidation_keys(scopes):
+            pipe.incr(key)
+        await pipe.execute()
+
+    async def clear(self):
+        await delete_keys_by_pattern(f"{self.name}:*")
+
+# 缓存击穿保护
+# 进程内合并同一个键的并发重建，跨进程由 Redis 锁保证同时只有一个重建者
+_cache_flights = SingleFlight()
+
+# 概率提前刷新系数，越大越早刷新
+CACHE_EARLY_REFRESH_BETA = 1.0
+# 未抢到锁时等待新值的最长时间和轮询间隔（秒）
+CACHE_LOCK_WAIT = 2.0
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+# 只释放自己持有的锁，避免锁超时后误删其他进程的锁
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+async def acquire_lock(name: str, ttl: int) -> Optional[str]:
+    """获取分布式锁，成功时返回释放锁所需的令牌"""
+    token = uuid.uuid4().hex
+    if await get_async_redis().set(name, token, nx=True, ex=ttl):
+        return token
+    return None
+
+async def release_lock(name: str, token: str):
+    """释放自己持有的锁"""
+    await get_async_redis().eval(_RELEASE_LOCK_SCRIPT, 1, name, token)
+
+def _should_refresh_early(delta: float, ttl_ms: int) -> bool:
+    """
+    判断是否提前刷新（XFetch 算法）
+
+    剩余时间越短、重建耗时越长，越可能在过期前由某个请求提前重建，
+    使热点键不会在同一时刻集中过期。
+    """
+    if not delta or ttl_ms is None or ttl_ms < 0:
+        return False
+    return delta * CACHE_EARLY_REFRESH_BETA * -math.log(1.0 - random.random()) * 1000 >= ttl_ms
+
+async def get_or_load_cached(
+    key: str,
+    loader: Callable[[], Awaitable[Optional[Any]]],
+    ttl: int
+) -> Optional[Any]:
+    """
+    读取缓存，未命中或需要提前刷新时重建
+
+    loader 返回 None 表示数据不存在，不写入缓存。
+    """
+    pipe = get_async_redis().pipeline(transaction=False)
+    pipe.get(key)
+    pipe.pttl(key)
+    raw, ttl_ms = await pipe.execute()
+    cached = unwrap_cached(raw)
+    if cached is not None and not _should_refresh_early(cached.get("delta", 0), ttl_ms):
+        return cached["data"]
+    stale = cached["data"] if cached is not None else None
+    return await _cache_flights.do(key, lambda: _rebuild_cached(key, loader, ttl, stale))
+
+async def _rebuild_cached(
+    key: str,
+    loader: Callable[[], Awaitable[Optional[Any]]],
+    ttl: int,
+    stale: Optional[Any]
+) -> Optional[Any]:
+    client = get_async_redis()
+    lock_key = f"{CACHE_LOCK_PREFIX}{key}"
+    token = await acquire_lock(lock_key, CACHE_LOCK_TTL)
+    if token:
+        try:
+            # 未命中时再检查一次：读取缓存后、获取锁之前，其他请求可能刚完成重建
+            if stale is None:
+                cached = unwrap_cached(await client.get(key))
+                if cached is not None:
+                    return cached["data"]
+            start = time.perf_counter()
+            data = await loader()
+            if data is not None:
+                await client.setex(key, ttl, wrap_cached(data, time.perf_counter() - start))
+            return data
+        finally:
+            await release_lock(lock_key, token)
+    
+    # 其他进程正在重建：提前刷新时继续使用旧值，否则等待新值写入
+    if stale is not None:
+        return stale
+    deadline = time.monotonic() + CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+        pipe = client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.exists(lock_key)
+        raw, locked = await pipe.execute()
+        cached = unwrap_cached(raw)
+        if cached is not None:
+            return cached["data"]
+        if not locked:
+            break
+    # 重建者已释放锁但没有写入（数据不存在）或等待超时，自行加载
+    return await loader()
+
+async def add_token_to_blacklist(token: str, expires_in: int):
+    """将令牌添加到黑名单"""
+    await get_async_redis().setex(f"blacklist_token:{token}", expires_in, "1")
+
+async def is_token_blacklisted(token: str) -> bool:
+    """检查令牌是否在黑名单中"""
+    return bool(await get_async_redis().exists(f"blacklist_token:{token}"))
+
+# 用户缓存相关方法
+async def cache_user(user_id: int, user_data: dict):
+    """缓存用户信息"""
+    key = f"{USER_PREFIX}{user_id}"
+    await get_async_redis().setex(key, USER_CACHE_TTL, json.dumps(user_data))
+
+async def get_cached_user(user_id: int) -> Optional[dict]:
+    """获取缓存的用户信息"""
+    key = f"{USER_PREFIX}{user_id}"
+    data = await get_async_redis().get(key)
+    return json.loads(data) if data else None
+
+async def delete_user_cache(user_id: int):
+    """删除用户缓存"""
+    key = f"{USER_PREFIX}{user_id}"
+    await get_async_redis().delete(key)
+
+# 文章缓存相关方法
+async def cache_article(article_id: int, article_data: dict):
+    """缓存文章信息"""
+    key = f"{ARTICLE_PREFIX}{article_id}"
+    await get_async_redis().setex(key, ARTICLE_CACHE_TTL, wrap_cached(article_data))
+
+async def get_cached_article(article_id: int) -> Optional[dict]:
+    """获取缓存的文章信息"""
+    key = f"{ARTICLE_PREFIX}{article_id}"
+    cached = unwrap_cached(await get_async_redis().get(key))
+    return cached["data"] if cached else None
+
+async def get_or_load_article(article_id: int, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+    """获取文章缓存，未命中时只由一个请求重建"""
+    return await get_or_load_cached(f"{ARTICLE_PREFIX}{article_id}", loader, ARTICLE_CACHE_TTL)
+
+async def delete_article_cache(article_id: int):
+    """删除文章缓存"""
+    key = f"{ARTICLE_PREFIX}{article_id}"
+    await get_async_redis().delete(key)
+
+async def increment_article_view(
+    article_id: int, visitor: str, seed_views: Optional[int] = None
+) -> Optional[Dict[str, int]]:
+    """
+    记录一次文章浏览，返回浏览量、当日独立访客数和点赞数
+
+    visitor 为访客标识（用户ID或IP），同一访客当天多次浏览只计一个独立访客，
+    浏览量仍逐次累加。seed_views 为数据库中的浏览量，仅在 Redis 中没有记录时使用
+    （如 Redis 数据丢失）；未提供且 Redis 中没有记录时不记录浏览，返回 None，
+    由调用方从数据库读取浏览量后重试。
+    """
+    result = await get_async_redis().eval(
+        VIEW_ARTICLE_SCRIPT, 4, *article_view_keys(article_id),
+        article_id, "" if seed_views is None else seed_views, visitor, ARTICLE_UNIQUE_VISITORS_TTL
+    )
+    return parse_article_view(result) if result else None
+
+async def _take_pending(key: str, flushing_key: str) -> Dict[str, str]:
+    """
+    取出待写回的哈希
+
+    哈希先改名为写回中的键，之后的写入计入新的哈希，互不影响。
+    上次写回未确认时（如数据库写入失败）先重新返回上次的内容。
+    调用方需持有写回锁，避免多个进程重复写回同一批数据。
+    """
+    client = get_async_redis()
+    if not await client.exists(flushing_key):
+        # 待写回哈希只会被写入，持锁期间不会消失，先判断再改名是安全的
+        if not await client.exists(key):
+            return {}
+        await client.rename(key, flushing_key)
+    return await client.hgetall(flushing_key)
+
+async def take_view_count_deltas() -> Dict[int, int]:
+    """取出待写回的浏览量增量"""
+    deltas = await _take_pending(ARTICLE_VIEW_DELTAS, ARTICLE_VIEW_DELTAS_FLUSHING)
+    return {int(article_id): int(delta) for article_id, delta in deltas.items()}
+
+async def ack_view_count_deltas():
+    """确认增量已写回数据库"""
+    await get_async_redis().delete(ARTICLE_VIEW_DELTAS_FLUSHING)
+
+async def take_like_changes() -> Dict[Tuple[str, int, int], bool]:
+    """取出待写回的点赞变更，返回 {(kind, 目标ID, 用户ID): 是否点赞}"""
+    changes = await _take_pending(LIKE_CHANGES, LIKE_CHANGES_FLUSHING)
+    return {parse_like_change_field(field): liked == "1" for field, liked in changes.items()}
+
+async def ack_like_changes():
+    """确认点赞变更已写回数据库"""
+    await get_async_redis().delete(LIKE_CHANGES_FLUSHING)
+
+async def likes_restored() -> bool:
+    """点赞集合是否已从数据库恢复（Redis 数据丢失后标记随之消失）"""
+    return bool(await get_async_redis().exists(LIKES_RESTORED))
+
+async def restore_like_sets(kind: str, likes: Dict[int, List[int]]):
+    """把数据库中的点赞记录加回 Redis 集合，kind 为 article 或 comment"""
+    if not likes:
+        return
+    prefix = ARTICLE_LIKE_COUNT if kind == "article" else COMMENT_LIKE_COUNT_PREFIX
+    pipe = get_async_redis().pipeline(transaction=False)
+    for target_id, user_ids in likes.items():
+        pipe.sadd(f"{prefix}{target_id}", *user_ids)
+    await pipe.execute()
+
+async def mark_likes_restored():
+    """标记点赞集合已恢复"""
+    await get_async_redis().set(LIKES_RESTORED, 1)
+
+async def get_article_views(article_id: int) -> int:
+    """获取文章浏览次数"""
+    key = f"{ARTICLE_VIEW_COUNT}{article_id}"
+    views = await get_async_redis().get(key)
+    return int(views) if views else 0
+
+async def toggle_article_like(article_id: int, user_id: int) -> Tuple[bool, int]:
+    """切换文章点赞状态，返回 (是否点赞, 点赞数)，一次原子调用完成"""
+    liked, count = await get_async_redis().eval(
+        TOGGLE_LIKE_SCRIPT, 2, f"{ARTICLE_LIKE_COUNT}{article_id}", LIKE_CHANGES,
+        user_id, like_change_field("article", article_id, user_id)
+    )
+    return bool(liked), int(count)
+
+async def get_article_likes(article_id: int) -> int:
+    """获取文章点赞数"""
+    key = f"{ARTICLE_LIKE_COUNT}{article_id}"
+    return await get_async_redis().scard(key)
+
+async def get_article_stats_bulk(article_ids: List[int], user_id: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    批量获取文章浏览量和点赞数，一次管道往返完成
+
+    Redis 中没有浏览量计数时 view_count 为 None，由调用方使用数据库中的值。
+    传入 user_id 时同一管道中逐篇检查点赞集合，结果中增加 is_liked。
+    """
+    if not article_ids:
+        return {}
+    pipe = get_async_redis().pipeline(transaction=False)
+    for article_id in article_ids:
+        pipe.get(f"{ARTICLE_VIEW_COUNT}{article_id}")
+        pipe.scard(f"{ARTICLE_LIKE_COUNT}{article_id}")
+        if user_id is not None:
+            pipe.sismember(f"{ARTICLE_LIKE_COUNT}{article_id}", user_id)
+    results = await pipe.execute()
+    step = 2 if user_id is None else 3
+    stats = {}
+    for index, article_id in enumerate(article_ids):
+        views, likes = results[index * step:index * step + 2]
+        stats[article_id] = {
+            "view_count": int(views) if views is not None else None,
+            "like_count": likes or 0
+        }
+        if user_id is not None:
+            stats[article_id]["is_liked"] = bool(results[index * step + 2])
+    return stats
+
+# 文章列表缓存相关方法
+articles_cache = AsyncCacheNamespace(ARTICLES_NAMESPACE, ARTICLE_LIST_CACHE_TTL)
+
+def article_list_scopes(author_id: Optional[int] = None, status: Optional[str] = None, is_featured: Optional[bool] = None) -> List[str]:
+    """
+    获取文章列表缓存的代数范围
+
+    按作者、状态或精选过滤的列表只依赖对应范围的代数，其他列表依赖命名空间代数。
+    文章写入时传入其新旧属性，递增对应范围以及命名空间的代数。
+    """
+    scopes = []
+    if author_id is not None:
+        scopes.append(f"author:{author_id}")
+    if status is not None:
+        scopes.append(f"status:{status}")
+    if is_featured is not None:
+        scopes.append(f"featured:{int(is_featured)}")
+    return scopes
+
+# 评论缓存相关方法
+async def cache_comment(comment_id: int, comment_data: Dict[str, Any]) -> None:
+    """缓存评论数据"""
+    try:
+        key = f"{COMMENT_PREFIX}{comment_id}"
+        await get_async_redis().setex(key, COMMENT_CACHE_TTL, wrap_cached(comment_data))
+    except Exception as e:
+        # 记录错误但不中断程序
+        logger.error(f"Error caching comment: {e}")
+
+async def cache_comments_bulk(comments: List[Dict[str, Any]]) -> None:
+    """批量缓存评论数据，一次管道往返完成"""
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        for comment_data in comments:
+            key = f"{COMMENT_PREFIX}{comment_data['id']}"
+            pipe.setex(key, COMMENT_CACHE_TTL, wrap_cached(comment_data))
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error caching comments in bulk: {e}")
+
+async def get_cached_comment(comment_id: int) -> Optional[dict]:
+    """获取缓存的评论数据"""
+    try:
+        key = f"{COMMENT_PREFIX}{comment_id}"
+        cached = unwrap_cached(await get_async_redis().get(key))
+        if cached:
+            return cached["data"]
+    except Exception as e:
+        logger.error(f"Error getting cached comment: {e}")
+    return None
+
+async def get_or_load_comment(comment_id: int, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+    """获取评论缓存，未命中时只由一个请求重建"""
+    return await get_or_load_cached(f"{COMMENT_PREFIX}{comment_id}", loader, COMMENT_CACHE_TTL)
+
+async def delete_comment_cache(comment_id: int) -> None:
+    """删除评论缓存"""
+    try:
+        key = f"{COMMENT_PREFIX}{comment_id}"
+        await get_async_redis().delete(key)
+    except Exception as e:
+        logger.error(f"Error deleting comment cache: {e}")
+
+async def get_or_load_comment_tree(article_id: int, loader: Callable[[], Awaitable[Optional[list]]]) -> Optional[list]:
+    """获取文章的评论树缓存，未命中时只由一个请求重建"""
+    return await get_or_load_cached(f"{COMMENT_TREE_PREFIX}{article_id}", loader, COMMENT_TREE_CACHE_TTL)
+
+async def delete_comment_tree_cache(article_id: int) -> None:
+    """评论新增、修改或删除后删除文章的评论树缓存"""
+    try:
+        await get_async_redis().delete(f"{COMMENT_TREE_PREFIX}{article_id}")
+    except Exception as e:
+        logger.error(f"Error deleting comment tree cache: {e}")
+
+async def invalidate_comment_caches(comment_ids: Iterable[int], article_ids: Iterable[int], batch_size: int = 500):
+    """
+    批量审核后删除评论缓存，以及涉及文章的评论树和文章详情缓存（含评论数）
+
+    所有删除放在同一个管道中，一次往返完成。
+    """
+    keys = [f"{COMMENT_PREFIX}{comment_id}" for comment_id in comment_ids]
+    for article_id in article_ids:
+        keys.append(f"{COMMENT_TREE_PREFIX}{article_id}")
+        keys.append(f"{ARTICLE_PREFIX}{article_id}")
+    if not keys:
+        return
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        for start in range(0, len(keys), batch_size):
+            pipe.unlink(*keys[start:start + batch_size])
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error invalidating comment caches: {e}")
+
+async def get_pending_comment_count() -> Optional[int]:
+    """获取缓存的待审核评论数，未缓存时返回 None"""
+    count = await get_async_redis().get(COMMENT_PENDING_COUNT)
+    return int(count) if count is not None else None
+
+async def set_pending_comment_count(count: int):
+    """缓存从数据库统计的待审核评论数，已有值时不覆盖（可能已被增量更新）"""
+    await get_async_redis().set(COMMENT_PENDING_COUNT, count, nx=True, ex=COMMENT_PENDING_COUNT_TTL)
+
+async def adjust_pending_comment_count(delta: int):
+    """增量调整待审核评论数，未缓存时不做处理"""
+    if not delta:
+        return
+    try:
+        await get_async_redis().eval(ADJUST_IF_EXISTS_SCRIPT, 1, COMMENT_PENDING_COUNT, delta)
+    except Exception as e:
+        logger.error(f"Error adjusting pending comment count: {e}")
+
+async def record_comment_signals(
+    ip: Optional[str], user_id: Optional[int], fingerprint: Optional[str],
+    rate_window: int, duplicate_window: int
+) -> Dict[str, int]:
+    """
+    记录一条新评论的反垃圾信号，一次往返完成
+
+    IP 和用户使用固定时间窗口计数；内容指纹按用户（未登录时按 IP）分别计数，
+    在 duplicate_window 内累计出现次数，不同用户发表相同的内容互不影响。
+
+    Returns:
+        {"ip_rate": ..., "user_rate": ..., "duplicates": ...}，计数均包含本条，
+        缺少对应维度时不返回该项
+    """
+    window = int(time.time()) // rate_window
+    counters = []
+    if ip:
+        counters.append(("ip_rate", f"{SPAM_RATE_PREFIX}ip:{ip}:{window}", rate_window))
+    if user_id is not None:
+        counters.append(("user_rate", f"{SPAM_RATE_PREFIX}user:{user_id}:{window}", rate_window))
+    author = f"user:{user_id}" if user_id is not None else (f"ip:{ip}" if ip else None)
+    if fingerprint and author:
+        counters.append(("duplicates", f"{SPAM_FINGERPRINT_PREFIX}{author}:{fingerprint}", duplicate_window))
+    if not counters:
+        return {}
+    counts = await get_async_redis().eval(
+        INCR_WINDOWS_SCRIPT, len(counters),
+        *[key for _, key, _ in counters], *[ttl for _, _, ttl in counters]
+    )
+    return {name: int(count) for (name, _, _), count in zip(counters, counts)}
+
+async def get_search_index_generation() -> int:
+    """获取搜索索引版本号，从未写入时为 0"""
+    return int(await get_async_redis().get(SEARCH_INDEX_GENERATION) or 0)
+
+async def bump_search_index_generation() -> int:
+    """递增搜索索引版本号，返回新版本号"""
+    return await get_async_redis().incr(SEARCH_INDEX_GENERATION)
+
+async def hit_rate_limit(
+    bucket: str, limit: int, window: int, window_id: int, previous_weight: float
+) -> Tuple[bool, int, int]:
+    """
+    在滑动窗口中记录一次请求，一次往返完成
+
+    Args:
+        bucket: 限流对象，如 "read:u:1"
+        window_id: 当前时间窗口编号
+        previous_weight: 上一窗口计数的权重（当前窗口剩余时间占比）
+
+    Returns:
+        (是否放行, 上一窗口计数, 当前窗口计数)
+    """
+    # 同一对象的键使用相同的哈希标签，保证在集群中落在同一个槽
+    prefix = f"{RATE_LIMIT_PREFIX}{{{bucket}}}:"
+    allowed, previous, current = await get_async_redis().eval(
+        SLIDING_WINDOW_SCRIPT, 2, f"{prefix}{window_id}", f"{prefix}{window_id - 1}",
+        limit, previous_weight, window * 2
+    )
+    return bool(allowed), int(previous), int(current)
+
+async def toggle_comment_like(comment_id: int, user_id: int) -> Tuple[bool, int]:
+    """切换评论点赞状态，返回 (是否点赞, 点赞数)，一次原子调用完成"""
+    try:
+        liked, count = await get_async_redis().eval(
+            TOGGLE_LIKE_SCRIPT, 2, f"{COMMENT_LIKE_COUNT_PREFIX}{comment_id}", LIKE_CHANGES,
+            user_id, like_change_field("comment", comment_id, user_id)
+        )
+        return bool(liked), int(count)
+    except Exception as e:
+        logger.error(f"Error toggling comment like: {e}")
+        return False, 0
+
+async def get_comment_likes(comment_id: int) -> int:
+    """获取评论点赞数"""
+    try:
+        key = f"{COMMENT_LIKE_COUNT_PREFIX}{comment_id}"
+        return await get_async_redis().scard(key)
+    except Exception as e:
+        logger.error(f"Error getting comment likes: {e}")
+        return 0
+
+async def get_comment_like_stats_bulk(comment_ids: List[int], user_id: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    批量获取评论点赞数，一次管道往返完成
+
+    传入 user_id 时同一管道中逐条检查点赞集合，结果中增加 is_liked。
+    """
+    if not comment_ids:
+        return {}
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        for comment_id in comment_ids:
+            pipe.scard(f"{COMMENT_LIKE_COUNT_PREFIX}{comment_id}")
+            if user_id is not None:
+                pipe.sismember(f"{COMMENT_LIKE_COUNT_PREFIX}{comment_id}", user_id)
+        results = await pipe.execute()
+        if user_id is None:
+            return {comment_id: {"like_count": likes} for comment_id, likes in zip(comment_ids, results)}
+        return {
+            comment_id: {"like_count": likes, "is_liked": bool(liked)}
+            for comment_id, likes, liked in zip(comment_ids, results[0::2], results[1::2])
+        }
+    except Exception as e:
+        logger.error(f"Error getting comment likes in bulk: {e}")
+        default = {"like_count": 0} if user_id is None else {"like_count": 0, "is_liked": False}
+        return {comment_id: dict(default) for comment_id in comment_ids}
+
+async def is_comment_liked_by_user(comment_id: int, user_id: int) -> bool:
+    """检查用户是否已点赞评论"""
+    try:
+        key = f"{COMMENT_LIKE_COUNT_PREFIX}{comment_id}"
+        return bool(await get_async_redis().sismember(key, user_id))
+    except Exception as e:
+        logger.error(f"Error checking comment like status: {e}")
+        return False
+
+# 批量操作方法
+async def clear_comment_likes():
+    """清理评论点赞数据"""
+    try:
+        await delete_keys_by_pattern(f"{COMMENT_LIKE_COUNT_PREFIX}*")
+    except Exception as e:
+        logger.error(f"Error clearing comment likes: {e}")
+
+async def clear_article_likes():
+    """清理文章点赞数据"""
+    try:
+        await delete_keys_by_pattern(f"{ARTICLE_LIKE_COUNT}*")
+    except Exception as e:
+        logger.error(f"Error clearing article likes: {e}")
+
+async def clear_all_likes():
+    """清理所有点赞数据"""
+    await clear_comment_likes()
+    await clear_article_likes()
+    await get_async_redis().delete(LIKE_CHANGES, LIKE_CHANGES_FLUSHING, LIKES_RESTORED)
@@ -1,8 +1,9 @@
 from redis import Redis
 from fastapi import Depends
 from ..config import settings
+import hashlib
 import json
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Callable, Dict, Iterable, List, Sequence, Tuple
 from datetime import timedelta, datetime
 
 # Redis 客户端实例
@@ -17,16 +18,121 @@ redis_client = Redis(
 USER_PREFIX = "user:"
 ARTICLE_PREFIX = "article:"
 COMMENT_PREFIX = "comment:"
+COMMENT_TREE_PREFIX = "comment_tree:"  # 按文章缓存组装好的评论树
+COMMENT_PENDING_COUNT = "comment_pending_count"  # 待审核评论数（审核队列角标）
 ARTICLE_VIEW_COUNT = "article_views:"
 ARTICLE_LIKE_COUNT = "article_likes:"
+ARTICLE_VIEW_DELTAS = "article_view_deltas"  # 尚未写回数据库的浏览量增量
+ARTICLE_VIEW_DELTAS_FLUSHING = "article_view_deltas:flushing"  # 正在写回的增量
+ARTICLE_UNIQUE_VISITORS = "article_uv:"  # 每篇文章每天一个 HyperLogLog
 COMMENT_LIKE_PREFIX = "comment_like:"
 COMMENT_LIKE_COUNT_PREFIX = "comment_like_count:"
+LIKE_CHANGES = "like_changes"  # 尚未写回数据库的点赞变更
+LIKE_CHANGES_FLUSHING = "like_changes:flushing"  # 正在写回的点赞变更
+LIKES_RESTORED = "likes:restored"  # 点赞集合已从数据库恢复的标记
+SPAM_RATE_PREFIX = "spam:rate:"  # 反垃圾：按 IP / 用户的固定窗口评论计数
+SPAM_FINGERPRINT_PREFIX = "spam:fp:"  # 反垃圾：每个用户的评论内容指纹出现次数
+RATE_LIMIT_PREFIX = "rate_limit:"  # 请求限流计数，按 (路由组, 身份, 时间窗口) 分键
+SEARCH_INDEX_GENERATION = "search_index:generation"  # 文章写操作递增，各 worker 据此同步进程内索引
+ARTICLES_NAMESPACE = "articles"
+CACHE_LOCK_PREFIX = "cache_lock:"
 
 # 缓存过期时间（秒）
 USER_CACHE_TTL = 3600    # 1小时
 ARTICLE_CACHE_TTL = 3600  # 1小时
 COMMENT_CACHE_TTL = 3600  # 1小时
-VIEW_COUNT_TTL = 86400  # 24小时
+COMMENT_TREE_CACHE_TTL = 600  # 10分钟
+COMMENT_PENDING_COUNT_TTL = 3600  # 增量维护，过期后从数据库重新统计以纠正偏差
+ARTICLE_LIST_CACHE_TTL = 600  # 10分钟
+CACHE_LOCK_TTL = 5  # 缓存重建锁的最长持有时间
+
+# 批量删除时每次 SCAN 的数量提示，也是每条 UNLINK 删除的键数
+SCAN_BATCH_SIZE = 1000
+ARTICLE_UNIQUE_VISITORS_TTL = 2 * 86400  # 保留到次日，便于跨零点统计
+
+# 记录一次文章浏览，一次往返原子完成：
+# 浏览量不存在时以数据库中的值为起点（未提供初始值时不做任何记录，返回 false），
+# 累加浏览量和待写回增量，访客加入当日 HyperLogLog，返回浏览量、当日独立访客数和点赞数。
+# KEYS: 浏览量, 增量哈希, 当日访客, 点赞集合
+# ARGV: 文章ID, 浏览量初始值（空字符串表示未提供）, 访客标识, 访客统计过期时间
+VIEW_ARTICLE_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    if ARGV[2] == '' then
+        return false
+    end
+    redis.call('set', KEYS[1], ARGV[2])
+end
+local views = redis.call('incr', KEYS[1])
+redis.call('hincrby', KEYS[2], ARGV[1], 1)
+if redis.call('pfadd', KEYS[3], ARGV[3]) == 1 then
+    redis.call('expire', KEYS[3], ARGV[4])
+end
+return {views, redis.call('pfcount', KEYS[3]), redis.call('scard', KEYS[4])}
+"""
+
+# 切换点赞状态并记录待写回的变更，返回 {是否点赞, 点赞数}。
+# 同一用户连续点击时各次调用串行执行，不会出现重复点赞。
+# KEYS: 点赞集合, 变更哈希
+# ARGV: 用户ID, 变更字段
+TOGGLE_LIKE_SCRIPT = """
+local liked = 1
+if redis.call('sismember', KEYS[1], ARGV[1]) == 1 then
+    redis.call('srem', KEYS[1], ARGV[1])
+    liked = 0
+else
+    redis.call('sadd', KEYS[1], ARGV[1])
+end
+redis.call('hset', KEYS[2], ARGV[2], liked)
+return {liked, redis.call('scard', KEYS[1])}
+"""
+
+# 计数存在时才累加，不存在时保持缺失，由下次读取从数据库统计
+ADJUST_IF_EXISTS_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return false
+"""
+
+# 反垃圾计数：逐个 INCR，首次创建时设置过期时间，返回各键计数
+# KEYS: 计数键；ARGV: 对应的过期时间（秒）
+INCR_WINDOWS_SCRIPT = """
+local counts = {}
+for i, key in ipairs(KEYS) do
+    local count = redis.call('incr', key)
+    if count == 1 then
+        redis.call('expire', key, ARGV[i])
+    end
+    counts[i] = count
+end
+return counts
+"""
+
+# 滑动窗口限流：上一窗口计数按剩余比例加权，加上当前窗口计数作为估计值，
+# 未超限时当前窗口计数加一；被拒绝的请求不计数
+# KEYS: 当前窗口键, 上一窗口键；ARGV: 上限, 上一窗口权重, 过期时间（秒）
+# 返回 {是否放行, 上一窗口计数, 当前窗口计数}
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('get', KEYS[1]) or '0')
+local previous = tonumber(redis.call('get', KEYS[2]) or '0')
+if previous * tonumber(ARGV[2]) + current + 1 > tonumber(ARGV[1]) then
+    return {0, previous, current}
+end
+current = redis.call('incr', KEYS[1])
+if current == 1 then
+    redis.call('expire', KEYS[1], ARGV[3])
+end
+return {1, previous, current}
+"""
+
+def like_change_field(kind: str, target_id: int, user_id: int) -> str:
+    """变更哈希中的字段，kind 为 article 或 comment，值为最新的点赞状态"""
+    return f"{kind}:{target_id}:{user_id}"
+
+def parse_like_change_field(field: str) -> Tuple[str, int, int]:
+    """解析变更字段，返回 (kind, 目标ID, 用户ID)"""
+    kind, target_id, user_id = field.split(":")
+    return kind, int(target_id), int(user_id)
 
 class DateTimeEncoder(json.JSONEncoder):
     """处理 datetime 对象的 JSON 编码器"""
@@ -35,6 +141,124 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
+def wrap_cached(data: Any, delta: float = 0.0) -> str:
+    """
+    序列化缓存值
+
+    同时记录重建耗时 delta（秒），用于概率提前刷新：重建越慢，越早开始刷新。
+    直接写入的缓存没有重建耗时，delta 为 0，不会提前刷新。
+    """
+    return json.dumps({"data": data, "delta": delta}, cls=DateTimeEncoder)
+
+def unwrap_cached(raw: Optional[str]) -> Optional[dict]:
+    """反序列化缓存值，返回包含 data 和 delta 的字典；格式不符时视为未命中"""
+    if not raw:
+        return None
+    value = json.loads(raw)
+    return value if isinstance(value, dict) and "data" in value else None
+
+def delete_keys_by_pattern(
+    pattern: str,
+    batch_size: int = SCAN_BATCH_SIZE,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    按模式分批删除键
+
+    用 SCAN 增量遍历、UNLINK 分批删除（内存在后台线程释放），每条命令只处理一批键，
+    不会像 KEYS 那样遍历整个键空间时阻塞其他请求。每删除一批调用一次 on_progress(已删除数)。
+
+    Returns:
+        删除的键数
+    """
+    deleted = 0
+    batch = []
+    for key in redis_client.scan_iter(match=pattern, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += redis_client.unlink(*batch)
+            batch = []
+            if on_progress:
+                on_progress(deleted)
+    if batch:
+        deleted += redis_client.unlink(*batch)
+        if on_progress:
+            on_progress(deleted)
+    return deleted
+
+class CacheNamespace:
+    """
+    带代数计数器的缓存命名空间
+
+    缓存键中包含代数，格式为 {name}:{代数}:{key}。数据写入后递增代数，
+    命名空间下所有派生缓存即全部失效，无需扫描或枚举键名，旧键随过期时间淘汰。
+
+    除命名空间代数 {name}:gen 外，还可以按范围（如 author:1）维护代数：
+    只依赖某些范围的缓存用这些范围的代数构造键，其他范围的写入不会使其失效。
+    写入时递增命名空间代数和受影响范围的代数。构造键时使用了哪些范围
+    需由 key 本身区分（如包含过滤参数）。
+    """
+
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+
+    @property
+    def generation_key(self) -> str:
+        return f"{self.name}:gen"
+
+    def generation_keys(self, scopes: Sequence[str] = ()) -> List[str]:
+        """获取构造键所依赖的代数计数器，未指定范围时使用命名空间代数"""
+        if not scopes:
+            return [self.generation_key]
+        return [f"{self.generation_key}:{scope}" for scope in scopes]
+
+    def invalidation_keys(self, scopes: Iterable[str] = ()) -> List[str]:
+        """获取写入时需要递增的代数计数器"""
+        return [self.generation_key] + [f"{self.generation_key}:{scope}" for scope in sorted(set(scopes))]
+
+    def versioned_key(self, key: str, generations: Sequence[Optional[str]]) -> str:
+        version = ".".join(str(int(generation or 0)) for generation in generations)
+        return f"{self.name}:{version}:{key}"
+
+    def build_key(self, key: str, scopes: Sequence[str] = ()) -> str:
+        """
+        按当前代数构造缓存键
+
+        读取和回填应使用同一个键：若计算期间发生写入，结果会写到旧代数的键上，
+        不会被后续请求读到。
+        """
+        return self.versioned_key(key, redis_client.mget(self.generation_keys(scopes)))
+
+    def get(self, full_key: str) -> Optional[Any]:
+        data = redis_client.get(full_key)
+        return json.loads(data) if data else None
+
+    def set(self, full_key: str, value: Any, ttl: Optional[int] = None):
+        redis_client.setex(full_key, ttl or self.ttl, json.dumps(value, cls=DateTimeEncoder))
+
+    def invalidate(self, scopes: Iterable[str] = ()):
+        """递增命名空间代数及指定范围的代数"""
+        pipe = redis_client.pipeline(transaction=False)
+        for key in self.invalidation_keys(scopes):
+            pipe.incr(key)
+        pipe.execute()
+
+    def clear(self):
+        """删除命名空间下的全部缓存和代数（用于测试和维护脚本）"""
+        delete_keys_by_pattern(f"{self.name}:*")
+
+def cache_digest(params: Dict[str, Any]) -> str:
+    """将查询参数规范化后计算摘要，忽略值为 None 的参数"""
+    payload = json.dumps(
+        {key: value for key, value in params.items() if value is not None},
+        sort_keys=True,
+        cls=DateTimeEncoder
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+articles_cache = CacheNamespace(ARTICLES_NAMESPACE, ARTICLE_LIST_CACHE_TTL)
+
 def get_redis() -> Redis:
     """获取 Redis 连接"""
     try:
@@ -72,26 +296,37 @@ def delete_user_cache(user_id: int):
 def cache_article(article_id: int, article_data: dict):
     """缓存文章信息"""
     key = f"{ARTICLE_PREFIX}{article_id}"
-    redis_client.setex(key, ARTICLE_CACHE_TTL, json.dumps(article_data, cls=DateTimeEncoder))
+    redis_client.setex(key, ARTICLE_CACHE_TTL, wrap_cached(article_data))
 
 def get_cached_article(article_id: int) -> Optional[dict]:
     """获取缓存的文章信息"""
     key = f"{ARTICLE_PREFIX}{article_id}"
-    data = redis_client.get(key)
-    return json.loads(data) if data else None
+    cached = unwrap_cached(redis_client.get(key))
+    return cached["data"] if cached else None
 
 def delete_article_cache(article_id: int):
     """删除文章缓存"""
     key = f"{ARTICLE_PREFIX}{article_id}"
     redis_client.delete(key)
 
-def increment_article_view(article_id: int):
-    """增加文章浏览次数"""
-    key = f"{ARTICLE_VIEW_COUNT}{article_id}"
-    if not redis_client.exists(key):
-        redis_client.setex(key, VIEW_COUNT_TTL, 1)
-    else:
-        redis_client.incr(key)
+def article_view_keys(article_id: int, day: Optional[datetime] = None) -> List[str]:
+    """VIEW_ARTICLE_SCRIPT 使用的键，访客统计按 UTC 日期分键"""
+    day = day or datetime.utcnow()
+    return [
+        f"{ARTICLE_VIEW_COUNT}{article_id}",
+        ARTICLE_VIEW_DELTAS,
+        f"{ARTICLE_UNIQUE_VISITORS}{article_id}:{day:%Y%m%d}",
+        f"{ARTICLE_LIKE_COUNT}{article_id}"
+    ]
+
+def parse_article_view(result: Sequence[int]) -> Dict[str, int]:
+    """解析 VIEW_ARTICLE_SCRIPT 的返回值"""
+    views, unique_visitors, likes = result
+    return {
+        "view_count": int(views),
+        "unique_visitors": int(unique_visitors),
+        "like_count": int(likes)
+    }
 
 def get_article_views(article_id: int) -> int:
     """获取文章浏览次数"""
@@ -99,15 +334,6 @@ def get_article_views(article_id: int) -> int:
     views = redis_client.get(key)
     return int(views) if views else 0
 
-def toggle_article_like(article_id: int, user_id: int) -> bool:
-    """切换文章点赞状态，返回是否点赞"""
-    key = f"{ARTICLE_LIKE_COUNT}{article_id}"
-    if redis_client.sismember(key, user_id):
-        redis_client.srem(key, user_id)
-        return False
-    redis_client.sadd(key, user_id)
-    return True
-
 def get_article_likes(article_id: int) -> int:
     """获取文章点赞数"""
     key = f"{ARTICLE_LIKE_COUNT}{article_id}"
@@ -118,7 +344,7 @@ def cache_comment(comment_id: int, comment_data: Dict[str, Any]) -> None:
     """缓存评论数据"""
     try:
         key = f"{COMMENT_PREFIX}{comment_id}"
-        redis_client.setex(key, COMMENT_CACHE_TTL, json.dumps(comment_data, cls=DateTimeEncoder))
+        redis_client.setex(key, COMMENT_CACHE_TTL, wrap_cached(comment_data))
     except Exception as e:
         # 记录错误但不中断程序
         print(f"Error caching comment: {e}")
@@ -127,9 +353,9 @@ def get_cached_comment(comment_id: int) -> Optional[dict]:
     """获取缓存的评论数据"""
     try:
         key = f"{COMMENT_PREFIX}{comment_id}"
-        data = redis_client.get(key)
-        if data:
-            return json.loads(data)
+        cached = unwrap_cached(redis_client.get(key))
+        if cached:
+            return cached["data"]
     except Exception as e:
         print(f"Error getting cached comment: {e}")
     return None
@@ -142,19 +368,6 @@ def delete_comment_cache(comment_id: int) -> None:
     except Exception as e:
         print(f"Error deleting comment cache: {e}")
 
-def toggle_comment_like(comment_id: int, user_id: int) -> bool:
-    """切换评论点赞状态"""
-    try:
-        key = f"{COMMENT_LIKE_COUNT_PREFIX}{comment_id}"
-        if redis_client.sismember(key, user_id):
-            redis_client.srem(key, user_id)
-            return False
-        redis_client.sadd(key, user_id)
-        return True
-    except Exception as e:
-        print(f"Error toggling comment like: {e}")
-        return False
-
 def get_comment_likes(comment_id: int) -> int:
     """获取评论点赞数"""
     try:
@@ -174,38 +387,29 @@ def is_comment_liked_by_user(comment_id: int, user_id: int) -> bool:
         return False
 
 # 批量操作方法
-def cache_multiple_articles(articles: list[dict], prefix: str = "recent"):
-    """缓存多篇文章（如最近文章、热门文章等）"""
-    key = f"{ARTICLE_PREFIX}{prefix}"
-    redis_client.setex(key, ARTICLE_CACHE_TTL, json.dumps(articles, cls=DateTimeEncoder))
-
-def get_cached_multiple_articles(prefix: str = "recent") -> Optional[list]:
-    """获取缓存的多篇文章"""
-    key = f"{ARTICLE_PREFIX}{prefix}"
-    data = redis_client.get(key)
-    return json.loads(data) if data else None
-
 def clear_comment_likes():
     """清理评论点赞数据"""
     try:
-        # 获取所有评论点赞相关的键
-        keys = redis_client.keys(f"{COMMENT_LIKE_COUNT_PREFIX}*")
-        if keys:
-            redis_client.delete(*keys)
+        delete_keys_by_pattern(f"{COMMENT_LIKE_COUNT_PREFIX}*")
     except Exception as e:
         print(f"Error clearing comment likes: {e}")
 
 def clear_article_likes():
     """清理文章点赞数据"""
     try:
-        # 获取所有文章点赞相关的键
-        keys = redis_client.keys(f"{ARTICLE_LIKE_COUNT}*")
-        if keys:
-            redis_client.delete(*keys)
+        delete_keys_by_pattern(f"{ARTICLE_LIKE_COUNT}*")
     except Exception as e:
         print(f"Error clearing article likes: {e}")
 
+def clear_user_cache():
+    """清理用户缓存数据"""
+    try:
+        delete_keys_by_pattern(f"{USER_PREFIX}*")
+    except Exception as e:
+        print(f"Error clearing user cache: {e}")
+
 def clear_all_likes():
     """清理所有点赞数据"""
     clear_comment_likes()
-    clear_article_likes() 
\ No newline at end of file
+    clear_article_likes()
+    redis_client.delete(LIKE_CHANGES, LIKE_CHANGES_FLUSHING, LIKES_RESTORED) 
\ No newline at end of file
@@ -1,15 +1,23 @@
 import os
 import sys
 import time
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
-from app.api import users, articles, categories, tags, comments, auth, upload
-from app.database import Base, engine
+from app.api import users, articles, categories, tags, comments, auth, upload, admin
+from app.database import Base, engine, AsyncSessionLocal
 from app.logger import app_logger
 from app.schemas.response import Response
 from app.config import settings
+from app.core.rate_limit import rate_limit_requests
+from app.dependencies.async_redis import init_redis_pool, close_redis_pool
+from app.search.service import init_search_index, save_index
+from app.tasks.view_counts import run_view_count_flusher, flush_view_counts
+from app.tasks.likes import run_like_sync, sync_likes, restore_likes
 
 # 配置日志
 logging.basicConfig(
@@ -23,15 +31,68 @@ logger = logging.getLogger(__name__)
 # 创建数据库表
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用生命周期
+
+    启动时创建 Redis 连接池、加载搜索索引、按需恢复点赞集合，并启动浏览量写回和点赞同步任务；
+    关闭时停止后台任务并做最后一次写回，保存索引快照，释放连接池。
+    """
+    try:
+        await init_redis_pool()
+    except Exception as e:
+        logger.error(f"Redis 连接池初始化失败：{str(e)}")
+    try:
+        await init_search_index()
+    except Exception as e:
+        logger.error(f"搜索索引加载失败：{str(e)}")
+    try:
+        async with AsyncSessionLocal() as db:
+            await restore_likes(db)
+    except Exception as e:
+        logger.error(f"点赞数据恢复失败：{str(e)}")
+    # (后台任务, 关闭时的最后一次写回)
+    workers = []
+    if settings.VIEW_COUNT_FLUSH_INTERVAL > 0:
+        workers.append((
+            asyncio.create_task(run_view_count_flusher(settings.VIEW_COUNT_FLUSH_INTERVAL)),
+            flush_view_counts
+        ))
+    if settings.LIKE_SYNC_INTERVAL > 0:
+        workers.append((asyncio.create_task(run_like_sync(settings.LIKE_SYNC_INTERVAL)), sync_likes))
+    yield
+    for task, final_flush in workers:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        try:
+            async with AsyncSessionLocal() as db:
+                await final_flush(db)
+        except Exception as e:
+            logger.error(f"关闭时写回失败：{str(e)}")
+    try:
+        save_index()
+    except Exception as e:
+        logger.error(f"搜索索引快照保存失败：{str(e)}")
+    await close_redis_pool()
+
 app = FastAPI(
     title="Blog API",
     description="博客系统后端 API",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    redirect_slashes=False
+    redirect_slashes=False,
+    lifespan=lifespan
 )
 
+# 请求限流。后注册的中间件位于外层，限流需先于 CORS 注册，
+# 429 响应才会经过 CORS 中间件带上跨域头
+app.add_middleware(BaseHTTPMiddleware, dispatch=rate_limit_requests)
+
 # 配置 CORS
 origins = settings.CORS_ORIGINS if isinstance(settings.CORS_ORIGINS, list) else ["http://127.0.0.1:3000", "http://localhost:3000"]
 app.add_middleware(
@@ -40,6 +101,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],  # 允许前端读取 429 响应的重试时间
 )
 
 @app.middleware("http")
@@ -83,6 +145,7 @@ app.include_router(categories.router, prefix="/api", tags=["categories"])
 app.include_router(tags.router, prefix="/api", tags=["tags"])
 app.include_router(comments.router, prefix="/api", tags=["comments"])
 app.include_router(upload.router, prefix="/api", tags=["upload"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
 
 @app.get("/", response_model=Response[dict])
 def read_root():
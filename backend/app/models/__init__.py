@@ -3,6 +3,7 @@ from .article import Article
 from .category import Category
 from .tag import Tag
 from .article_relationships import article_categories, article_tags
+from .like import article_likes, comment_likes
 
 __all__ = [
     "User",
@@ -10,5 +11,7 @@ __all__ = [
     "Category",
     "Tag",
     "article_categories",
-    "article_tags"
+    "article_tags",
+    "article_likes",
+    "comment_likes"
 ]
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from ..database import Base
 from .article_relationships import article_categories, article_tags
@@ -10,7 +10,7 @@ class Article(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     slug = Column(String(100), unique=True, nullable=False)
-    content = Column(Text, nullable=False)
+    content = deferred(Column(Text, nullable=False))  # 正文较大，默认延迟加载
     summary = Column(String(200))
     
     # SEO fields
@@ -44,5 +44,16 @@ class Article(Base):
     # Comments
     comments = relationship("Comment", back_populates="article", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # 游标分页按 (created_at, id) 倒序扫描
+        Index("ix_articles_created_at_id", "created_at", "id"),
+        # 全文检索，ngram 解析器支持中文分词，仅 MySQL 创建
+        Index(
+            "ft_articles_title_summary_content", "title", "summary", "content",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram"
+        ).ddl_if(dialect="mysql"),
+    )
+
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -29,5 +29,10 @@ class Comment(Base):
     user = relationship("User", back_populates="comments")
     parent = relationship("Comment", remote_side=[id], backref="replies")
 
+    __table_args__ = (
+        # 审核队列：待审核评论 (is_approved=false, is_spam=false) 按 (created_at, id) 游标分页
+        Index("ix_comments_moderation_queue", "is_approved", "is_spam", "created_at"),
+    )
+
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Table, PrimaryKeyConstraint
+from datetime import datetime
+from ..database import Base
+
+# 点赞以 Redis 集合为准，由写回任务批量同步到下面两张表，
+# Redis 数据丢失时从这里恢复
+
+# 文章点赞表
+article_likes = Table(
+    "article_likes",
+    Base.metadata,
+    Column("article_id", Integer, ForeignKey("articles.id", ondelete="CASCADE"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("created_at", DateTime, default=datetime.utcnow),
+    PrimaryKeyConstraint("article_id", "user_id")
+)
+
+# 评论点赞表
+comment_likes = Table(
+    "comment_likes",
+    Base.metadata,
+    Column("comment_id", Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("created_at", DateTime, default=datetime.utcnow),
+    PrimaryKeyConstraint("comment_id", "user_id")
+)
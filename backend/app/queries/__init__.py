@@ -0,0 +1 @@
+"""查询层模块"""
@@ -0,0 +1,105 @@
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, load_only, undefer
+from ..models.article import Article
+from ..models.user import User
+
+# 预加载配置名称
+ARTICLE_LOAD_PROFILES = ("list", "detail")
+
+# 列表可返回的字段：列字段、统计字段（来自 Redis）和关联字段
+ARTICLE_LIST_COLUMNS = (
+    "title", "slug", "content", "summary", "meta_title", "meta_description", "keywords",
+    "status", "is_featured", "allow_comments", "created_at", "updated_at", "published_at",
+    "comment_count",
+)
+ARTICLE_LIST_STATS = ("view_count", "like_count")
+ARTICLE_LIST_RELATIONS = ("author", "categories", "tags")
+ARTICLE_LIST_FIELDS = ("id",) + ARTICLE_LIST_COLUMNS + ARTICLE_LIST_STATS + ARTICLE_LIST_RELATIONS
+
+# 列表视图：summary 不含正文，full 返回全部字段
+ARTICLE_LIST_VIEWS = {
+    "summary": tuple(field for field in ARTICLE_LIST_FIELDS if field != "content"),
+    "full": ARTICLE_LIST_FIELDS,
+}
+
+def article_load_options(profile: str = "list") -> tuple:
+    """
+    获取文章预加载配置
+
+    序列化文章时会访问作者、分类和标签，统一在查询时加载，
+    避免逐行懒加载产生 N+1 查询（异步会话中懒加载也无法使用）。
+    作者为多对一关系，使用 joinedload 随主查询一起取回；
+    分类和标签为多对多关系，使用 selectinload 每页各一条 IN 查询。
+    正文默认延迟加载，详情配置显式加载。
+
+    配置在调用时构建，避免导入阶段触发映射器初始化。
+    """
+    if profile not in ARTICLE_LOAD_PROFILES:
+        raise ValueError(f"未知的预加载配置: {profile}")
+    options = (
+        joinedload(Article.author),
+        selectinload(Article.categories),
+        selectinload(Article.tags),
+    )
+    if profile == "detail":
+        options += (undefer(Article.content),)
+    return options
+
+def article_select(profile: str = "list") -> Select:
+    """构建带预加载配置的文章查询语句"""
+    return select(Article).options(*article_load_options(profile))
+
+def resolve_list_fields(fields: Optional[str], view: str = "summary") -> Tuple[str, ...]:
+    """
+    解析列表需要返回的字段
+
+    指定 fields（逗号分隔）时以其为准，否则使用视图的字段集合；id 始终返回。
+
+    Raises:
+        ValueError: 视图或字段名不存在
+    """
+    if view not in ARTICLE_LIST_VIEWS:
+        raise ValueError(f"未知的视图: {view}")
+    if not fields:
+        return ARTICLE_LIST_VIEWS[view]
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ARTICLE_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}")
+    return tuple(field for field in ARTICLE_LIST_FIELDS if field == "id" or field in requested)
+
+def article_list_select(fields: Iterable[str]) -> Select:
+    """
+    构建只加载所需字段的文章列表查询
+
+    列字段通过 load_only 限定，未请求的关联不加载；
+    created_at 用于排序和生成游标，始终加载。作者只取列表展示用的列。
+    """
+    fields = set(fields)
+    columns = [getattr(Article, field) for field in ARTICLE_LIST_COLUMNS if field in fields]
+    # 数据库中已写回的浏览量，Redis 中没有计数时（如数据丢失后）作为兜底
+    if "view_count" in fields:
+        columns.append(Article.view_count)
+    options = [load_only(Article.id, Article.created_at, *columns)]
+    if "author" in fields:
+        options.append(joinedload(Article.author).load_only(User.id, User.username, User.full_name))
+    if "categories" in fields:
+        options.append(selectinload(Article.categories))
+    if "tags" in fields:
+        options.append(selectinload(Article.tags))
+    return select(Article).options(*options)
+
+async def get_article_by_id(db: AsyncSession, article_id: int, profile: str = "detail") -> Optional[Article]:
+    """
+    按ID获取文章并预加载关联数据
+
+    使用 populate_existing 确保会话中已有的实例也能按预加载配置重新填充。
+    """
+    result = await db.execute(
+        article_select(profile)
+        .where(Article.id == article_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
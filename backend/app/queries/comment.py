@@ -0,0 +1,196 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, case, func, and_, or_, false, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.article import Article
+from ..models.comment import Comment
+
+# articles.comment_count 统计的是公开显示的评论：已审核且不是垃圾评论
+def visible_comment_condition():
+    """公开显示的评论的查询条件"""
+    return and_(Comment.is_approved.is_(True), Comment.is_spam.isnot(True))
+
+def is_comment_visible(comment: Comment) -> bool:
+    """评论是否公开显示，与 visible_comment_condition 一致"""
+    return bool(comment.is_approved) and not comment.is_spam
+
+# 待审核评论：未通过审核且未标记为垃圾评论。
+# 使用等值比较而不是 IS FALSE，才能走 ix_comments_moderation_queue 索引
+def pending_comment_condition():
+    """待审核评论的查询条件"""
+    return and_(Comment.is_approved == false(), Comment.is_spam == false())
+
+def is_comment_pending(comment) -> bool:
+    """评论是否待审核，与 pending_comment_condition 一致"""
+    return comment.is_approved is False and comment.is_spam is False
+
+def moderation_queue_select(
+    size: int,
+    after: Optional[Tuple[datetime, int]] = None
+) -> Select:
+    """
+    审核队列：待审核评论按 (created_at, id) 从旧到新排列
+
+    after 为上一页最后一条评论的 (created_at, id)，多取一条用于判断是否还有下一页。
+    """
+    query = select(Comment).where(pending_comment_condition())
+    if after is not None:
+        created_at, comment_id = after
+        query = query.where(
+            or_(
+                Comment.created_at > created_at,
+                and_(Comment.created_at == created_at, Comment.id > comment_id)
+            )
+        )
+    return query.order_by(Comment.created_at, Comment.id).limit(size + 1)
+
+def approved_comments_select(article_id: int) -> Select:
+    """文章下全部已审核评论，按发表时间排序，一次查询取回整棵评论树"""
+    return (
+        select(Comment)
+        .where(Comment.article_id == article_id, visible_comment_condition())
+        .order_by(Comment.created_at, Comment.id)
+    )
+
+async def adjust_comment_count(db: AsyncSession, article_id: int, delta: int):
+    """
+    在当前事务中调整文章的评论数
+
+    由数据库原子累加，不读取旧值，并发增删评论不会丢失计数；调用方负责提交。
+    """
+    await adjust_comment_counts(db, {article_id: delta})
+
+async def adjust_comment_counts(db: AsyncSession, deltas: Dict[int, int], batch_size: int = 500):
+    """批量调整多篇文章的评论数，每批一条 UPDATE ... CASE；调用方负责提交"""
+    deltas = {article_id: delta for article_id, delta in deltas.items() if delta}
+    article_ids = sorted(deltas)
+    for start in range(0, len(article_ids), batch_size):
+        batch = {article_id: deltas[article_id] for article_id in article_ids[start:start + batch_size]}
+        await db.execute(
+            update(Article)
+            .where(Article.id.in_(list(batch)))
+            .values(
+                comment_count=func.coalesce(Article.comment_count, 0) + case(batch, value=Article.id, else_=0),
+                # 评论数不算内容更新，保持 updated_at 不变
+                updated_at=Article.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+# 审核操作及对应的评论状态
+COMMENT_MODERATION_ACTIONS = {
+    "approve": {"is_approved": True, "is_spam": False},
+    "spam": {"is_approved": False, "is_spam": True},
+}
+
+async def moderate_comments(
+    db: AsyncSession,
+    comment_ids: Iterable[int],
+    action: str
+) -> Tuple[List[int], List[int], int]:
+    """
+    批量审核评论，一条 UPDATE 更新全部评论，并在同一事务中调整评论数
+
+    先锁定并读取评论的原状态，按文章汇总公开评论数的变化；调用方负责提交。
+
+    Returns:
+        (存在的评论ID, 涉及的文章ID, 待审核评论数的变化)
+    """
+    values = COMMENT_MODERATION_ACTIONS[action]
+    comment_ids = sorted(set(comment_ids))
+    if not comment_ids:
+        return [], [], 0
+    rows = (await db.execute(
+        select(Comment.id, Comment.article_id, Comment.is_approved, Comment.is_spam)
+        .where(Comment.id.in_(comment_ids))
+        .with_for_update()
+    )).all()
+    if not rows:
+        return [], [], 0
+    found_ids = [row.id for row in rows]
+    await db.execute(
+        update(Comment)
+        .where(Comment.id.in_(found_ids))
+        .values(**values, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    visible_after = values["is_approved"] and not values["is_spam"]
+    deltas = Counter()
+    for row in rows:
+        visible_before = bool(row.is_approved) and not row.is_spam
+        deltas[row.article_id] += int(visible_after) - int(visible_before)
+    await adjust_comment_counts(db, deltas)
+    # 审核后评论都不再处于待审核状态
+    pending_delta = -sum(1 for row in rows if is_comment_pending(row))
+    return found_ids, sorted({row.article_id for row in rows}), pending_delta
+
+async def reconcile_comment_counts(
+    db: AsyncSession,
+    article_ids: Optional[Iterable[int]] = None,
+    batch_size: int = 500
+) -> Dict[int, int]:
+    """
+    按评论表重新统计文章评论数，只更新不一致的文章
+
+    一次分组查询统计全部（或指定）文章的评论数，与现有值比较后
+    按批次执行 UPDATE ... CASE；调用方负责提交。
+
+    Returns:
+        被修正的文章及其新的评论数
+    """
+    counts_query = (
+        select(Comment.article_id, func.count())
+        .where(visible_comment_condition())
+        .group_by(Comment.article_id)
+    )
+    current_query = select(Article.id, Article.comment_count)
+    if article_ids is not None:
+        article_ids = list(article_ids)
+        if not article_ids:
+            return {}
+        counts_query = counts_query.where(Comment.article_id.in_(article_ids))
+        current_query = current_query.where(Article.id.in_(article_ids))
+    counts = dict((await db.execute(counts_query)).all())
+    fixes = {
+        article_id: counts.get(article_id, 0)
+        for article_id, comment_count in (await db.execute(current_query)).all()
+        if comment_count != counts.get(article_id, 0)
+    }
+    fixed_ids = sorted(fixes)
+    for start in range(0, len(fixed_ids), batch_size):
+        batch = {article_id: fixes[article_id] for article_id in fixed_ids[start:start + batch_size]}
+        await db.execute(
+            update(Article)
+            .where(Article.id.in_(list(batch)))
+            .values(
+                comment_count=case(batch, value=Article.id, else_=Article.comment_count),
+                updated_at=Article.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+    return fixes
+
+def build_comment_tree(comments: Iterable[dict]) -> List[dict]:
+    """
+    由扁平的评论列表组装评论树，O(n)
+
+    comments 按发表时间升序，每条包含 id 和 parent_id。
+    先为每条评论建节点，再挂到父节点的 replies 下，回复的顺序与输入一致；
+    父评论不在列表中（未审核或已删除）的回复连同其子树一起隐藏。
+
+    Returns:
+        顶层评论（主题）列表，最新的主题在前
+    """
+    nodes: Dict[int, dict] = {}
+    for comment in comments:
+        nodes[comment["id"]] = {**comment, "replies": []}
+    threads = []
+    for node in nodes.values():
+        parent_id = node["parent_id"]
+        if parent_id is None:
+            threads.append(node)
+        elif parent_id in nodes:
+            nodes[parent_id]["replies"].append(node)
+    threads.reverse()
+    return threads
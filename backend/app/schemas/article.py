@@ -46,6 +46,9 @@ class ArticleResponse(ArticleInDB):
     tags: List[TagResponse] = []
     author: UserResponse
 
+class ArticleDetailResponse(ArticleResponse):
+    unique_visitors: int = 0  # 当日独立访客数
+
 class ArticleQuery(BaseModel):
     keyword: Optional[str] = None
     status: Optional[str] = None
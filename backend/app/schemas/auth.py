@@ -7,6 +7,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
 
 class UserLogin(BaseModel):
     username: str
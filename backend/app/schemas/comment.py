@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+from app.config import settings
 from datetime import datetime
 
 class CommentBase(BaseModel):
@@ -25,5 +26,13 @@ class CommentResponse(CommentBase):
     is_approved: bool = False
     is_spam: bool = False
     like_count: int = 0
+    is_liked: Optional[bool] = None  # 当前用户是否已点赞，未登录时为空
 
-    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
+
+class CommentTreeNode(CommentResponse):
+    replies: List["CommentTreeNode"] = []
+
+class CommentModerationRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=settings.COMMENT_MODERATION_MAX_IDS)
+    action: Literal["approve", "spam"]
@@ -0,0 +1 @@
+"""文章搜索模块"""
@@ -0,0 +1,63 @@
+import html
+from typing import List, Optional, Tuple
+from .tokenizer import tokenize
+
+HIGHLIGHT_OPEN = "<em>"
+HIGHLIGHT_CLOSE = "</em>"
+
+def _match_spans(text: str, terms: List[str]) -> List[Tuple[int, int]]:
+    """查找所有检索词在文本中的位置并合并重叠区间"""
+    lowered = text.lower()
+    spans = []
+    for term in set(terms):
+        start = lowered.find(term)
+        while start != -1:
+            spans.append((start, start + len(term)))
+            start = lowered.find(term, start + 1)
+    spans.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def highlight(text: Optional[str], query: str, max_length: Optional[int] = None) -> Optional[str]:
+    """
+    高亮文本中的检索词
+
+    文本先做 HTML 转义，再用 <em> 包裹命中部分。指定 max_length 时
+    截取以第一个命中位置为中心的片段。
+
+    Args:
+        text: 原始文本
+        query: 查询语句
+        max_length: 片段最大长度（不含高亮标签），None 表示不截取
+
+    Returns:
+        高亮后的文本
+    """
+    if not text:
+        return text
+    spans = _match_spans(text, tokenize(query))
+    
+    offset, end = 0, len(text)
+    if max_length is not None and len(text) > max_length:
+        first = spans[0][0] if spans else 0
+        offset = max(0, min(first - max_length // 4, len(text) - max_length))
+        end = offset + max_length
+    
+    parts = ["…"] if offset > 0 else []
+    cursor = offset
+    for start, stop in spans:
+        if stop <= offset or start >= end:
+            continue
+        start, stop = max(start, offset), min(stop, end)
+        parts.append(html.escape(text[cursor:start]))
+        parts.append(HIGHLIGHT_OPEN + html.escape(text[start:stop]) + HIGHLIGHT_CLOSE)
+        cursor = stop
+    parts.append(html.escape(text[cursor:end]))
+    if end < len(text):
+        parts.append("…")
+    return "".join(parts)
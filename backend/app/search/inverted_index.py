@@ -0,0 +1,116 @@
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from .tokenizer import tokenize
+
+# 字段权重：标题命中比正文命中更相关
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "summary": 2.0,
+    "content": 1.0,
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+class InvertedIndex:
+    """
+    进程内倒排索引
+
+    每个文档按字段分词并加权累计词频，查询时用 BM25 计算相关度。
+    查询词之间为“或”关系，命中词越多、越稀有，得分越高。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._doc_lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_lengths
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0.0
+
+    def add(self, doc_id: int, fields: Dict[str, str]):
+        """添加或替换文档"""
+        frequencies: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field) or ""):
+                frequencies[token] += weight
+        self.add_terms(doc_id, frequencies)
+
+    def add_terms(self, doc_id: int, frequencies: Dict[str, float]):
+        """按已加权的词频添加或替换文档，用于从快照恢复"""
+        with self._lock:
+            self._remove_locked(doc_id)
+            for token, frequency in frequencies.items():
+                self._postings[token][doc_id] = frequency
+            length = sum(frequencies.values())
+            self._doc_terms[doc_id] = tuple(frequencies)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def doc_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._doc_lengths)
+
+    def export(self) -> Dict[int, Dict[str, float]]:
+        """导出每个文档的加权词频，用于写入快照"""
+        with self._lock:
+            return {
+                doc_id: {token: self._postings[token][doc_id] for token in terms}
+                for doc_id, terms in self._doc_terms.items()
+            }
+
+    def remove(self, doc_id: int):
+        """删除文档"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """
+        检索文档
+
+        Returns:
+            按相关度从高到低排列的 (文档ID, 得分) 列表
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not terms or not doc_count:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
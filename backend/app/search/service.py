@@ -0,0 +1,220 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import select, func, desc
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..dependencies.async_redis import get_search_index_generation, bump_search_index_generation
+from ..models.article import Article
+from .inverted_index import InvertedIndex
+from .snapshot import load_snapshot, save_snapshot
+
+# 没有 MySQL FULLTEXT 时使用的进程内索引
+search_index = InvertedIndex()
+
+logger = logging.getLogger(__name__)
+
+# 补齐变更时向前多取的时间，容忍各 worker 之间的时钟偏差
+CATCH_UP_MARGIN = timedelta(minutes=5)
+
+class _IndexState:
+    """
+    进程内索引状态
+
+    ready 表示索引已从文章表构建完成，之后由文章写操作增量维护；
+    watermark 为已索引文章的最大更新时间，重启时只需补齐之后的变更。
+
+    每个 worker 各自持有一份索引，文章写操作只直接更新处理该请求的 worker。
+    写操作同时递增 Redis 中的索引版本号，其他 worker 检索前发现版本号变化时
+    从文章表补齐变更；generation 为本进程索引已同步到的版本号。
+    """
+    ready = False
+    watermark: Optional[datetime] = None
+    generation: Optional[int] = None
+
+def reset_index():
+    """清空进程内索引，下次检索时重新构建"""
+    search_index.clear()
+    _IndexState.ready = False
+    _IndexState.watermark = None
+    _IndexState.generation = None
+
+def use_fulltext(db: AsyncSession) -> bool:
+    """根据配置和数据库类型选择检索方式"""
+    if settings.SEARCH_BACKEND == "fulltext":
+        return True
+    if settings.SEARCH_BACKEND == "memory":
+        return False
+    return db.bind.dialect.name == "mysql"
+
+def _advance_watermark(updated_at: Optional[datetime]):
+    if updated_at and (_IndexState.watermark is None or updated_at > _IndexState.watermark):
+        _IndexState.watermark = updated_at
+
+def _index_rows(rows):
+    for row in rows:
+        search_index.add(row.id, {"title": row.title, "summary": row.summary, "content": row.content})
+        _advance_watermark(row.updated_at)
+
+def _indexed_columns():
+    return select(Article.id, Article.title, Article.summary, Article.content, Article.updated_at)
+
+async def _current_generation() -> Optional[int]:
+    try:
+        return await get_search_index_generation()
+    except Exception as e:
+        logger.warning(f"读取搜索索引版本号失败: {e}")
+        return None
+
+async def _catch_up(db: AsyncSession):
+    """补齐 watermark 之后新增或更新的文章，并移除已删除的文章"""
+    query = _indexed_columns()
+    if _IndexState.watermark is not None:
+        query = query.where(Article.updated_at >= _IndexState.watermark - CATCH_UP_MARGIN)
+    _index_rows((await db.execute(query)).all())
+    
+    existing_ids = set((await db.execute(select(Article.id))).scalars().all())
+    for doc_id in set(search_index.doc_ids()) - existing_ids:
+        search_index.remove(doc_id)
+
+async def rebuild_index(db: AsyncSession):
+    """从文章表完整重建进程内索引"""
+    # 先读版本号再读文章，构建期间发生的写操作会在下次检索时补齐
+    _IndexState.generation = await _current_generation()
+    rows = (await db.execute(_indexed_columns())).all()
+    search_index.clear()
+    _IndexState.watermark = None
+    _index_rows(rows)
+    _IndexState.ready = True
+    logger.info(f"Search index rebuilt with {len(search_index)} articles")
+
+async def load_index(db: AsyncSession, path: Optional[str] = None):
+    """
+    加载进程内索引
+
+    有可用快照时先恢复快照，再补齐快照之后更新的文章并移除已删除的文章；
+    否则从文章表完整构建。
+    """
+    path = path or settings.SEARCH_INDEX_SNAPSHOT
+    snapshot = load_snapshot(path) if path else None
+    if snapshot is None:
+        await rebuild_index(db)
+        return
+    
+    docs, watermark = snapshot
+    _IndexState.generation = await _current_generation()
+    search_index.clear()
+    for doc_id, frequencies in docs.items():
+        search_index.add_terms(doc_id, frequencies)
+    _IndexState.watermark = watermark
+    # 快照保存后新增、更新和删除的文章
+    await _catch_up(db)
+    _IndexState.ready = True
+    logger.info(f"Search index loaded from snapshot with {len(search_index)} articles")
+
+def save_index(path: Optional[str] = None):
+    """将进程内索引写入快照，未配置快照路径或索引未构建时跳过"""
+    path = path or settings.SEARCH_INDEX_SNAPSHOT
+    if not path or not _IndexState.ready:
+        return
+    save_snapshot(search_index, path, _IndexState.watermark)
+    logger.info(f"Search index snapshot saved to {path}")
+
+async def _publish_change():
+    """递增索引版本号，通知其他 worker 补齐变更"""
+    try:
+        generation = await bump_search_index_generation()
+    except Exception as e:
+        logger.warning(f"更新搜索索引版本号失败: {e}")
+        return
+    # 期间没有其他 worker 的写操作时，本进程已是最新，无需补齐
+    if _IndexState.generation is not None and generation == _IndexState.generation + 1:
+        _IndexState.generation = generation
+
+async def sync_index(db: AsyncSession):
+    """索引版本号变化时从文章表补齐其他 worker 写入的变更"""
+    generation = await _current_generation()
+    if generation is None or generation == _IndexState.generation:
+        return
+    await _catch_up(db)
+    _IndexState.generation = generation
+
+async def index_article(article: Article):
+    """文章创建或更新后增量更新索引；索引尚未构建时由首次检索统一构建"""
+    if _IndexState.ready:
+        search_index.add(article.id, {"title": article.title, "summary": article.summary, "content": article.content})
+        _advance_watermark(article.updated_at)
+    await _publish_change()
+
+async def unindex_article(article_id: int):
+    """文章删除后从索引中移除"""
+    search_index.remove(article_id)
+    await _publish_change()
+
+async def init_search_index():
+    """应用启动时加载进程内索引，使用 FULLTEXT 时跳过"""
+    async with AsyncSessionLocal() as db:
+        if not use_fulltext(db):
+            await load_index(db)
+
+async def _search_fulltext(
+    db: AsyncSession,
+    query: str,
+    conditions: list,
+    offset: int,
+    limit: int
+) -> Tuple[List[Tuple[int, float]], int]:
+    # 使用 ngram 解析器的 FULLTEXT 索引，自然语言模式返回相关度
+    relevance = match(Article.title, Article.summary, Article.content, against=query).in_natural_language_mode()
+    conditions = [relevance, *conditions]
+    total = await db.scalar(select(func.count(Article.id)).where(*conditions))
+    rows = (await db.execute(
+        select(Article.id, relevance.label("score"))
+        .where(*conditions)
+        .order_by(desc("score"), Article.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )).all()
+    return [(row.id, float(row.score)) for row in rows], total
+
+async def _search_memory(
+    db: AsyncSession,
+    query: str,
+    conditions: list,
+    offset: int,
+    limit: int
+) -> Tuple[List[Tuple[int, float]], int]:
+    if not _IndexState.ready:
+        await load_index(db)
+    else:
+        await sync_index(db)
+    ranked = search_index.search(query)
+    if ranked and conditions:
+        # 其他过滤条件交给数据库判断
+        matched_ids = set((await db.execute(
+            select(Article.id).where(Article.id.in_([doc_id for doc_id, _ in ranked]), *conditions)
+        )).scalars().all())
+        ranked = [item for item in ranked if item[0] in matched_ids]
+    return ranked[offset:offset + limit], len(ranked)
+
+async def search_articles(
+    db: AsyncSession,
+    query: str,
+    offset: int,
+    limit: int,
+    status: Optional[str] = None
+) -> Tuple[List[Tuple[int, float]], int]:
+    """
+    检索文章
+
+    Returns:
+        (按相关度排序的当前页 (文章ID, 得分) 列表, 命中总数)
+    """
+    conditions = []
+    if status:
+        conditions.append(Article.status == status)
+    if use_fulltext(db):
+        return await _search_fulltext(db, query, conditions, offset, limit)
+    return await _search_memory(db, query, conditions, offset, limit)
@@ -0,0 +1,72 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from .inverted_index import FIELD_WEIGHTS, InvertedIndex
+
+logger = logging.getLogger(__name__)
+
+# 分词或字段权重变化后需要提升版本号，旧快照将被丢弃
+SNAPSHOT_VERSION = 1
+
+def save_snapshot(index: InvertedIndex, path: str, watermark: Optional[datetime]):
+    """
+    将索引写入 gzip 压缩的 JSON 快照
+
+    先写临时文件再原子替换，避免进程中断时留下不完整的快照。临时文件名唯一，
+    多个 worker 同时关闭时不会互相覆盖，最后完成替换的快照生效。
+    """
+    docs = {
+        str(doc_id): [[token, int(frequency) if float(frequency).is_integer() else frequency]
+                      for token, frequency in frequencies.items()]
+        for doc_id, frequencies in index.export().items()
+    }
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "weights": FIELD_WEIGHTS,
+        "watermark": watermark.isoformat() if watermark else None,
+        "docs": docs,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=directory or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False
+    ) as tmp:
+        tmp_path = tmp.name
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+def load_snapshot(path: str) -> Optional[Tuple[Dict[int, Dict[str, float]], Optional[datetime]]]:
+    """
+    读取快照
+
+    Returns:
+        (文档词频, 快照覆盖到的最大更新时间)；文件不存在、损坏或版本不符时返回 None
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        # 截断的 gzip 文件抛出 EOFError，结构不符时抛出 KeyError、TypeError 等，均视为损坏
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SNAPSHOT_VERSION or data.get("weights") != FIELD_WEIGHTS:
+            return None
+        watermark = datetime.fromisoformat(data["watermark"]) if data.get("watermark") else None
+        docs = {
+            int(doc_id): {str(token): float(frequency) for token, frequency in terms}
+            for doc_id, terms in data["docs"].items()
+        }
+    except (OSError, EOFError, ValueError, KeyError, TypeError, AttributeError):
+        logger.warning(f"搜索索引快照 {path} 已损坏，将从文章表重建")
+        return None
+    return docs, watermark
@@ -0,0 +1,36 @@
+import re
+from typing import List
+
+# 拉丁字母数字按词切分；中日韩文字按连续片段切分后再生成二元组，
+# 与 MySQL ngram 解析器的默认 ngram_token_size=2 保持一致
+_TOKEN_RE = re.compile(
+    r"[a-z0-9]+"
+    r"|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+
+def _is_cjk(char: str) -> bool:
+    return not char.isascii()
+
+def tokenize(text: str) -> List[str]:
+    """
+    将文本切分为检索词
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        小写的英文单词和中日韩二元组，按出现顺序排列（可重复）
+    """
+    if not text:
+        return []
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        segment = match.group()
+        if _is_cjk(segment[0]):
+            if len(segment) == 1:
+                tokens.append(segment)
+            else:
+                tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            tokens.append(segment)
+    return tokens
@@ -0,0 +1 @@
+"""评论垃圾检测模块"""
@@ -0,0 +1,38 @@
+import hashlib
+import re
+import zlib
+from typing import Optional
+
+# 归一化时去掉空白、标点和下划线，只保留文字和数字
+_NOISE_RE = re.compile(r"[\W_]+")
+
+# 字符级 shingle 长度，按字符切分对中文同样有效
+SHINGLE_SIZE = 5
+# 归一化后短于该长度的内容（如“谢谢分享”）不计算指纹，不参与重复检测
+MIN_FINGERPRINT_LENGTH = 12
+# 取最小的若干个 shingle 哈希作为指纹（bottom-k），
+# 少量增删字符时最小哈希大多不变，近似重复的内容得到相同指纹
+FINGERPRINT_HASHES = 4
+
+def content_fingerprint(text: str) -> Optional[str]:
+    """
+    计算评论内容的近似重复指纹
+
+    Args:
+        text: 评论内容
+
+    Returns:
+        16 位十六进制指纹，内容归一化后过短时返回 None
+    """
+    normalized = _NOISE_RE.sub("", text.lower()) if text else ""
+    if len(normalized) < MIN_FINGERPRINT_LENGTH:
+        return None
+    hashes = {
+        zlib.crc32(normalized[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+    bottom = sorted(hashes)[:FINGERPRINT_HASHES]
+    digest = hashlib.blake2b(
+        b"".join(value.to_bytes(4, "big") for value in bottom), digest_size=8
+    )
+    return digest.hexdigest()
@@ -0,0 +1,94 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 链接：带协议的 URL 和常见的裸域名
+_LINK_RE = re.compile(
+    r"(?:https?://|www\.)\S+|\b[a-z0-9-]+\.(?:com|net|org|info|top|xyz|cn|ru|io|biz)\b",
+    re.IGNORECASE
+)
+
+# 常见垃圾广告关键词，合并为一个正则，一次扫描完成。
+# 英文关键词按整词匹配（crypto 不匹配 cryptography），中文没有词边界，按子串匹配
+SPAM_KEYWORDS = (
+    "viagra", "casino", "porn", "loan", "crypto", "bitcoin", "free money", "click here",
+    "buy now", "seo service",
+)
+SPAM_KEYWORDS_CJK = ("加微信", "加qq", "代开发票", "博彩", "赌场", "贷款", "刷单", "兼职日结", "色情", "彩票")
+_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in SPAM_KEYWORDS) + r")\b|"
+    + "|".join(re.escape(keyword) for keyword in SPAM_KEYWORDS_CJK),
+    re.IGNORECASE
+)
+# 关键词在正常的技术讨论中也会出现，单独命中不足以判定为垃圾评论，需要叠加其他信号
+KEYWORD_SCORE = 0.3
+KEYWORD_MAX_SCORE = 0.6
+
+# 同一字符连续重复
+_REPEAT_RE = re.compile(r"(.)\1{9,}")
+
+
+class SpamContext:
+    """
+    一条待评分的评论
+
+    signals 为 Redis 中的统计信号：ip_rate、user_rate（当前时间窗口内的评论数，含本条）
+    和 duplicates（同一用户相同指纹在窗口内出现的次数，含本条），Redis 不可用时为空。
+    """
+
+    def __init__(self, content: str, signals: Optional[Dict[str, int]] = None, limits: Optional[Dict[str, int]] = None):
+        self.content = content or ""
+        self.signals = signals or {}
+        self.limits = limits or {}
+
+
+# 规则返回 (分值, 原因)，不命中时返回 None；分值累加后与阈值比较
+SpamRule = Callable[[SpamContext], Optional[Tuple[float, str]]]
+
+def link_rule(context: SpamContext) -> Optional[Tuple[float, str]]:
+    links = len(_LINK_RE.findall(context.content))
+    if links >= 2:
+        return min(0.3 * links, 0.9), f"links:{links}"
+    return None
+
+def keyword_rule(context: SpamContext) -> Optional[Tuple[float, str]]:
+    hits = len(_KEYWORD_RE.findall(context.content))
+    if hits:
+        return min(KEYWORD_SCORE * hits, KEYWORD_MAX_SCORE), f"keywords:{hits}"
+    return None
+
+def repeat_rule(context: SpamContext) -> Optional[Tuple[float, str]]:
+    if _REPEAT_RE.search(context.content):
+        return 0.4, "repeated_chars"
+    return None
+
+def rate_rule(context: SpamContext) -> Optional[Tuple[float, str]]:
+    for signal in ("ip_rate", "user_rate"):
+        limit = context.limits.get(signal)
+        if limit and context.signals.get(signal, 0) > limit:
+            return 1.0, signal
+    return None
+
+def duplicate_rule(context: SpamContext) -> Optional[Tuple[float, str]]:
+    limit = context.limits.get("duplicates")
+    duplicates = context.signals.get("duplicates", 0)
+    if limit and duplicates > limit:
+        return 1.0, f"duplicates:{duplicates}"
+    return None
+
+# 评分规则，按顺序执行；可用 register_rule 追加自定义规则
+SPAM_RULES: List[SpamRule] = [link_rule, keyword_rule, repeat_rule, rate_rule, duplicate_rule]
+
+def register_rule(rule: SpamRule):
+    """追加评分规则"""
+    SPAM_RULES.append(rule)
+
+def evaluate(context: SpamContext) -> Tuple[float, List[str]]:
+    """执行全部规则，返回 (总分, 命中原因)"""
+    score = 0.0
+    reasons = []
+    for rule in SPAM_RULES:
+        hit = rule(context)
+        if hit:
+            score += hit[0]
+            reasons.append(hit[1])
+    return score, reasons
@@ -0,0 +1,44 @@
+import logging
+from typing import List, Optional
+from app.config import settings
+from app.dependencies.async_redis import record_comment_signals
+from app.spam.fingerprint import content_fingerprint
+from app.spam.rules import SpamContext, evaluate
+
+logger = logging.getLogger(__name__)
+
+
+class SpamVerdict:
+    """评分结果"""
+
+    def __init__(self, score: float, reasons: List[str]):
+        self.score = score
+        self.reasons = reasons
+
+    @property
+    def is_spam(self) -> bool:
+        return self.score >= settings.SPAM_SCORE_THRESHOLD
+
+
+async def score_comment(content: str, ip: Optional[str] = None, user_id: Optional[int] = None) -> SpamVerdict:
+    """
+    为新评论打分
+
+    正则规则在进程内执行；频率和重复内容信号通过一次 Redis 调用获取，
+    Redis 不可用时跳过这两类信号，只按内容规则评分。
+    """
+    try:
+        signals = await record_comment_signals(
+            ip, user_id, content_fingerprint(content),
+            settings.SPAM_RATE_WINDOW, settings.SPAM_DUPLICATE_WINDOW
+        )
+    except Exception as e:
+        logger.warning(f"获取反垃圾信号失败，仅按内容评分: {e}")
+        signals = {}
+    context = SpamContext(content, signals, {
+        "ip_rate": settings.SPAM_MAX_COMMENTS_PER_IP,
+        "user_rate": settings.SPAM_MAX_COMMENTS_PER_USER,
+        "duplicates": settings.SPAM_DUPLICATE_LIMIT,
+    })
+    score, reasons = evaluate(context)
+    return SpamVerdict(score, reasons)
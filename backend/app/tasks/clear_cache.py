@@ -0,0 +1,27 @@
+"""
+按模式批量删除 Redis 键的维护命令
+
+使用 SCAN + UNLINK 分批删除，可以在生产环境的大键空间上执行，删除过程中输出进度：
+
+    python -m app.tasks.clear_cache "article_likes:*" [--batch-size 1000]
+"""
+import argparse
+import time
+from ..dependencies.redis import delete_keys_by_pattern, SCAN_BATCH_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description="按模式批量删除 Redis 键")
+    parser.add_argument("pattern", help="键模式，如 article_likes:*")
+    parser.add_argument("--batch-size", type=int, default=SCAN_BATCH_SIZE, help="每批删除的键数")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+
+    def report(deleted: int):
+        print(f"已删除 {deleted} 个键，耗时 {time.monotonic() - start:.1f}s", flush=True)
+
+    deleted = delete_keys_by_pattern(args.pattern, batch_size=args.batch_size, on_progress=report)
+    print(f"完成：共删除 {deleted} 个匹配 {args.pattern} 的键")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+评论数校对命令
+
+articles.comment_count 在评论增删和审核时随事务增减。本命令用一次分组查询
+重新统计全部文章的评论数，修正不一致的值（如历史数据或手工改库之后）：
+
+    python -m app.tasks.comment_counts
+"""
+import asyncio
+import logging
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..queries.comment import reconcile_comment_counts
+from ..dependencies.async_redis import init_redis_pool, close_redis_pool, delete_article_cache
+
+logger = logging.getLogger(__name__)
+
+async def main():
+    """独立进程入口"""
+    await init_redis_pool()
+    try:
+        async with AsyncSessionLocal() as db:
+            fixes = await reconcile_comment_counts(db)
+            await db.commit()
+        # 文章详情缓存中带有评论数
+        for article_id in fixes:
+            await delete_article_cache(article_id)
+        logger.info(f"Reconciled comment counts for {len(fixes)} articles")
+    finally:
+        await close_redis_pool()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL), format=settings.LOG_FORMAT)
+    asyncio.run(main())
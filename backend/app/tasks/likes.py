@@ -0,0 +1,183 @@
+"""
+点赞同步任务
+
+点赞状态以 Redis 集合为准，切换时同时记录变更；本任务定期把变更批量写入
+article_likes / comment_likes 表，并更新 articles.like_count。
+Redis 数据丢失后（恢复标记随之消失）从数据库重建点赞集合。
+可以随应用生命周期运行，也可以作为独立进程运行：
+
+    python -m app.tasks.likes            # 循环同步
+    python -m app.tasks.likes --restore  # 立即从数据库恢复点赞集合
+"""
+import asyncio
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import select, update, delete, insert, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models.article import Article
+from ..models.comment import Comment
+from ..models.user import User
+from ..models.like import article_likes, comment_likes
+from ..dependencies.async_redis import (
+    init_redis_pool,
+    close_redis_pool,
+    acquire_lock,
+    release_lock,
+    take_like_changes,
+    ack_like_changes,
+    likes_restored,
+    restore_like_sets,
+    mark_likes_restored
+)
+
+logger = logging.getLogger(__name__)
+
+# 同步锁，多个 worker 同时运行时只有一个生效；恢复点赞集合时也持有此锁
+LIKE_SYNC_LOCK = "like_sync_lock"
+
+# kind -> (点赞表, 目标ID列, 目标表主键)
+_LIKE_TABLES = {
+    "article": (article_likes, article_likes.c.article_id, Article.id),
+    "comment": (comment_likes, comment_likes.c.comment_id, Comment.id)
+}
+
+def _batches(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def _existing_ids(db: AsyncSession, column, ids: set) -> set:
+    return set((await db.scalars(select(column).where(column.in_(ids)))).all())
+
+async def _apply_like_changes(db: AsyncSession, kind: str, changes: Dict[Tuple[int, int], bool]):
+    """按批次写入一类点赞变更，每批一条 DELETE 和一条 INSERT"""
+    table, target_column, target_pk = _LIKE_TABLES[kind]
+    now = datetime.utcnow()
+    for batch in _batches(sorted(changes), settings.LIKE_SYNC_BATCH_SIZE):
+        # 先删除再插入仍为点赞状态的记录，同一批变更重复写回结果不变
+        await db.execute(delete(table).where(tuple_(target_column, table.c.user_id).in_(batch)))
+        liked = [pair for pair in batch if changes[pair]]
+        if not liked:
+            continue
+        # 跳过已删除的文章、评论和用户，避免外键错误导致整批无法写回
+        target_ids = await _existing_ids(db, target_pk, {target_id for target_id, _ in liked})
+        user_ids = await _existing_ids(db, User.id, {user_id for _, user_id in liked})
+        rows = [
+            {target_column.key: target_id, "user_id": user_id, "created_at": now}
+            for target_id, user_id in liked
+            if target_id in target_ids and user_id in user_ids
+        ]
+        if rows:
+            await db.execute(insert(table), rows)
+
+async def _update_article_like_counts(db: AsyncSession, article_ids: Iterable[int]):
+    """按点赞表重新统计 articles.like_count"""
+    like_count = (
+        select(func.count())
+        .select_from(article_likes)
+        .where(article_likes.c.article_id == Article.id)
+        .scalar_subquery()
+    )
+    for batch in _batches(sorted(article_ids), settings.LIKE_SYNC_BATCH_SIZE):
+        await db.execute(
+            update(Article)
+            .where(Article.id.in_(batch))
+            # 点赞不算内容更新，保持 updated_at 不变
+            .values(like_count=like_count, updated_at=Article.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+async def _sync_pending(db: AsyncSession) -> int:
+    """写回待同步的变更，调用方需持有同步锁"""
+    changes = await take_like_changes()
+    if not changes:
+        return 0
+    by_kind = defaultdict(dict)
+    for (kind, target_id, user_id), liked in changes.items():
+        by_kind[kind][(target_id, user_id)] = liked
+    for kind, kind_changes in by_kind.items():
+        await _apply_like_changes(db, kind, kind_changes)
+    await _update_article_like_counts(db, {article_id for article_id, _ in by_kind["article"]})
+    await db.commit()
+    # 写入失败时不确认，变更保留到下次同步
+    await ack_like_changes()
+    return len(changes)
+
+async def sync_likes(db: AsyncSession) -> int:
+    """
+    将 Redis 中的点赞变更写回数据库
+
+    Returns:
+        写回的变更数，其他进程正在同步时返回 0
+    """
+    token = await acquire_lock(LIKE_SYNC_LOCK, settings.LIKE_SYNC_LOCK_TTL)
+    if not token:
+        return 0
+    try:
+        synced = await _sync_pending(db)
+        if synced:
+            logger.info(f"Synced {synced} like changes")
+        return synced
+    finally:
+        await release_lock(LIKE_SYNC_LOCK, token)
+
+async def restore_likes(db: AsyncSession, force: bool = False) -> int:
+    """
+    从数据库恢复 Redis 中的点赞集合
+
+    已恢复过（标记仍在）时跳过，force 为 True 时总是恢复。
+    恢复前先写回待同步的变更，避免把已取消的点赞加回来。
+
+    Returns:
+        恢复的点赞记录数
+    """
+    if not force and await likes_restored():
+        return 0
+    token = await acquire_lock(LIKE_SYNC_LOCK, settings.LIKE_SYNC_LOCK_TTL)
+    if not token:
+        return 0
+    try:
+        await _sync_pending(db)
+        restored = 0
+        for kind, (table, target_column, _) in _LIKE_TABLES.items():
+            result = await db.stream(select(target_column, table.c.user_id))
+            async for rows in result.partitions(settings.LIKE_SYNC_BATCH_SIZE):
+                likes = defaultdict(list)
+                for target_id, user_id in rows:
+                    likes[target_id].append(user_id)
+                await restore_like_sets(kind, likes)
+                restored += len(rows)
+        await mark_likes_restored()
+        logger.info(f"Restored {restored} likes from database")
+        return restored
+    finally:
+        await release_lock(LIKE_SYNC_LOCK, token)
+
+async def run_like_sync(interval: float):
+    """按固定间隔循环同步，直到任务被取消"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await sync_likes(db)
+        except Exception as e:
+            logger.error(f"点赞同步失败：{str(e)}", exc_info=True)
+
+async def main(restore: bool = False):
+    """独立进程入口"""
+    await init_redis_pool()
+    try:
+        async with AsyncSessionLocal() as db:
+            await restore_likes(db, force=restore)
+        if not restore:
+            await run_like_sync(settings.LIKE_SYNC_INTERVAL or 60)
+    finally:
+        await close_redis_pool()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL), format=settings.LOG_FORMAT)
+    asyncio.run(main(restore="--restore" in sys.argv[1:]))
@@ -0,0 +1,96 @@
+"""
+浏览量写回任务
+
+浏览时只在 Redis 中累加，本任务定期把增量批量写回 articles.view_count。
+可以随应用生命周期运行，也可以作为独立进程运行：
+
+    python -m app.tasks.view_counts
+"""
+import asyncio
+import logging
+from typing import Dict
+from sqlalchemy import update, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models.article import Article
+from ..dependencies.async_redis import (
+    init_redis_pool,
+    close_redis_pool,
+    acquire_lock,
+    release_lock,
+    take_view_count_deltas,
+    ack_view_count_deltas
+)
+
+logger = logging.getLogger(__name__)
+
+# 写回锁，多个 worker 同时运行写回任务时只有一个生效
+VIEW_COUNT_FLUSH_LOCK = "view_count_flush_lock"
+
+async def _apply_deltas(db: AsyncSession, deltas: Dict[int, int]):
+    """按批次执行 UPDATE ... CASE，每批一条语句"""
+    article_ids = sorted(deltas)
+    batch_size = settings.VIEW_COUNT_FLUSH_BATCH_SIZE
+    for start in range(0, len(article_ids), batch_size):
+        batch = {article_id: deltas[article_id] for article_id in article_ids[start:start + batch_size]}
+        await db.execute(
+            update(Article)
+            .where(Article.id.in_(list(batch)))
+            .values(
+                view_count=func.coalesce(Article.view_count, 0) + case(batch, value=Article.id, else_=0),
+                # 浏览量不算内容更新，保持 updated_at 不变
+                updated_at=Article.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+
+async def flush_view_counts(db: AsyncSession) -> int:
+    """
+    将 Redis 中的浏览量增量写回数据库
+
+    写回语义为“至少一次”：增量在数据库提交之后才确认。提交失败时增量保留，
+    下次写回重试；但若提交成功后、确认之前进程崩溃或 Redis 不可用，
+    同一批增量会在下次写回时再次累加，浏览量可能因此偏多。
+    浏览量只是统计数据，这里接受少量重复计数，不为每批记录写回标识。
+
+    Returns:
+        写回的文章数，其他进程正在写回时返回 0
+    """
+    token = await acquire_lock(VIEW_COUNT_FLUSH_LOCK, settings.VIEW_COUNT_FLUSH_LOCK_TTL)
+    if not token:
+        return 0
+    try:
+        deltas = await take_view_count_deltas()
+        if not deltas:
+            return 0
+        # 提交成功后才确认；提交失败时增量保留到下次写回
+        await _apply_deltas(db, deltas)
+        await ack_view_count_deltas()
+        logger.info(f"Flushed view counts for {len(deltas)} articles")
+        return len(deltas)
+    finally:
+        await release_lock(VIEW_COUNT_FLUSH_LOCK, token)
+
+async def run_view_count_flusher(interval: float):
+    """按固定间隔循环写回，直到任务被取消"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await flush_view_counts(db)
+        except Exception as e:
+            logger.error(f"浏览量写回失败：{str(e)}", exc_info=True)
+
+async def main():
+    """独立进程入口"""
+    await init_redis_pool()
+    try:
+        await run_view_count_flusher(settings.VIEW_COUNT_FLUSH_INTERVAL or 60)
+    finally:
+        await close_redis_pool()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL), format=settings.LOG_FORMAT)
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """游标格式无效"""
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """
+    将 (created_at, id) 编码为不透明的分页游标
+
+    Args:
+        created_at: 当前页最后一条记录的创建时间
+        item_id: 当前页最后一条记录的ID
+
+    Returns:
+        URL 安全的 base64 字符串
+    """
+    payload = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    解析分页游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+
+    Returns:
+        (created_at, id) 元组
+
+    Raises:
+        InvalidCursorError: 游标无法解析时
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}") from e
+
+
+def next_cursor_for(items: list, size: int) -> Optional[str]:
+    """
+    根据多取一条的结果计算下一页游标
+
+    调用方应查询 size + 1 条记录；若结果超过 size 条说明还有下一页，
+    此时返回第 size 条记录对应的游标，否则返回 None。
+    """
+    if len(items) <= size:
+        return None
+    last = items[size - 1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,114 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool, AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """
+    连接池统计信息
+
+    记录连接签出/归还次数、新建连接数以及获取连接的等待时间，
+    用于按 worker 调整连接池大小。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_count = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_wait(self, elapsed: float, timed_out: bool = False):
+        """记录一次获取连接的耗时（包括排队等待和溢出时新建连接）"""
+        with self._lock:
+            self.wait_count += 1
+            self.total_wait += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+    def increment(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self, pool: Pool) -> dict:
+        """返回计数器和连接池当前状态"""
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "avg_wait_ms": round(self.total_wait / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+        # 只有队列连接池提供容量信息，SQLite 等使用的连接池没有这些方法
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            })
+        return data
+
+
+class _WaitTimingMixin:
+    """在获取连接时记录耗时，统计对象由子类的类属性提供"""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """记录等待时间的同步连接池"""
+
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """记录等待时间的异步连接池"""
+
+    stats = PoolStats()
+
+
+def attach_pool_events(engine: Engine, stats: PoolStats):
+    """为引擎注册连接池事件，统计签出、归还、新建和失效次数"""
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.increment("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.increment("checkins")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.increment("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.increment("invalidations")
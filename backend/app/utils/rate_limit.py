@@ -0,0 +1,58 @@
+import math
+from typing import Tuple
+from app.utils.ttl_cache import TTLCache
+
+
+def window_position(now: float, window: int) -> Tuple[int, float]:
+    """
+    计算当前所在的时间窗口
+
+    Returns:
+        (窗口编号, 上一窗口计数的权重)，权重为当前窗口剩余时间占比
+    """
+    window_id = int(now // window)
+    elapsed = now - window_id * window
+    return window_id, (window - elapsed) / window
+
+
+def retry_after(previous: int, current: int, limit: int, window: int, previous_weight: float) -> int:
+    """
+    估算被拒绝的请求需要等待多少秒才会放行
+
+    上一窗口计数随时间线性衰减；若当前窗口已满，则需等到下一窗口，
+    届时当前窗口的计数成为新的上一窗口计数。
+    """
+    elapsed = window * (1 - previous_weight)
+    if current + 1 <= limit and previous > 0:
+        # previous * (window - t) / window + current + 1 <= limit
+        wait = window * (1 - (limit - 1 - current) / previous) - elapsed
+    else:
+        wait = window - elapsed
+        if current > 0:
+            wait += max(window * (1 - (limit - 1) / current), 0)
+    return max(1, math.ceil(wait))
+
+
+class LocalRateLimiter:
+    """
+    进程内滑动窗口计数，Redis 不可用时使用
+
+    只统计本进程收到的请求，多进程部署时实际上限会放大，仅作为降级保护。
+    计数保存在 LRU 缓存中，条目数有上限。
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._counts = TTLCache(maxsize=maxsize)
+
+    def hit(self, bucket: str, limit: int, window: int, window_id: int, previous_weight: float) -> Tuple[bool, int, int]:
+        """与 Redis 版本语义相同，返回 (是否放行, 上一窗口计数, 当前窗口计数)"""
+        current = self._counts.get((bucket, window_id), 0)
+        previous = self._counts.get((bucket, window_id - 1), 0)
+        if previous * previous_weight + current + 1 > limit:
+            return False, previous, current
+        current += 1
+        self._counts.set((bucket, window_id), current, ttl=window * 2)
+        return True, previous, current
+
+    def clear(self):
+        self._counts.clear()
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.main import app
+from app.models.user import User
+from app.database import get_db
+from app.api.auth import create_access_token, get_password_hash
+from datetime import datetime
+from .test_config import override_get_db, init_test_db, cleanup_test_db
+
+# 替换应用程序的数据库依赖
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """设置测试数据库"""
+    init_test_db()
+    yield
+    cleanup_test_db()
+
+@pytest.fixture
+def test_db():
+    """创建测试数据库会话"""
+    db = next(override_get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+def create_test_user(username: str, role: str, test_db: Session) -> User:
+    """创建测试用户的辅助函数"""
+    db_user = User(
+        username=username,
+        email=f"{username}@example.com",
+        full_name=username,
+        department="IT",
+        role=role,
+        hashed_password=get_password_hash("password123"),
+        created_at=datetime.utcnow()
+    )
+    test_db.add(db_user)
+    test_db.commit()
+    test_db.refresh(db_user)
+    return db_user
+
+def test_db_pool_stats(test_db: Session):
+    """测试管理员获取连接池统计"""
+    admin = create_test_user("admin", "admin", test_db)
+    token = create_access_token({"sub": admin.username})
+
+    response = client.get(
+        "/api/admin/db/pool-stats",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert set(data["pools"]) == {"sync", "async"}
+    assert "pool_size" in data["config"]
+    for pool in data["pools"].values():
+        assert {"checkouts", "checkins", "avg_wait_ms", "max_wait_ms"} <= set(pool)
+
+def test_db_pool_stats_requires_admin(test_db: Session):
+    """测试普通用户无法获取连接池统计"""
+    user = create_test_user("normal", "user", test_db)
+    token = create_access_token({"sub": user.username})
+
+    response = client.get(
+        "/api/admin/db/pool-stats",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
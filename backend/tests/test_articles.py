@@ -6,10 +6,23 @@ from app.models.user import User
 from app.models.article import Article
 from app.models.category import Category
 from app.models.tag import Tag
+from app.models.comment import Comment
 from app.database import get_db
 from app.api.auth import create_access_token, get_password_hash
 from datetime import datetime
-from .test_config import override_get_db, init_test_db, cleanup_test_db
+from app.schemas.article import ArticleResponse
+from app.dependencies.redis import (
+    redis_client,
+    cache_article,
+    delete_article_cache,
+    ARTICLE_PREFIX,
+    CACHE_LOCK_PREFIX,
+    COMMENT_TREE_PREFIX
+)
+from .test_config import override_get_db, init_test_db, cleanup_test_db, async_engine
+from sqlalchemy import event
+from httpx import AsyncClient
+import asyncio
 from unittest.mock import patch
 
 # 替换应用程序的数据库依赖
@@ -222,6 +235,30 @@ def test_delete_article(test_token: str, test_db: Session, test_user_data: User)
     article = test_db.query(Article).filter(Article.id == db_article.id).first()
     assert article is None
 
+def test_delete_article_drops_comment_tree(test_token: str, test_db: Session, test_user_data: User):
+    """测试删除文章后评论树缓存失效，不再返回已删除文章的评论树"""
+    db_article = create_test_article(test_article, test_user_data, test_db)
+    test_db.add(Comment(
+        content="approved",
+        article_id=db_article.id,
+        user_id=test_user_data.id,
+        is_approved=True
+    ))
+    test_db.commit()
+
+    # 先访问一次，评论树进入缓存
+    response = client.get(f"/api/articles/{db_article.id}/comments/tree")
+    assert response.status_code == 200
+    assert redis_client.exists(f"{COMMENT_TREE_PREFIX}{db_article.id}")
+
+    response = client.delete(
+        f"/api/articles/{db_article.id}",
+        headers={"Authorization": f"Bearer {test_token}"}
+    )
+    assert response.status_code == 200
+    assert not redis_client.exists(f"{COMMENT_TREE_PREFIX}{db_article.id}")
+    assert client.get(f"/api/articles/{db_article.id}/comments/tree").status_code == 404
+
 def test_like_article(test_token: str, test_db: Session, test_user_data: User):
     """测试文章点赞"""
     # 创建测试文章
@@ -247,4 +284,321 @@ def test_article_not_found(test_token: str):
     assert response.status_code == 404
     data = response.json()
     assert data["code"] == 404
-    assert "文章不存在" in data["message"] 
\ No newline at end of file
+    assert "文章不存在" in data["message"]
+
+
+def test_list_articles_cursor_pagination(test_token: str, test_db: Session, test_user_data: User):
+    """测试游标分页"""
+    for i in range(3):
+        article_data = test_article.copy()
+        article_data["title"] = f"Cursor Article {i}"
+        article_data["slug"] = f"cursor-article-{i}"
+        create_test_article(article_data, test_user_data, test_db)
+
+    response = client.get("/api/articles", params={"pagination": "cursor", "size": 2})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["items"]) == 2
+    assert data["has_more"] is True
+    assert data["total"] is None
+    first_page_ids = [item["id"] for item in data["items"]]
+
+    response = client.get("/api/articles", params={"cursor": data["next_cursor"], "size": 2, "with_total": True})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["items"]) == 1
+    assert data["has_more"] is False
+    assert data["next_cursor"] is None
+    assert data["total"] == 3
+    assert data["items"][0]["id"] not in first_page_ids
+
+def test_list_articles_invalid_cursor():
+    """测试无效的分页游标"""
+    response = client.get("/api/articles", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["code"] == 400
+
+def test_list_articles_query_count_is_constant(test_db: Session, test_user_data: User, test_categories, test_tags):
+    """测试文章列表查询次数不随每页数量增长"""
+    for i in range(12):
+        db_article = Article(
+            title=f"Query Count Article {i}",
+            slug=f"query-count-article-{i}",
+            content="content",
+            status="published",
+            author_id=test_user_data.id,
+            created_at=datetime.utcnow()
+        )
+        db_article.categories = test_categories
+        db_article.tags = test_tags
+        test_db.add(db_article)
+    test_db.commit()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    query_counts = {}
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        for size in (2, 12):
+            statements.clear()
+            response = client.get("/api/articles", params={"status": "published", "size": size})
+            assert response.status_code == 200
+            assert len(response.json()["data"]["items"]) == size
+            query_counts[size] = len(statements)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert query_counts[2] == query_counts[12]
+    # 总数 + 文章(连带作者) + 分类 + 标签
+    assert 0 < query_counts[12] <= 4
+
+def test_list_articles_summary_view_excludes_content(test_db: Session, test_user_data: User):
+    """测试文章列表默认不返回也不加载正文"""
+    create_test_article(test_article, test_user_data, test_db)
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        response = client.get("/api/articles", params={"status": "published"})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record_statement)
+
+    assert response.status_code == 200
+    item = response.json()["data"]["items"][0]
+    assert "content" not in item
+    assert item["summary"] == test_article["summary"]
+    assert item["author"]["username"] == test_user_data.username
+    assert not any("articles.content" in statement for statement in statements)
+
+    response = client.get("/api/articles", params={"status": "published", "view": "full"})
+    assert response.json()["data"]["items"][0]["content"] == test_article["content"]
+
+def test_list_articles_fields_projection(test_db: Session, test_user_data: User):
+    """测试按 fields 参数只返回指定字段"""
+    create_test_article(test_article, test_user_data, test_db)
+
+    response = client.get("/api/articles", params={"status": "published", "fields": "title,like_count"})
+    assert response.status_code == 200
+    assert response.json()["data"]["items"][0].keys() == {"id", "title", "like_count"}
+
+    response = client.get("/api/articles", params={"fields": "title,password"})
+    assert response.status_code == 400
+
+def test_list_articles_includes_like_counts(test_token: str, test_db: Session, test_user_data: User):
+    """测试文章列表批量返回点赞数"""
+    liked_article = create_test_article(test_article, test_user_data, test_db)
+    other_data = test_article.copy()
+    other_data["slug"] = "other-article"
+    other_article = create_test_article(other_data, test_user_data, test_db)
+
+    client.post(
+        f"/api/articles/{liked_article.id}/like",
+        headers={"Authorization": f"Bearer {test_token}"}
+    )
+
+    response = client.get("/api/articles", params={"status": "published"})
+    assert response.status_code == 200
+    like_counts = {item["id"]: item["like_count"] for item in response.json()["data"]["items"]}
+    assert like_counts == {liked_article.id: 1, other_article.id: 0}
+
+def test_list_articles_cache_respects_size_and_total(test_db: Session, test_user_data: User):
+    """测试列表缓存按完整查询参数区分，总数不受缓存影响"""
+    for i in range(3):
+        article_data = test_article.copy()
+        article_data["slug"] = f"cached-article-{i}"
+        create_test_article(article_data, test_user_data, test_db)
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    query_counts = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        for size in (1, 2, 1, 2):
+            statements.clear()
+            response = client.get("/api/articles", params={"size": size})
+            data = response.json()["data"]
+            assert len(data["items"]) == size
+            assert data["total"] == 3
+            assert data["total_pages"] == (3 + size - 1) // size
+            query_counts.append(len(statements))
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record_statement)
+
+    # 不同 size 分别缓存，重复请求命中缓存不访问数据库
+    assert query_counts[0] > 0 and query_counts[1] > 0
+    assert query_counts[2:] == [0, 0]
+
+    response = client.get("/api/articles", params={"size": 2, "page": 2})
+    assert [item["slug"] for item in response.json()["data"]["items"]] == ["cached-article-0"]
+
+def test_list_articles_cache_invalidated_by_writes(test_token: str, test_user_data: User):
+    """测试文章写入后相关列表缓存失效"""
+    params = {"author_id": test_user_data.id, "status": "draft"}
+    assert client.get("/api/articles", params=params).json()["data"]["total"] == 0
+
+    article_data = test_article.copy()
+    article_data["status"] = "draft"
+    response = client.post(
+        "/api/articles",
+        headers={"Authorization": f"Bearer {test_token}"},
+        json=article_data
+    )
+    article_id = response.json()["data"]["id"]
+    assert client.get("/api/articles", params=params).json()["data"]["total"] == 1
+    assert client.get("/api/articles", params={"status": "published"}).json()["data"]["total"] == 0
+
+    # 状态变化后，新旧状态的列表都失效
+    client.put(f"/api/articles/{article_id}", json={"status": "published"})
+    assert client.get("/api/articles", params=params).json()["data"]["total"] == 0
+    assert client.get("/api/articles", params={"status": "published"}).json()["data"]["total"] == 1
+
+    client.delete(f"/api/articles/{article_id}")
+    assert client.get("/api/articles", params={"status": "published"}).json()["data"]["total"] == 0
+
+def test_list_articles_cache_scoped_invalidation(test_token: str, test_db: Session, test_user_data: User):
+    """测试文章写入只使相关范围的列表缓存失效，其他作者的列表仍命中缓存"""
+    other = User(username="other", email="other@example.com", hashed_password="x", role="user", created_at=datetime.utcnow())
+    test_db.add(other)
+    test_db.commit()
+    article_data = test_article.copy()
+    article_data["slug"] = "other-article"
+    create_test_article(article_data, other, test_db)
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    other_list = {"author_id": other.id}
+    assert client.get("/api/articles", params=other_list).json()["data"]["total"] == 1
+    assert client.get("/api/articles").json()["data"]["total"] == 1
+
+    response = client.post("/api/articles", headers={"Authorization": f"Bearer {test_token}"}, json=test_article)
+    assert response.status_code == 201
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        assert client.get("/api/articles", params=other_list).json()["data"]["total"] == 1
+        assert statements == []
+        # 不按作者过滤的列表依赖命名空间代数，写入后刷新
+        assert client.get("/api/articles").json()["data"]["total"] == 2
+        assert statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record_statement)
+
+def test_list_articles_with_shared_redis_pool(test_db: Session, test_user_data: User):
+    """测试应用生命周期内共享异步 Redis 连接池"""
+    create_test_article(test_article, test_user_data, test_db)
+
+    with TestClient(app) as lifespan_client:
+        for _ in range(3):
+            response = lifespan_client.get("/api/articles", params={"status": "published"})
+            assert response.status_code == 200
+            assert len(response.json()["data"]["items"]) == 1
+
+@pytest.mark.asyncio
+async def test_list_articles_concurrent_requests(test_db: Session, test_user_data: User):
+    """测试异步会话下并发请求文章列表"""
+    create_test_article(test_article, test_user_data, test_db)
+
+    async with AsyncClient(app=app, base_url="http://test") as async_client:
+        responses = await asyncio.gather(*[
+            async_client.get("/api/articles", params={"status": "published"})
+            for _ in range(5)
+        ])
+
+    for response in responses:
+        assert response.status_code == 200
+        assert len(response.json()["data"]["items"]) == 1
+
+def test_search_articles(test_db: Session, test_user_data: User):
+    """测试全文搜索按相关度排序并高亮"""
+    title_hit = test_article.copy()
+    title_hit.update(slug="fastapi-guide", title="FastAPI 异步编程指南", content="介绍路由与依赖注入")
+    content_hit = test_article.copy()
+    content_hit.update(slug="python-notes", title="Python 笔记", content="顺带提到 FastAPI 的异步编程")
+    create_test_article(title_hit, test_user_data, test_db)
+    create_test_article(content_hit, test_user_data, test_db)
+    create_test_article(test_article, test_user_data, test_db)
+
+    response = client.get("/api/articles/search", params={"q": "异步编程"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["total"] == 2
+    assert [item["slug"] for item in data["items"]] == ["fastapi-guide", "python-notes"]
+    assert data["items"][0]["highlight"]["title"] == "FastAPI <em>异步编程</em>指南"
+    assert "<em>异步编程</em>" in data["items"][1]["highlight"]["content"]
+
+def test_search_articles_after_update(test_db: Session, test_user_data: User):
+    """测试文章更新后可被搜索到"""
+    article = create_test_article(test_article, test_user_data, test_db)
+    assert client.get("/api/articles/search", params={"q": "redis"}).json()["data"]["total"] == 0
+
+    response = client.put(f"/api/articles/{article.id}", json={"content": "使用 Redis 缓存文章"})
+    assert response.status_code == 200
+
+    data = client.get("/api/articles/search", params={"q": "redis"}).json()["data"]
+    assert data["total"] == 1
+    assert data["items"][0]["id"] == article.id
+
+@pytest.mark.asyncio
+async def test_get_article_cache_miss_rebuilds_once(test_db: Session, test_user_data: User):
+    """测试缓存未命中时并发请求只查询一次数据库"""
+    article = create_test_article(test_article, test_user_data, test_db)
+    delete_article_cache(article.id)
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if "WHERE articles.id = " in statement:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as async_client:
+            responses = await asyncio.gather(*[
+                async_client.get(f"/api/articles/{article.id}")
+                for _ in range(10)
+            ])
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record_statement)
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len(statements) == 1
+
+@pytest.mark.asyncio
+async def test_get_article_waits_for_other_rebuilder(test_db: Session, test_user_data: User):
+    """测试其他进程持有重建锁时等待其写入的缓存"""
+    article = create_test_article(test_article, test_user_data, test_db)
+    delete_article_cache(article.id)
+    lock_key = f"{CACHE_LOCK_PREFIX}{ARTICLE_PREFIX}{article.id}"
+    redis_client.set(lock_key, "other-worker", ex=5)
+
+    async def rebuild_elsewhere():
+        await asyncio.sleep(0.2)
+        data = ArticleResponse.model_validate(article).model_dump()
+        data["title"] = "Rebuilt Elsewhere"
+        cache_article(article.id, data)
+        redis_client.delete(lock_key)
+
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as async_client:
+            response, _ = await asyncio.gather(
+                async_client.get(f"/api/articles/{article.id}"),
+                rebuild_elsewhere()
+            )
+    finally:
+        redis_client.delete(lock_key)
+        delete_article_cache(article.id)
+
+    assert response.json()["data"]["title"] == "Rebuilt Elsewhere"
@@ -6,7 +6,10 @@ from app.models.user import User
 from app.database import get_db
 from app.api.auth import create_access_token, get_password_hash
 from datetime import datetime, timedelta
-from .test_config import override_get_db, init_test_db, cleanup_test_db
+from .test_config import override_get_db, init_test_db, cleanup_test_db, async_engine
+from sqlalchemy import event
+from passlib.hash import bcrypt
+from app.config import settings
 from unittest.mock import patch, MagicMock
 
 # 替换应用程序的数据库依赖
@@ -235,4 +238,52 @@ def test_access_after_logout(test_user_data: User, mock_redis):
         assert response.status_code == 401
         data = response.json()
         assert data["code"] == 401
-        assert "令牌已失效" in data["message"] 
\ No newline at end of file
+        assert "令牌已失效" in data["message"] 
+def test_current_user_served_from_cache(test_user_data: User):
+    """测试令牌携带用户ID时当前用户从缓存加载"""
+    token = create_access_token(data={"sub": test_user_data.username, "uid": test_user_data.id})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # 首次请求从数据库加载并写入缓存
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get("/api/auth/me", headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 200
+    assert response.json()["data"]["username"] == test_user["username"]
+    assert statements == []
+
+def test_login_rehashes_outdated_password(test_db: Session):
+    """测试成本因子变化后登录时透明重新哈希"""
+    db_user = User(
+        username=test_user["username"],
+        email=test_user["email"],
+        hashed_password=bcrypt.using(rounds=4).hash(test_user["password"]),
+        full_name=test_user["full_name"],
+        department=test_user["department"],
+        role=test_user["role"],
+        created_at=datetime.utcnow()
+    )
+    test_db.add(db_user)
+    test_db.commit()
+
+    response = client.post(
+        "/api/auth/login",
+        data={
+            "username": test_user["username"],
+            "password": test_user["password"]
+        }
+    )
+    assert response.status_code == 200
+
+    test_db.refresh(db_user)
+    assert db_user.hashed_password.startswith(f"$2b${settings.PASSWORD_BCRYPT_ROUNDS:02d}$")
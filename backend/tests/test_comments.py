@@ -9,6 +9,7 @@ from app.models.comment import Comment
 from app.database import get_db
 from app.api.auth import create_access_token, get_password_hash
 from tests.test_config import override_get_db, init_test_db, cleanup_test_db
+from app.config import settings
 from unittest.mock import patch
 import json
 
@@ -94,17 +95,6 @@ def test_article_data(test_db: Session, test_user_data: User):
     test_db.refresh(db_article)
     return db_article
 
-@pytest.fixture(autouse=True)
-def mock_redis():
-    """Mock Redis functionality"""
-    with patch('app.dependencies.redis.cache_comment'), \
-         patch('app.dependencies.redis.get_cached_comment', return_value=None), \
-         patch('app.dependencies.redis.delete_comment_cache'), \
-         patch('app.dependencies.redis.toggle_comment_like', return_value=True), \
-         patch('app.dependencies.redis.get_comment_likes', return_value=0), \
-         patch('app.dependencies.redis.is_token_blacklisted', return_value=False):
-        yield
-
 def test_create_comment(test_token: str, test_article_data: Article):
     """测试创建评论"""
     response = client.post(
@@ -259,4 +249,324 @@ def test_comment_not_found(test_token: str):
     assert response.status_code == 404
     data = response.json()
     assert data["code"] == 404
-    assert "评论不存在" in data["message"] 
\ No newline at end of file
+    assert "评论不存在" in data["message"]
+
+
+def test_comment_tree(test_token: str, test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试评论树按主题分页，只包含已审核评论"""
+    def add_comment(content, parent=None, approved=True, minute=0):
+        comment = Comment(
+            content=content,
+            article_id=test_article_data.id,
+            user_id=test_user_data.id,
+            parent_id=parent.id if parent else None,
+            is_approved=approved,
+            created_at=datetime(2024, 1, 1, 0, minute)
+        )
+        test_db.add(comment)
+        test_db.commit()
+        return comment
+
+    first = add_comment("first", minute=0)
+    reply = add_comment("reply", parent=first, minute=1)
+    add_comment("nested", parent=reply, minute=2)
+    hidden = add_comment("hidden", parent=first, approved=False, minute=3)
+    add_comment("reply to hidden", parent=hidden, minute=4)
+    second = add_comment("second", minute=5)
+
+    response = client.get(f"/api/articles/{test_article_data.id}/comments/tree", params={"size": 1})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["total"], data["total_pages"]) == (2, 2)
+    # 最新的主题在前
+    assert [thread["content"] for thread in data["items"]] == ["second"]
+
+    response = client.get(f"/api/articles/{test_article_data.id}/comments/tree", params={"page": 2, "size": 1})
+    thread = response.json()["data"]["items"][0]
+    assert thread["content"] == "first"
+    assert [item["content"] for item in thread["replies"]] == ["reply"]
+    assert [item["content"] for item in thread["replies"][0]["replies"]] == ["nested"]
+
+    # 删除评论后评论树缓存失效
+    response = client.delete(f"/api/comments/{second.id}", headers={"Authorization": f"Bearer {test_token}"})
+    assert response.status_code == 200
+    data = client.get(f"/api/articles/{test_article_data.id}/comments/tree").json()["data"]
+    assert [thread["content"] for thread in data["items"]] == ["first"]
+
+def test_comment_tree_single_query(test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试评论树一次查询加载全部评论，命中缓存后不再查询"""
+    from sqlalchemy import event
+    from tests.test_config import async_engine
+
+    parent = None
+    for i in range(5):
+        parent = Comment(
+            content=f"comment {i}",
+            article_id=test_article_data.id,
+            user_id=test_user_data.id,
+            parent_id=parent.id if parent else None,
+            is_approved=True
+        )
+        test_db.add(parent)
+        test_db.commit()
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get(f"/api/articles/{test_article_data.id}/comments/tree")
+        assert response.status_code == 200
+        comment_queries = [statement for statement in statements if "FROM comments" in statement]
+        assert len(comment_queries) == 1
+
+        statements.clear()
+        client.get(f"/api/articles/{test_article_data.id}/comments/tree")
+        assert statements == []
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    depth, node = 0, response.json()["data"]["items"][0]
+    while node["replies"]:
+        depth, node = depth + 1, node["replies"][0]
+    assert depth == 4
+
+def test_comment_tree_article_not_found():
+    """测试文章不存在时返回 404"""
+    response = client.get("/api/articles/999/comments/tree")
+    assert response.status_code == 404
+
+def test_delete_comment_updates_comment_count(test_token: str, test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试删除公开评论时在同一事务中减少文章评论数"""
+    visible = Comment(content="visible", article_id=test_article_data.id, user_id=test_user_data.id, is_approved=True)
+    pending = Comment(content="pending", article_id=test_article_data.id, user_id=test_user_data.id)
+    test_db.add_all([visible, pending])
+    test_article_data.comment_count = 1
+    test_db.commit()
+
+    headers = {"Authorization": f"Bearer {test_token}"}
+    # 未审核的评论不计入评论数
+    assert client.post(
+        f"/api/articles/{test_article_data.id}/comments", json=test_comment, headers=headers
+    ).status_code == 201
+    assert client.delete(f"/api/comments/{pending.id}", headers=headers).status_code == 200
+    test_db.expire_all()
+    assert test_db.get(Article, test_article_data.id).comment_count == 1
+
+    assert client.delete(f"/api/comments/{visible.id}", headers=headers).status_code == 200
+    test_db.expire_all()
+    assert test_db.get(Article, test_article_data.id).comment_count == 0
+
+def test_article_list_comment_count_refreshes(admin_token: str, test_token: str, test_article_data: Article, test_user_data: User):
+    """测试评论数变化后文章列表缓存失效，列表中的评论数随之更新"""
+    list_urls = ["/api/articles", f"/api/articles?author_id={test_user_data.id}", "/api/articles?status=published"]
+    counts = lambda: [client.get(url).json()["data"]["items"][0]["comment_count"] for url in list_urls]
+    # 先读取一次，使列表进入缓存
+    assert counts() == [0, 0, 0]
+
+    headers = {"Authorization": f"Bearer {test_token}"}
+    comment_id = client.post(
+        f"/api/articles/{test_article_data.id}/comments", json=test_comment, headers=headers
+    ).json()["data"]["id"]
+    assert counts() == [0, 0, 0]
+
+    client.put(f"/api/comments/{comment_id}/approve", headers={"Authorization": f"Bearer {admin_token}"})
+    assert counts() == [1, 1, 1]
+
+    client.delete(f"/api/comments/{comment_id}", headers=headers)
+    assert counts() == [0, 0, 0]
+
+@pytest.mark.asyncio
+async def test_reconcile_comment_counts(test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试一次分组查询修正不一致的评论数"""
+    from app.queries.comment import reconcile_comment_counts
+    from tests.test_config import TestingAsyncSessionLocal
+
+    empty = Article(title="empty", slug="empty", content="content", author_id=test_user_data.id, comment_count=3)
+    test_db.add(empty)
+    test_db.add_all([
+        Comment(content=f"comment {i}", article_id=test_article_data.id, user_id=test_user_data.id, is_approved=True)
+        for i in range(2)
+    ])
+    test_db.add(Comment(content="spam", article_id=test_article_data.id, user_id=test_user_data.id, is_approved=True, is_spam=True))
+    test_db.commit()
+
+    async with TestingAsyncSessionLocal() as db:
+        fixes = await reconcile_comment_counts(db)
+        await db.commit()
+        assert fixes == {test_article_data.id: 2, empty.id: 0}
+        assert await reconcile_comment_counts(db) == {}
+
+    test_db.expire_all()
+    assert test_db.get(Article, test_article_data.id).comment_count == 2
+    assert test_db.get(Article, empty.id).comment_count == 0
+
+@pytest.fixture
+def admin_token(test_db: Session):
+    """创建管理员令牌"""
+    admin = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password="hashed",
+        full_name="Admin",
+        department="IT",
+        role="admin",
+        created_at=datetime.utcnow()
+    )
+    test_db.add(admin)
+    test_db.commit()
+    return create_access_token(data={"sub": admin.username, "uid": admin.id})
+
+def test_moderate_comments(admin_token: str, test_token: str, test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试批量审核评论并维护评论数和评论树缓存"""
+    comments = [
+        Comment(content=f"comment {i}", article_id=test_article_data.id, user_id=test_user_data.id)
+        for i in range(3)
+    ]
+    test_db.add_all(comments)
+    test_db.commit()
+    ids = [comment.id for comment in comments]
+    tree_path = f"/api/articles/{test_article_data.id}/comments/tree"
+    assert client.get(tree_path).json()["data"]["total"] == 0
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/api/comments/moderate", json={"ids": ids + [999], "action": "approve"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["data"] == {"action": "approve", "updated": 3, "missing": [999]}
+    test_db.expire_all()
+    assert test_db.get(Article, test_article_data.id).comment_count == 3
+    assert client.get(tree_path).json()["data"]["total"] == 3
+
+    # 重复审核不会重复计数
+    client.post("/api/comments/moderate", json={"ids": ids, "action": "approve"}, headers=headers)
+    response = client.post("/api/comments/moderate", json={"ids": ids[:1], "action": "spam"}, headers=headers)
+    assert response.json()["data"]["updated"] == 1
+    test_db.expire_all()
+    assert test_db.get(Article, test_article_data.id).comment_count == 2
+    assert test_db.get(Comment, ids[0]).is_spam is True
+    assert client.get(tree_path).json()["data"]["total"] == 2
+
+    # 单条审核与批量审核共用同一逻辑
+    response = client.put(f"/api/comments/{ids[0]}/approve", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["data"]["is_approved"] is True
+    test_db.expire_all()
+    assert test_db.get(Article, test_article_data.id).comment_count == 3
+
+def test_moderate_comments_validation(admin_token: str, test_token: str):
+    """测试批量审核的权限和参数校验"""
+    response = client.post(
+        "/api/comments/moderate",
+        json={"ids": [1], "action": "approve"},
+        headers={"Authorization": f"Bearer {test_token}"}
+    )
+    assert response.status_code == 403
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert client.post("/api/comments/moderate", json={"ids": [], "action": "approve"}, headers=headers).status_code == 422
+    assert client.post("/api/comments/moderate", json={"ids": [1], "action": "delete"}, headers=headers).status_code == 422
+    too_many = list(range(1, settings.COMMENT_MODERATION_MAX_IDS + 2))
+    assert client.post("/api/comments/moderate", json={"ids": too_many, "action": "spam"}, headers=headers).status_code == 422
+
+def test_moderation_queue(admin_token: str, test_token: str, test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试审核队列按 (created_at, id) 游标分页，只包含待审核评论"""
+    created_at = datetime(2024, 1, 1)
+    pending = [
+        Comment(content=f"pending {i}", article_id=test_article_data.id, user_id=test_user_data.id, created_at=created_at)
+        for i in range(3)
+    ]
+    test_db.add_all(pending)
+    test_db.add(Comment(content="approved", article_id=test_article_data.id, user_id=test_user_data.id, is_approved=True))
+    test_db.add(Comment(content="spam", article_id=test_article_data.id, user_id=test_user_data.id, is_spam=True))
+    test_db.commit()
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    data = client.get("/api/comments/moderation-queue", params={"size": 2}, headers=headers).json()["data"]
+    assert [item["content"] for item in data["items"]] == ["pending 0", "pending 1"]
+    assert data["has_more"] is True
+    assert data["pending_count"] == 3
+
+    data = client.get(
+        "/api/comments/moderation-queue", params={"size": 2, "cursor": data["next_cursor"]}, headers=headers
+    ).json()["data"]
+    assert [item["content"] for item in data["items"]] == ["pending 2"]
+    assert data["has_more"] is False
+
+    response = client.get("/api/comments/moderation-queue", params={"cursor": "invalid"}, headers=headers)
+    assert response.status_code == 400
+    response = client.get("/api/comments/moderation-queue", headers={"Authorization": f"Bearer {test_token}"})
+    assert response.status_code == 403
+
+def test_pending_comment_badge(admin_token: str, test_token: str, test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试待审核评论数角标随新增、审核和删除增量更新"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    badge = lambda: client.get("/api/comments/moderation-queue/count", headers=headers).json()["data"]["pending_count"]
+    assert badge() == 0
+
+    user_headers = {"Authorization": f"Bearer {test_token}"}
+    ids = [
+        client.post(f"/api/articles/{test_article_data.id}/comments", json=test_comment, headers=user_headers).json()["data"]["id"]
+        for _ in range(3)
+    ]
+    assert badge() == 3
+
+    client.post("/api/comments/moderate", json={"ids": ids[:2], "action": "approve"}, headers=headers)
+    assert badge() == 1
+    # 已审核的评论再次审核不影响待审核数
+    client.post("/api/comments/moderate", json={"ids": ids[:2], "action": "spam"}, headers=headers)
+    assert badge() == 1
+
+    client.delete(f"/api/comments/{ids[2]}", headers=user_headers)
+    assert badge() == 0
+
+def test_delete_article_cleans_up_comments(admin_token: str, test_token: str, test_db: Session, test_article_data: Article, test_user_data: User):
+    """测试删除文章后级联删除的评论不再计入待审核数，评论缓存随之失效"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    badge = lambda: client.get("/api/comments/moderation-queue/count", headers=headers).json()["data"]["pending_count"]
+    user_headers = {"Authorization": f"Bearer {test_token}"}
+    for _ in range(2):
+        client.post(f"/api/articles/{test_article_data.id}/comments", json=test_comment, headers=user_headers)
+    approved = Comment(content="approved", article_id=test_article_data.id, user_id=test_user_data.id, is_approved=True)
+    test_db.add(approved)
+    test_db.commit()
+
+    # 先访问一次，评论和待审核数进入缓存
+    assert client.get(f"/api/comments/{approved.id}").status_code == 200
+    assert badge() == 2
+
+    assert client.delete(f"/api/articles/{test_article_data.id}", headers=headers).status_code == 200
+    assert badge() == 0
+    assert client.get(f"/api/comments/{approved.id}").status_code == 404
+
+def test_create_comment_spam_scoring(test_token: str, test_db: Session, test_article_data: Article):
+    """测试新评论记录来源信息，并自动标记垃圾评论"""
+    headers = {"Authorization": f"Bearer {test_token}", "User-Agent": "pytest-agent"}
+    url = f"/api/articles/{test_article_data.id}/comments"
+    data = client.post(url, json=test_comment, headers=headers).json()["data"]
+    assert data["is_spam"] is False
+    comment = test_db.get(Comment, data["id"])
+    assert comment.ip_address == data["ip_address"]
+    assert comment.user_agent == "pytest-agent"
+
+    spam = {"content": "Casino bonus, click here: http://a.example.com http://b.example.com"}
+    data = client.post(url, json=spam, headers=headers).json()["data"]
+    assert data["is_spam"] is True
+
+    # 超出重复内容上限后，相同内容的评论被标记为垃圾评论
+    duplicate = {"content": "Great article, thanks for sharing!"}
+    results = [
+        client.post(url, json=duplicate, headers=headers).json()["data"]["is_spam"]
+        for _ in range(settings.SPAM_DUPLICATE_LIMIT + 1)
+    ]
+    assert results == [False] * settings.SPAM_DUPLICATE_LIMIT + [True]
+
+
+def test_same_comment_from_different_users_not_spam(test_token: str, admin_token: str, test_article_data: Article):
+    """测试不同用户发表相同内容不计为重复"""
+    url = f"/api/articles/{test_article_data.id}/comments"
+    with patch.object(settings, "SPAM_MAX_COMMENTS_PER_USER", 100):
+        for content in ("谢谢分享", "Great article, thanks for sharing!"):
+            for token in (test_token, admin_token):
+                for _ in range(settings.SPAM_DUPLICATE_LIMIT):
+                    data = client.post(url, json={"content": content}, headers={"Authorization": f"Bearer {token}"}).json()["data"]
+                    assert data["is_spam"] is False
@@ -1,13 +1,17 @@
 import os
 from pathlib import Path
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, NullPool
 from app.database import Base
 from app.main import app
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.config import settings
-from app.dependencies.redis import clear_all_likes
+from app.dependencies.redis import clear_all_likes, clear_user_cache, articles_cache, delete_keys_by_pattern, redis_client, COMMENT_TREE_PREFIX, COMMENT_PENDING_COUNT, SPAM_RATE_PREFIX, SPAM_FINGERPRINT_PREFIX, RATE_LIMIT_PREFIX
+from app.core.rate_limit import local_limiter
+from app.api.auth import principal_cache
+from app.search.service import reset_index
 
 # 设置测试环境变量
 os.environ["ENV"] = "test"
@@ -15,8 +19,9 @@ os.environ["ENV"] = "test"
 # 获取项目根目录
 root_dir = Path(__file__).parent.parent
 
-# 使用内存数据库进行测试
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# 使用共享缓存的内存数据库进行测试，同步会话与异步会话访问同一个库
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:blog_test?mode=memory&cache=shared&uri=true"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///file:blog_test?mode=memory&cache=shared&uri=true"
 
 # 创建测试数据库引擎
 engine = create_engine(
@@ -25,8 +30,22 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 
+# 创建异步测试数据库引擎
+# 测试客户端每个请求使用独立的事件循环，因此不复用连接；
+# 同步引擎的常驻连接保证内存数据库不会被释放
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=NullPool,
+)
+
 # 创建测试会话
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 def override_get_db():
     """重写数据库依赖"""
@@ -37,6 +56,11 @@ def override_get_db():
         if db:
             db.close()
 
+async def override_get_async_db():
+    """重写异步数据库依赖"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 def init_test_db():
     """初始化测试数据库"""
     try:
@@ -46,6 +70,18 @@ def init_test_db():
         Base.metadata.create_all(bind=engine)
         # 清理点赞数据
         clear_all_likes()
+        # 清理用户缓存，测试之间用户ID会被复用
+        clear_user_cache()
+        principal_cache.clear()
+        # 测试直接写库，不经过列表缓存失效逻辑
+        articles_cache.clear()
+        delete_keys_by_pattern(f"{COMMENT_TREE_PREFIX}*")
+        delete_keys_by_pattern(f"{SPAM_RATE_PREFIX}*")
+        delete_keys_by_pattern(f"{SPAM_FINGERPRINT_PREFIX}*")
+        delete_keys_by_pattern(f"{RATE_LIMIT_PREFIX}*")
+        local_limiter.clear()
+        redis_client.delete(COMMENT_PENDING_COUNT)
+        reset_index()
     except Exception as e:
         print(f"初始化测试数据库失败: {e}")
         raise
@@ -61,4 +97,5 @@ def cleanup_test_db():
         raise
 
 # 替换应用的数据库依赖
-app.dependency_overrides[get_db] = override_get_db
\ No newline at end of file
+app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
\ No newline at end of file
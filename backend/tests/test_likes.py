@@ -0,0 +1,218 @@
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.main import app
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.user import User
+from app.models.like import article_likes, comment_likes
+from app.core.security import create_access_token
+from app.dependencies.redis import (
+    redis_client,
+    clear_article_likes,
+    clear_comment_likes,
+    LIKES_RESTORED,
+    LIKE_CHANGES
+)
+from app.dependencies.async_redis import (
+    toggle_article_like,
+    toggle_comment_like,
+    get_article_stats_bulk,
+    get_comment_like_stats_bulk
+)
+from app.tasks.likes import sync_likes, restore_likes, LIKE_SYNC_LOCK
+from .test_config import override_get_db, init_test_db, cleanup_test_db, TestingAsyncSessionLocal
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """设置测试数据库"""
+    init_test_db()
+    redis_client.delete(LIKE_SYNC_LOCK)
+    yield
+    cleanup_test_db()
+
+@pytest.fixture
+def test_db():
+    """创建测试数据库会话"""
+    db = next(override_get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+def create_user(test_db: Session, username: str) -> User:
+    """创建测试用户的辅助函数"""
+    user = User(
+        username=username,
+        email=f"{username}@example.com",
+        full_name=username,
+        department="IT",
+        role="user",
+        hashed_password="hashed",
+        created_at=datetime.utcnow()
+    )
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+def auth_headers(user: User) -> dict:
+    token = create_access_token({"sub": user.username, "uid": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def article(test_db: Session) -> Article:
+    """创建测试文章"""
+    author = create_user(test_db, "author")
+    article = Article(
+        author_id=author.id,
+        title="likes",
+        slug="likes",
+        content="content",
+        status="published",
+        updated_at=datetime(2024, 1, 1)
+    )
+    test_db.add(article)
+    test_db.commit()
+    test_db.refresh(article)
+    return article
+
+def like(path: str, user: User) -> dict:
+    response = client.post(path, headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()["data"]
+
+def test_toggle_like_returns_count(test_db: Session, article: Article):
+    """测试切换点赞一次调用返回状态和点赞数"""
+    alice = create_user(test_db, "alice")
+    bob = create_user(test_db, "bob")
+    path = f"/api/articles/{article.id}/like"
+
+    assert like(path, alice) == {"is_liked": True, "like_count": 1}
+    assert like(path, bob) == {"is_liked": True, "like_count": 2}
+    assert like(path, alice) == {"is_liked": False, "like_count": 1}
+    # 最后一次切换的状态记为待同步的变更
+    assert redis_client.hget(LIKE_CHANGES, f"article:{article.id}:{alice.id}") == "0"
+
+@pytest.mark.asyncio
+async def test_toggle_like_records_changes():
+    """测试点赞切换脚本同时维护点赞集合和待同步的变更"""
+    assert await toggle_article_like(1, 7) == (True, 1)
+    assert await toggle_comment_like(2, 7) == (True, 1)
+    assert await toggle_comment_like(2, 8) == (True, 2)
+    assert await toggle_comment_like(2, 7) == (False, 1)
+    assert redis_client.hgetall(LIKE_CHANGES) == {"article:1:7": "1", "comment:2:7": "0", "comment:2:8": "1"}
+
+@pytest.mark.asyncio
+async def test_like_stats_bulk():
+    """测试批量读取点赞数，传入用户时同时返回是否点赞"""
+    first, second = 987001, 987002
+    view_keys = [f"article_views:{first}", f"article_views:{second}"]
+    redis_client.delete(*view_keys)
+    await toggle_article_like(first, 7)
+    await toggle_comment_like(first, 8)
+    redis_client.set(view_keys[0], 5)
+    try:
+        assert await get_article_stats_bulk([first, second]) == {
+            first: {"view_count": 5, "like_count": 1},
+            second: {"view_count": None, "like_count": 0}
+        }
+        assert await get_article_stats_bulk([first, second], user_id=7) == {
+            first: {"view_count": 5, "like_count": 1, "is_liked": True},
+            second: {"view_count": None, "like_count": 0, "is_liked": False}
+        }
+        assert await get_comment_like_stats_bulk([first, second]) == {first: {"like_count": 1}, second: {"like_count": 0}}
+        assert await get_comment_like_stats_bulk([first, second], user_id=8) == {
+            first: {"like_count": 1, "is_liked": True},
+            second: {"like_count": 0, "is_liked": False}
+        }
+        assert await get_article_stats_bulk([]) == {}
+    finally:
+        redis_client.delete(*view_keys)
+
+@pytest.mark.asyncio
+async def test_sync_likes(test_db: Session, article: Article):
+    """测试点赞变更批量写回数据库"""
+    alice = create_user(test_db, "alice")
+    bob = create_user(test_db, "bob")
+    comment = Comment(content="comment", article_id=article.id, user_id=alice.id)
+    test_db.add(comment)
+    test_db.commit()
+
+    like(f"/api/articles/{article.id}/like", alice)
+    like(f"/api/articles/{article.id}/like", bob)
+    like(f"/api/comments/{comment.id}/like", bob)
+
+    async with TestingAsyncSessionLocal() as db:
+        assert await sync_likes(db) == 3
+        assert await sync_likes(db) == 0
+
+    # 取消点赞在下一次同步时删除记录
+    like(f"/api/articles/{article.id}/like", alice)
+    async with TestingAsyncSessionLocal() as db:
+        assert await sync_likes(db) == 1
+
+    test_db.expire_all()
+    assert test_db.execute(select(article_likes.c.user_id)).scalars().all() == [bob.id]
+    assert test_db.execute(select(comment_likes.c.user_id)).scalars().all() == [bob.id]
+    saved = test_db.get(Article, article.id)
+    assert saved.like_count == 1
+    assert saved.updated_at == datetime(2024, 1, 1)
+
+@pytest.mark.asyncio
+async def test_restore_likes_after_redis_loss(test_db: Session, article: Article):
+    """测试 Redis 数据丢失后从数据库恢复点赞集合"""
+    alice = create_user(test_db, "alice")
+    like(f"/api/articles/{article.id}/like", alice)
+    async with TestingAsyncSessionLocal() as db:
+        assert await sync_likes(db) == 1
+        assert await restore_likes(db) == 1
+        # 已恢复过时跳过
+        assert await restore_likes(db) == 0
+
+    clear_article_likes()
+    clear_comment_likes()
+    redis_client.delete(LIKES_RESTORED)
+    async with TestingAsyncSessionLocal() as db:
+        assert await restore_likes(db) == 1
+
+    # 恢复后再次点击为取消点赞
+    assert like(f"/api/articles/{article.id}/like", alice) == {"is_liked": False, "like_count": 0}
+
+def test_list_articles_is_liked(test_db: Session, article: Article):
+    """测试文章列表批量返回当前用户的点赞状态"""
+    alice = create_user(test_db, "alice")
+    other = Article(author_id=article.author_id, title="other", slug="other", content="content", status="published")
+    test_db.add(other)
+    test_db.commit()
+    like(f"/api/articles/{article.id}/like", alice)
+
+    items = client.get("/api/articles", headers=auth_headers(alice)).json()["data"]["items"]
+    assert {item["id"]: item["is_liked"] for item in items} == {article.id: True, other.id: False}
+    assert {item["id"]: item["like_count"] for item in items} == {article.id: 1, other.id: 0}
+
+    # 点赞状态不进入列表缓存
+    items = client.get("/api/articles").json()["data"]["items"]
+    assert all("is_liked" not in item for item in items)
+    items = client.get("/api/articles", params={"fields": "title"}, headers=auth_headers(alice)).json()["data"]["items"]
+    assert {item["id"]: item["is_liked"] for item in items} == {article.id: True, other.id: False}
+
+def test_list_comments_is_liked(test_db: Session, article: Article):
+    """测试评论列表批量返回当前用户的点赞状态"""
+    alice = create_user(test_db, "alice")
+    comments = [Comment(content=f"comment {i}", article_id=article.id, user_id=alice.id) for i in range(3)]
+    test_db.add_all(comments)
+    test_db.commit()
+    like(f"/api/comments/{comments[1].id}/like", alice)
+
+    path = f"/api/articles/{article.id}/comments"
+    items = client.get(path, headers=auth_headers(alice)).json()["data"]["items"]
+    assert {item["id"]: item["is_liked"] for item in items} == {
+        comments[0].id: False, comments[1].id: True, comments[2].id: False
+    }
+    items = client.get(path).json()["data"]["items"]
+    assert all(item["is_liked"] is None for item in items)
@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from unittest.mock import patch
+from app.main import app
+from app.config import settings
+from app.api.auth import create_access_token
+from app.core.rate_limit import route_group, client_identity
+from app.utils.rate_limit import LocalRateLimiter, window_position, retry_after
+from tests.test_config import init_test_db, cleanup_test_db
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """设置测试数据库，同时清理限流计数"""
+    init_test_db()
+    yield
+    cleanup_test_db()
+
+def test_route_group():
+    """测试路由组划分"""
+    assert route_group("POST", "/api/auth/login") == "auth"
+    assert route_group("GET", "/api/articles") == "read"
+    assert route_group("DELETE", "/api/comments/1") == "write"
+    assert route_group("OPTIONS", "/api/articles") is None
+    assert route_group("GET", "/docs") is None
+
+def test_window_position_and_retry_after():
+    """测试窗口权重和 Retry-After 估算"""
+    assert window_position(125.0, 60) == (2, 0.9166666666666666)
+    # 当前窗口已满：等到下一窗口，上一窗口计数衰减到足够低
+    assert retry_after(0, 10, 10, 60, 0.5) == 36
+    # 当前窗口未满：等待上一窗口计数衰减
+    assert retry_after(10, 5, 10, 60, 0.75) == 21
+    assert retry_after(0, 1, 1, 60, 0.0) >= 1
+
+def test_local_rate_limiter():
+    """测试进程内滑动窗口计数"""
+    limiter = LocalRateLimiter()
+    assert [limiter.hit("b", 2, 60, 5, 1.0)[0] for _ in range(3)] == [True, True, False]
+    # 下一窗口开始时上一窗口的计数仍按权重计入
+    assert limiter.hit("b", 2, 60, 6, 1.0) == (False, 2, 0)
+    assert limiter.hit("b", 2, 60, 6, 0.4) == (True, 2, 1)
+    assert limiter.hit("other", 2, 60, 6, 1.0)[0] is True
+
+def test_client_identity_uses_token_user():
+    """测试登录用户按用户ID限流，登录接口始终按 IP"""
+    token = create_access_token({"sub": "someone", "uid": 42})
+    scope = {"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("1.2.3.4", 1)}
+    assert client_identity(Request(scope), "read") == "u:42"
+    assert client_identity(Request(scope), "auth") == "ip:1.2.3.4"
+    scope["headers"] = [(b"authorization", b"Bearer invalid")]
+    assert client_identity(Request(scope), "write") == "ip:1.2.3.4"
+
+def test_rate_limit_returns_429():
+    """测试超过路由组上限时返回 429 和 Retry-After，其他路由组不受影响"""
+    with patch.object(settings, "RATE_LIMIT_AUTH", 2):
+        form = {"username": "nobody", "password": "wrong"}
+        statuses = [client.post("/api/auth/login", data=form).status_code for _ in range(3)]
+        assert statuses[:2] == [401, 401]
+        assert statuses[2] == 429
+        response = client.post("/api/auth/login", data=form)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.json()["code"] == 429
+        assert client.get("/api/articles").status_code == 200
+
+def test_rate_limit_response_has_cors_headers():
+    """测试 429 响应带有跨域头，浏览器可以读取 Retry-After"""
+    origin = settings.CORS_ORIGINS[0]
+    with patch.object(settings, "RATE_LIMIT_READ", 1):
+        assert client.get("/api/articles", headers={"Origin": origin}).status_code == 200
+        response = client.get("/api/articles", headers={"Origin": origin})
+    assert response.status_code == 429
+    assert response.headers["Access-Control-Allow-Origin"] == origin
+    assert "retry-after" in response.headers["Access-Control-Expose-Headers"].lower()
+
+def test_rate_limit_falls_back_to_local_counter():
+    """测试 Redis 不可用时使用进程内计数"""
+    with patch.object(settings, "RATE_LIMIT_READ", 1), \
+         patch("app.core.rate_limit.hit_rate_limit", side_effect=ConnectionError("redis down")):
+        assert client.get("/api/articles").status_code == 200
+        assert client.get("/api/articles").status_code == 429
+
+def test_rate_limit_disabled():
+    """测试关闭限流"""
+    with patch.object(settings, "RATE_LIMIT_ENABLED", False), patch.object(settings, "RATE_LIMIT_READ", 1):
+        assert [client.get("/api/articles").status_code for _ in range(2)] == [200, 200]
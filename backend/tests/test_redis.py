@@ -0,0 +1,88 @@
+import pytest
+from app.dependencies.redis import redis_client, delete_keys_by_pattern, CacheNamespace
+from app.dependencies.async_redis import (
+    delete_keys_by_pattern as async_delete_keys_by_pattern,
+    AsyncCacheNamespace,
+    article_list_scopes
+)
+
+@pytest.fixture(autouse=True)
+def cleanup_keys():
+    """清理测试键"""
+    yield
+    redis_client.delete("scan_test_other", *[f"scan_test:{i}" for i in range(25)])
+    delete_keys_by_pattern("ns_test:*")
+
+def test_delete_keys_by_pattern_in_batches():
+    """测试按模式分批删除键并报告进度"""
+    redis_client.mset({f"scan_test:{i}": i for i in range(25)})
+    redis_client.set("scan_test_other", 1)
+    progress = []
+    assert delete_keys_by_pattern("scan_test:*", batch_size=10, on_progress=progress.append) == 25
+    assert progress == [10, 20, 25]
+    assert not redis_client.exists("scan_test:0")
+    assert redis_client.exists("scan_test_other")
+
+@pytest.mark.asyncio
+async def test_async_delete_keys_by_pattern():
+    """测试异步版本按模式删除键"""
+    redis_client.mset({f"scan_test:{i}": i for i in range(5)})
+    redis_client.set("scan_test_other", 1)
+    assert await async_delete_keys_by_pattern("scan_test*", batch_size=2) == 6
+    assert await async_delete_keys_by_pattern("scan_test*") == 0
+
+def test_cache_namespace_key_construction():
+    """测试缓存键包含所依赖的代数"""
+    namespace = CacheNamespace("ns_test", 60)
+    assert namespace.generation_keys() == ["ns_test:gen"]
+    assert namespace.generation_keys(["author:1", "status:draft"]) == ["ns_test:gen:author:1", "ns_test:gen:status:draft"]
+    assert namespace.invalidation_keys(["status:draft", "author:1", "author:1"]) == [
+        "ns_test:gen", "ns_test:gen:author:1", "ns_test:gen:status:draft"
+    ]
+    assert namespace.build_key("list:abc") == "ns_test:0:list:abc"
+
+    redis_client.set("ns_test:gen:author:1", 3)
+    assert namespace.build_key("list:abc", ["author:1", "status:draft"]) == "ns_test:3.0:list:abc"
+    assert article_list_scopes(1, "draft", True) == ["author:1", "status:draft", "featured:1"]
+    assert article_list_scopes() == []
+
+def test_cache_namespace_invalidation():
+    """测试命名空间失效与按范围失效"""
+    namespace = CacheNamespace("ns_test", 60)
+    all_key = namespace.build_key("all")
+    author1_key = namespace.build_key("mine", ["author:1"])
+    author2_key = namespace.build_key("theirs", ["author:2"])
+    for key in (all_key, author1_key, author2_key):
+        namespace.set(key, {"key": key})
+
+    # 作者 1 的写入：命名空间和 author:1 范围失效，author:2 的缓存仍可读取
+    namespace.invalidate(["author:1"])
+    assert namespace.build_key("all") != all_key
+    assert namespace.build_key("mine", ["author:1"]) != author1_key
+    assert namespace.build_key("theirs", ["author:2"]) == author2_key
+    assert namespace.get(namespace.build_key("theirs", ["author:2"])) == {"key": author2_key}
+    assert namespace.get(namespace.build_key("all")) is None
+
+    # 不指定范围时只递增命名空间代数，范围缓存不受影响
+    namespace.invalidate()
+    assert namespace.build_key("theirs", ["author:2"]) == author2_key
+
+    namespace.clear()
+    assert not redis_client.exists(author2_key, "ns_test:gen")
+
+@pytest.mark.asyncio
+async def test_async_cache_namespace():
+    """测试异步命名空间与同步版本使用相同的键"""
+    namespace = AsyncCacheNamespace("ns_test", 60)
+    sync_namespace = CacheNamespace("ns_test", 60)
+    key = await namespace.build_key("mine", ["author:1"])
+    assert key == sync_namespace.build_key("mine", ["author:1"])
+    await namespace.set(key, [1, 2])
+    assert await namespace.get(key) == [1, 2]
+
+    await namespace.invalidate(["author:2"])
+    assert await namespace.build_key("mine", ["author:1"]) == key
+    await namespace.invalidate(["author:1"])
+    new_key = await namespace.build_key("mine", ["author:1"])
+    assert new_key != key
+    assert await namespace.get(new_key) is None
@@ -0,0 +1,130 @@
+import gzip
+import json
+import os
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models.article import Article
+from app.search.inverted_index import InvertedIndex, FIELD_WEIGHTS
+from app.search.snapshot import load_snapshot, SNAPSHOT_VERSION
+from app.search.service import search_index, load_index, save_index, reset_index, search_articles
+from app.dependencies.redis import redis_client, SEARCH_INDEX_GENERATION
+from .test_config import override_get_db, init_test_db, cleanup_test_db, TestingAsyncSessionLocal
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """设置测试数据库"""
+    init_test_db()
+    yield
+    cleanup_test_db()
+
+@pytest.fixture
+def test_db():
+    """创建测试数据库会话"""
+    db = next(override_get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+def create_article(test_db: Session, slug: str, title: str, content: str, updated_at: datetime) -> Article:
+    """创建测试文章的辅助函数"""
+    article = Article(title=title, slug=slug, content=content, status="published", updated_at=updated_at)
+    test_db.add(article)
+    test_db.commit()
+    test_db.refresh(article)
+    return article
+
+def test_inverted_index_incremental_updates():
+    """测试索引增量添加、替换和删除"""
+    index = InvertedIndex()
+    index.add(1, {"title": "数据库连接池", "content": "连接池大小"})
+    index.add(2, {"title": "Redis 缓存", "content": "缓存失效与连接池"})
+
+    assert [doc_id for doc_id, _ in index.search("连接池")] == [1, 2]
+
+    index.add(2, {"title": "Redis 缓存", "content": "缓存失效"})
+    assert [doc_id for doc_id, _ in index.search("连接池")] == [1]
+
+    index.remove(1)
+    assert index.search("连接池") == []
+    assert [doc_id for doc_id, _ in index.search("redis")] == [2]
+    assert len(index) == 1
+
+@pytest.mark.asyncio
+async def test_snapshot_restore_catches_up(test_db: Session, tmp_path):
+    """测试从快照恢复后补齐新增、更新和删除的文章"""
+    base = datetime(2024, 1, 1)
+    kept = create_article(test_db, "kept", "异步编程", "协程与事件循环", base)
+    updated = create_article(test_db, "updated", "旧标题", "旧内容", base)
+    deleted = create_article(test_db, "deleted", "即将删除", "事件循环", base)
+
+    snapshot_path = str(tmp_path / "index.json.gz")
+    async with TestingAsyncSessionLocal() as db:
+        await load_index(db, snapshot_path)
+    save_index(snapshot_path)
+    assert load_snapshot(snapshot_path) is not None
+
+    # 快照保存后文章表发生变化
+    updated.title = "事件循环详解"
+    updated.updated_at = base + timedelta(hours=1)
+    test_db.delete(deleted)
+    added = create_article(test_db, "added", "新文章", "事件循环调度", base + timedelta(hours=2))
+    test_db.commit()
+
+    reset_index()
+    async with TestingAsyncSessionLocal() as db:
+        await load_index(db, snapshot_path)
+
+    assert sorted(search_index.doc_ids()) == sorted([kept.id, updated.id, added.id])
+    assert {doc_id for doc_id, _ in search_index.search("事件循环")} == {kept.id, updated.id, added.id}
+    assert [doc_id for doc_id, _ in search_index.search("旧标题")] == []
+
+@pytest.mark.asyncio
+async def test_corrupt_snapshot_falls_back_to_rebuild(test_db: Session, tmp_path):
+    """测试快照截断或结构错误时从文章表重建"""
+    article = create_article(test_db, "async", "异步编程", "协程与事件循环", datetime(2024, 1, 1))
+    snapshot_path = str(tmp_path / "index.json.gz")
+    async with TestingAsyncSessionLocal() as db:
+        await load_index(db, snapshot_path)
+    save_index(snapshot_path)
+    assert os.listdir(tmp_path) == ["index.json.gz"]
+
+    with open(snapshot_path, "rb") as f:
+        data = f.read()
+    broken = {
+        "truncated": data[:len(data) // 2],
+        "wrong_structure": gzip.compress(json.dumps({
+            "version": SNAPSHOT_VERSION, "weights": FIELD_WEIGHTS, "docs": {"1": 5}
+        }).encode()),
+        "not_a_dict": gzip.compress(b"[1, 2]"),
+    }
+    for content in broken.values():
+        with open(snapshot_path, "wb") as f:
+            f.write(content)
+        assert load_snapshot(snapshot_path) is None
+        reset_index()
+        async with TestingAsyncSessionLocal() as db:
+            await load_index(db, snapshot_path)
+        assert [doc_id for doc_id, _ in search_index.search("事件循环")] == [article.id]
+
+@pytest.mark.asyncio
+async def test_index_syncs_changes_from_other_workers(test_db: Session):
+    """测试索引版本号变化时补齐其他 worker 写入的文章"""
+    base = datetime.utcnow()
+    kept = create_article(test_db, "kept", "异步编程", "事件循环", base)
+    deleted = create_article(test_db, "deleted", "即将删除", "事件循环", base)
+    async with TestingAsyncSessionLocal() as db:
+        await load_index(db)
+        assert await search_articles(db, "事件循环", 0, 10) == (search_index.search("事件循环"), 2)
+
+    # 其他 worker 写库并递增版本号，本进程索引尚未更新
+    added = create_article(test_db, "added", "新文章", "事件循环调度", base + timedelta(seconds=1))
+    test_db.delete(deleted)
+    test_db.commit()
+    redis_client.incr(SEARCH_INDEX_GENERATION)
+
+    async with TestingAsyncSessionLocal() as db:
+        ranked, total = await search_articles(db, "事件循环", 0, 10)
+    assert total == 2
+    assert {doc_id for doc_id, _ in ranked} == {kept.id, added.id}
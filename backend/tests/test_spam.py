@@ -0,0 +1,54 @@
+from app.spam.fingerprint import content_fingerprint
+from app.spam.rules import SpamContext, evaluate, register_rule, SPAM_RULES
+
+LIMITS = {"ip_rate": 10, "user_rate": 5, "duplicates": 3}
+
+def test_fingerprint_ignores_case_and_punctuation():
+    """测试指纹对大小写、空白和标点不敏感，内容不同时指纹不同"""
+    assert content_fingerprint("Buy cheap watches NOW!!!") == content_fingerprint("buy  cheap watches now")
+    assert content_fingerprint("Buy cheap watches now") != content_fingerprint("A thoughtful reply")
+    assert content_fingerprint("这篇文章写得很好，受益匪浅，谢谢作者") == content_fingerprint("这篇文章，写得很好。受益匪浅！谢谢作者")
+    # 过短的内容不参与重复检测
+    assert content_fingerprint("谢谢分享") is None
+    assert content_fingerprint("Great post!") is None
+
+def test_clean_comment_scores_zero():
+    """测试正常评论不命中规则"""
+    score, reasons = evaluate(SpamContext("Nice write-up, the benchmark section was helpful.", {"ip_rate": 1, "user_rate": 1, "duplicates": 1}, LIMITS))
+    assert score == 0
+    assert reasons == []
+
+def test_content_rules():
+    """测试链接、关键词和重复字符规则"""
+    score, reasons = evaluate(SpamContext("see http://a.cn and www.b.com, 加微信 click here 领取", {}, LIMITS))
+    assert score >= 1.0
+    assert reasons == ["links:2", "keywords:2"]
+    _, reasons = evaluate(SpamContext("!!!!!!!!!!!!!!!!", {}, LIMITS))
+    assert reasons == ["repeated_chars"]
+
+def test_benign_keyword_mentions():
+    """测试正常技术讨论中出现关键词不会被判定为垃圾评论"""
+    for content in (
+        "I compared crypto libraries; cryptography is hard",
+        "The loan calculator example uses Bitcoin price api",
+        "Casino-style crypto loan demos with bitcoin prices, all in one post",
+    ):
+        score, _ = evaluate(SpamContext(content, {}, LIMITS))
+        assert score < 1.0, content
+    assert evaluate(SpamContext("cryptography and loans", {}, LIMITS)) == (0.0, [])
+
+def test_signal_rules():
+    """测试频率和重复内容信号超过上限时判定为垃圾评论"""
+    assert evaluate(SpamContext("hi", {"ip_rate": 11}, LIMITS))[1] == ["ip_rate"]
+    assert evaluate(SpamContext("hi", {"user_rate": 6}, LIMITS))[1] == ["user_rate"]
+    assert evaluate(SpamContext("hi", {"duplicates": 4}, LIMITS)) == (1.0, ["duplicates:4"])
+    assert evaluate(SpamContext("hi", {"ip_rate": 10, "user_rate": 5, "duplicates": 3}, LIMITS)) == (0.0, [])
+
+def test_register_rule():
+    """测试注册自定义规则"""
+    rule = lambda context: (2.0, "custom") if "forbidden" in context.content else None
+    register_rule(rule)
+    try:
+        assert evaluate(SpamContext("forbidden words", {}, LIMITS)) == (2.0, ["custom"])
+    finally:
+        SPAM_RULES.remove(rule)
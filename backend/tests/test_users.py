@@ -259,4 +259,21 @@ def test_delete_user_not_found(admin_token: str):
     assert response.status_code == 404
     data = response.json()
     assert data["code"] == 404
-    assert "用户不存在" in data["message"] 
\ No newline at end of file
+    assert "用户不存在" in data["message"] 
+def test_deleted_user_token_rejected(admin_token: str, test_db: Session):
+    """测试删除用户后其令牌立即失效"""
+    user = create_test_user(test_user, test_db)
+    user_token = create_access_token({"sub": user.username, "uid": user.id})
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+
+    # 预热当前用户缓存
+    assert client.get(f"/api/users/{user.id}", headers=user_headers).status_code == 200
+
+    response = client.delete(
+        f"/api/users/{user.id}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"/api/users/{user.id}", headers=user_headers)
+    assert response.status_code == 401
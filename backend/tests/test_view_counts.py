@@ -0,0 +1,197 @@
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.main import app
+from app.models.article import Article
+from app.models.user import User
+from app.dependencies.redis import (
+    redis_client,
+    delete_article_cache,
+    ARTICLE_PREFIX,
+    ARTICLE_VIEW_COUNT,
+    ARTICLE_LIKE_COUNT,
+    ARTICLE_VIEW_DELTAS,
+    ARTICLE_VIEW_DELTAS_FLUSHING,
+    article_view_keys
+)
+from app.core.security import create_access_token
+from app.dependencies.async_redis import increment_article_view
+from app.tasks.view_counts import flush_view_counts, VIEW_COUNT_FLUSH_LOCK
+from .test_config import override_get_db, init_test_db, cleanup_test_db, TestingAsyncSessionLocal
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """设置测试数据库"""
+    init_test_db()
+    redis_client.delete(ARTICLE_VIEW_DELTAS, ARTICLE_VIEW_DELTAS_FLUSHING, VIEW_COUNT_FLUSH_LOCK)
+    yield
+    cleanup_test_db()
+
+@pytest.fixture
+def test_db():
+    """创建测试数据库会话"""
+    db = next(override_get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture
+def author(test_db: Session) -> User:
+    """创建文章作者"""
+    user = User(
+        username="author",
+        email="author@example.com",
+        full_name="Author",
+        department="IT",
+        role="user",
+        hashed_password="hashed",
+        created_at=datetime.utcnow()
+    )
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+def create_article(test_db: Session, author: User, slug: str, view_count: int = 0) -> Article:
+    """创建测试文章的辅助函数"""
+    article = Article(
+        author_id=author.id,
+        title=slug,
+        slug=slug,
+        content="content",
+        status="published",
+        view_count=view_count,
+        updated_at=datetime(2024, 1, 1)
+    )
+    test_db.add(article)
+    test_db.commit()
+    test_db.refresh(article)
+    redis_client.delete(f"{ARTICLE_VIEW_COUNT}{article.id}", *redis_client.keys(f"article_uv:{article.id}:*"))
+    delete_article_cache(article.id)
+    return article
+
+@pytest.mark.asyncio
+async def test_flush_view_counts(test_db: Session, author: User):
+    """测试浏览量增量批量写回数据库"""
+    first = create_article(test_db, author, "first", view_count=10)
+    second = create_article(test_db, author, "second")
+    for article_id in (first.id, first.id, second.id):
+        assert client.get(f"/api/articles/{article_id}").status_code == 200
+
+    # 以数据库中的浏览量为起点累加，包含本次浏览
+    assert client.get(f"/api/articles/{first.id}").json()["data"]["view_count"] == 13
+
+    async with TestingAsyncSessionLocal() as db:
+        assert await flush_view_counts(db) == 2
+        assert await flush_view_counts(db) == 0
+
+    test_db.expire_all()
+    assert test_db.get(Article, first.id).view_count == 13
+    assert test_db.get(Article, second.id).view_count == 1
+    assert test_db.get(Article, first.id).updated_at == datetime(2024, 1, 1)
+    assert not redis_client.exists(ARTICLE_VIEW_DELTAS, ARTICLE_VIEW_DELTAS_FLUSHING)
+
+@pytest.mark.asyncio
+async def test_flush_view_counts_retries_unacknowledged(test_db: Session, author: User):
+    """测试写回失败的增量在下次写回时重试"""
+    article = create_article(test_db, author, "retry")
+    redis_client.hset(ARTICLE_VIEW_DELTAS_FLUSHING, article.id, 3)
+    redis_client.hset(ARTICLE_VIEW_DELTAS, article.id, 2)
+
+    async with TestingAsyncSessionLocal() as db:
+        assert await flush_view_counts(db) == 1
+        assert await flush_view_counts(db) == 1
+
+    test_db.expire_all()
+    assert test_db.get(Article, article.id).view_count == 5
+
+@pytest.mark.asyncio
+async def test_flush_view_counts_null_view_count(test_db: Session, author: User):
+    """测试数据库中浏览量为 NULL 时按 0 累加增量"""
+    article = create_article(test_db, author, "null-views")
+    article.view_count = None
+    test_db.commit()
+    redis_client.hset(ARTICLE_VIEW_DELTAS, article.id, 4)
+
+    async with TestingAsyncSessionLocal() as db:
+        assert await flush_view_counts(db) == 1
+
+    test_db.expire_all()
+    assert test_db.get(Article, article.id).view_count == 4
+
+def test_unique_visitors(test_db: Session, author: User):
+    """测试同一访客当天重复浏览只计一个独立访客"""
+    article = create_article(test_db, author, "unique", view_count=5)
+    token = create_access_token({"sub": author.username, "uid": author.id})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    data = client.get(f"/api/articles/{article.id}").json()["data"]
+    assert (data["view_count"], data["unique_visitors"]) == (6, 1)
+    data = client.get(f"/api/articles/{article.id}").json()["data"]
+    assert (data["view_count"], data["unique_visitors"]) == (7, 1)
+
+    # 登录用户按用户ID计数，与匿名访客区分
+    data = client.get(f"/api/articles/{article.id}", headers=headers).json()["data"]
+    assert (data["view_count"], data["unique_visitors"]) == (8, 2)
+    data = client.get(f"/api/articles/{article.id}", headers=headers).json()["data"]
+    assert (data["view_count"], data["unique_visitors"]) == (9, 2)
+
+    # 无效令牌按匿名访客处理
+    response = client.get(f"/api/articles/{article.id}", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 200
+    assert response.json()["data"]["unique_visitors"] == 2
+
+def test_view_count_seeded_from_db_not_cached_article(test_db: Session, author: User):
+    """测试 Redis 浏览量丢失后以数据库中的最新值为起点，而不是文章缓存中的旧值"""
+    article = create_article(test_db, author, "reseed", view_count=5)
+    assert client.get(f"/api/articles/{article.id}").json()["data"]["view_count"] == 6
+    assert redis_client.exists(f"{ARTICLE_PREFIX}{article.id}")
+
+    # 写回后数据库浏览量已更新，文章缓存中仍是旧值
+    article.view_count = 20
+    test_db.commit()
+    redis_client.delete(f"{ARTICLE_VIEW_COUNT}{article.id}")
+    assert client.get(f"/api/articles/{article.id}").json()["data"]["view_count"] == 21
+
+def test_list_falls_back_to_db_view_count(test_db: Session, author: User):
+    """测试 Redis 中没有浏览量计数时列表使用数据库中已写回的浏览量"""
+    article = create_article(test_db, author, "durable", view_count=42)
+    view_count = lambda: client.get("/api/articles").json()["data"]["items"][0]["view_count"]
+    assert view_count() == 42
+
+    client.get(f"/api/articles/{article.id}")
+    assert view_count() == 43
+
+    # Redis 计数丢失后仍显示数据库中的值
+    redis_client.delete(f"{ARTICLE_VIEW_COUNT}{article.id}")
+    assert view_count() == 42
+
+@pytest.mark.asyncio
+async def test_increment_article_view():
+    """测试一次脚本调用完成浏览量、增量、独立访客和点赞数"""
+    article_id = 987654
+    keys = [f"{ARTICLE_VIEW_COUNT}{article_id}", f"{ARTICLE_LIKE_COUNT}{article_id}", article_view_keys(article_id)[2]]
+    redis_client.delete(*keys)
+    redis_client.sadd(f"{ARTICLE_LIKE_COUNT}{article_id}", 1, 2)
+    try:
+        # Redis 中没有记录且未提供初始值时不记录浏览
+        assert await increment_article_view(article_id, "ip:a") is None
+        assert not redis_client.exists(keys[0])
+        assert redis_client.hget(ARTICLE_VIEW_DELTAS, str(article_id)) is None
+
+        # Redis 中没有记录时以数据库浏览量为起点
+        assert await increment_article_view(article_id, "ip:a", seed_views=10) == {
+            "view_count": 11, "unique_visitors": 1, "like_count": 2
+        }
+        assert await increment_article_view(article_id, "ip:a", seed_views=10) == {
+            "view_count": 12, "unique_visitors": 1, "like_count": 2
+        }
+        assert (await increment_article_view(article_id, "u:1"))["unique_visitors"] == 2
+        assert redis_client.hget(ARTICLE_VIEW_DELTAS, str(article_id)) == "3"
+    finally:
+        redis_client.delete(*keys)
+        redis_client.hdel(ARTICLE_VIEW_DELTAS, str(article_id))